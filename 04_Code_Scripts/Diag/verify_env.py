@@ -1,5 +1,5 @@
 # verify_env.py — check versions + spaCy models + NLTK data, no fancy I/O
-import json, sys
+import json, sys, time
 
 def check_import(modname, nice=None):
     name = nice or modname
@@ -12,14 +12,20 @@ def check_import(modname, nice=None):
         print(f"[FAIL] {name}: {type(e).__name__}: {e}")
         return False, None
 
-def check_spacy_models(models):
+def check_spacy_models(langs, profile=None):
+    # via le registre partagé : un appelant du même processus réutilise les modèles chargés
     try:
-        import spacy
+        from pathlib import Path
+        sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+        from features.nlp_registry import get_nlp
+        from features.nlp_profiles import model_name
         ok = True
-        for name in models:
+        for lang in langs:
+            name = model_name(lang, profile)
             try:
-                spacy.load(name)
-                print(f"[OK]   spaCy model: {name}")
+                t0 = time.perf_counter()
+                get_nlp(lang, profile)
+                print(f"[OK]   spaCy model: {name} ({time.perf_counter() - t0:.2f}s)")
             except Exception as e:
                 print(f"[FAIL] spaCy model: {name} — {type(e).__name__}: {e}")
                 ok = False
@@ -78,7 +84,7 @@ def main():
         pass
 
     # spaCy models
-    models_ok = check_spacy_models(["fr_core_news_lg", "en_core_web_lg"])
+    models_ok = check_spacy_models(["FR", "EN"])
 
     # NLTK data
     nltk_ok = check_nltk()
@@ -1 +1,264 @@
-﻿# baseline: fine-tuned BERT stance classifier
+# 04_Code_Scripts/baselines/bert_stance_model.py
+"""
+Baseline : classifieur de stance BERT fine-tuné (CPU), pour AUC_bert.
+
+Étiquette document = fc_mean >= fi_mean (même construction que run_baselines
+au niveau fenêtre). Pour ne pas scorer un document avec un modèle entraîné
+dessus, cross-fitting : K plis déterministes (empreinte du texte), le modèle
+du pli k est entraîné sur les autres plis et ne score que le pli k.
+
+Coût CPU maîtrisé :
+- textes tokenisés une fois, sans troncature ; un Congressional Record est
+  découpé en fenêtres de BERT_MAX_LEN tokens (recouvrement BERT_STRIDE), au plus
+  BERT_MAX_WINDOWS fenêtres réparties sur le texte ; logits moyennés par document ;
+- fenêtres triées par longueur, lots de taille dynamique sous un budget de
+  tokens paddés (BERT_TOKEN_BUDGET) -> presque pas de padding ;
+- modèles fine-tunés gardés sous BERT_CACHE_DIR/models/<empreinte entraînement>/ ;
+  probabilités mises en cache par empreinte de document (features.feature_store) :
+  une relance sur le même corpus ne touche ni à l'entraînement ni à l'inférence ;
+- BERT_ONNX=1 : inférence ONNX Runtime (utils.onnx_encoder, tâche
+  sequence-classification) ; l'export d'un pli vit dans le dossier du modèle
+  (models/<empreinte>/fold<k>/onnx, créé au besoin) et son identité entre dans
+  la configuration du cache de probabilités : un export d'un autre entraînement
+  n'est jamais utilisé (hors échantillon garanti).
+
+ENV (optionnels)
+----------------
+BERT_STANCE_MODEL  : modèle de base (défaut distilbert-base-multilingual-cased, FR/EN)
+BERT_MAX_LEN       : tokens par fenêtre, spéciaux compris (défaut 256)
+BERT_STRIDE        : recouvrement entre fenêtres (défaut 64)
+BERT_MAX_WINDOWS   : fenêtres max par document (défaut 8)
+BERT_TOKEN_BUDGET  : tokens paddés max par lot (défaut 8192)
+BERT_FOLDS         : plis de cross-fitting (défaut 2)
+BERT_EPOCHS        : époques de fine-tuning (défaut 1)
+BERT_TRAIN_MAX     : documents max d'entraînement par pli (défaut 4000)
+BERT_CACHE_DIR     : défaut artifacts/cache/bert_stance
+BERT_ONNX          : 1 = inférence ONNX (int8 si disponible) au lieu de PyTorch (défaut 0)
+"""
+from __future__ import annotations
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+BASE_MODEL = os.environ.get("BERT_STANCE_MODEL", "distilbert-base-multilingual-cased")
+MAX_LEN = int(os.environ.get("BERT_MAX_LEN", "256"))
+STRIDE = int(os.environ.get("BERT_STRIDE", "64"))
+MAX_WINDOWS = int(os.environ.get("BERT_MAX_WINDOWS", "8"))
+TOKEN_BUDGET = int(os.environ.get("BERT_TOKEN_BUDGET", "8192"))
+FOLDS = int(os.environ.get("BERT_FOLDS", "2"))
+EPOCHS = int(os.environ.get("BERT_EPOCHS", "1"))
+TRAIN_MAX = int(os.environ.get("BERT_TRAIN_MAX", "4000"))
+CACHE_DIR = os.environ.get("BERT_CACHE_DIR", "artifacts/cache/bert_stance")
+USE_ONNX = os.environ.get("BERT_ONNX", "0") == "1"
+_CHARS_PER_TOKEN = 8
+
+
+def _require(mod: str):
+    import importlib
+    try:
+        return importlib.import_module(mod)
+    except ImportError as e:
+        raise RuntimeError(f"[bert_stance] '{mod}' is required for the BERT baseline "
+                           f"(pip install -r 06_Environnement/requirements.txt). Original error: {e}") from e
+
+
+# ---------- découpage / lots (sans torch) ----------
+def doc_windows(n_tokens: int, body_len: int, stride: int = STRIDE,
+                max_windows: int = MAX_WINDOWS) -> List[Tuple[int, int]]:
+    """Fenêtres (début, fin) de body_len tokens, recouvrement `stride` ; au plus max_windows, réparties."""
+    if n_tokens <= body_len:
+        return [(0, n_tokens)]
+    step = max(1, body_len - stride)
+    starts = list(range(0, n_tokens - body_len, step)) + [n_tokens - body_len]
+    if max_windows > 0 and len(starts) > max_windows:
+        pick = np.unique(np.linspace(0, len(starts) - 1, max_windows).round().astype(int))
+        starts = [starts[i] for i in pick]
+    return [(s, s + body_len) for s in starts]
+
+
+def fold_of(keys: Sequence[str], folds: int) -> np.ndarray:
+    """Pli déterministe par empreinte hexadécimale."""
+    return np.fromiter((int(k[:8], 16) % folds for k in keys), dtype=np.int64, count=len(keys))
+
+
+def token_batches(lengths: np.ndarray, budget: int = TOKEN_BUDGET) -> List[np.ndarray]:
+    """Lots de longueurs voisines, (longueur max × taille du lot) ≤ budget."""
+    from pipelines.teloi_matcher import length_batches
+    return length_batches(np.asarray(lengths), batch_size=max(1, budget), max_chars=budget)
+
+
+def window_mean(win: pd.DataFrame, docs: pd.DataFrame, values: np.ndarray, ts_col: str = "date") -> np.ndarray:
+    """Moyenne de `values` (une par document) sur chaque fenêtre (acteur, domaine, [win_start, win_end))."""
+    d = pd.DataFrame({"actor_id": docs["actor_id"].to_numpy(), "domain_id": docs["domain_id"].to_numpy(),
+                      "__ts__": pd.to_datetime(docs[ts_col], errors="coerce").to_numpy(),
+                      "__v__": np.asarray(values, dtype=float)})
+    w = win[["actor_id", "domain_id", "win_start", "win_end"]].reset_index(drop=True)
+    w["__w__"] = np.arange(len(w))
+    m = w.merge(d, on=["actor_id", "domain_id"], how="inner")
+    m = m[(m["__ts__"] >= pd.to_datetime(m["win_start"])) & (m["__ts__"] < pd.to_datetime(m["win_end"]))]
+    return m.groupby("__w__")["__v__"].mean().reindex(np.arange(len(w))).to_numpy()
+
+
+# ---------- modèle ----------
+def _pad(seqs: Sequence[List[int]], pad_id: int) -> Tuple[np.ndarray, np.ndarray]:
+    width = max(len(s) for s in seqs)
+    ids = np.full((len(seqs), width), pad_id, dtype=np.int64)
+    mask = np.zeros((len(seqs), width), dtype=np.int64)
+    for i, s in enumerate(seqs):
+        ids[i, :len(s)] = s
+        mask[i, :len(s)] = 1
+    return ids, mask
+
+
+def _windows(tok, texts: Sequence[str]) -> Tuple[List[List[int]], np.ndarray]:
+    """Fenêtres (ids avec tokens spéciaux) de tous les textes + document propriétaire."""
+    body = MAX_LEN - tok.num_special_tokens_to_add(pair=False)
+    limit = MAX_LEN * max(1, MAX_WINDOWS) * _CHARS_PER_TOKEN * 2  # inutile de tokeniser au-delà
+    ids = tok([(t or "")[:limit] for t in texts], add_special_tokens=False, truncation=False)["input_ids"]
+    wins: List[List[int]] = []
+    owner: List[int] = []
+    for i, seq in enumerate(ids):
+        for a, b in doc_windows(len(seq), body):
+            wins.append(tok.build_inputs_with_special_tokens(seq[a:b]))
+            owner.append(i)
+    return wins, np.asarray(owner, dtype=np.int64)
+
+
+def _torch_logits(model_dir: Path) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    torch = _require("torch")
+    transformers = _require("transformers")
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_dir).eval()
+
+    def run(ids: np.ndarray, mask: np.ndarray) -> np.ndarray:
+        with torch.inference_mode():
+            return model(input_ids=torch.from_numpy(ids), attention_mask=torch.from_numpy(mask)).logits.numpy()
+    return run
+
+
+def predict_proba(texts: Sequence[str], model_dir: str | Path, onnx_dir: Optional[str | Path] = None) -> np.ndarray:
+    """P(stance = 1) par texte : logits moyennés sur les fenêtres du texte."""
+    transformers = _require("transformers")
+    tok = transformers.AutoTokenizer.from_pretrained(model_dir)
+    if onnx_dir:
+        from utils.onnx_encoder import OnnxEncoder
+        enc = OnnxEncoder(onnx_dir)
+        logits_fn = lambda ids, mask: enc.run_ids(ids, mask)
+    else:
+        logits_fn = _torch_logits(Path(model_dir))
+    wins, owner = _windows(tok, texts)
+    if not wins:
+        return np.zeros(0)
+    logits = np.zeros((len(wins), 2), dtype=np.float64)
+    for idx in token_batches(np.fromiter(map(len, wins), dtype=np.int64, count=len(wins))):
+        ids, mask = _pad([wins[i] for i in idx], tok.pad_token_id or 0)
+        logits[idx] = logits_fn(ids, mask)
+    agg = np.zeros((len(texts), 2))
+    np.add.at(agg, owner, logits)
+    agg /= np.maximum(np.bincount(owner, minlength=len(texts)), 1)[:, None]
+    z = agg - agg.max(axis=1, keepdims=True)
+    return np.exp(z[:, 1]) / np.exp(z).sum(axis=1)
+
+
+def fine_tune(texts: Sequence[str], labels: Sequence[int], out_dir: str | Path, base_model: str = BASE_MODEL,
+              epochs: int = EPOCHS, lr: float = 3e-5, seed: int = 1337) -> Path:
+    """Fine-tuning binaire (tête du texte, MAX_LEN tokens), lots sous budget de tokens ; sauvegarde out_dir."""
+    torch = _require("torch")
+    transformers = _require("transformers")
+    torch.manual_seed(seed)
+    tok = transformers.AutoTokenizer.from_pretrained(base_model)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(base_model, num_labels=2)
+    enc = tok([(t or "")[:MAX_LEN * _CHARS_PER_TOKEN * 2] for t in texts], truncation=True, max_length=MAX_LEN)
+    seqs = enc["input_ids"]
+    y = np.asarray(labels, dtype=np.int64)
+    batches = token_batches(np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs)))
+    opt = torch.optim.AdamW(model.parameters(), lr=lr)
+    total = max(1, epochs * len(batches))
+    sched = torch.optim.lr_scheduler.LambdaLR(opt, lambda step: max(0.0, 1.0 - step / total))
+    rng = np.random.default_rng(seed)
+    model.train()
+    for ep in range(epochs):
+        t0, loss_sum = time.perf_counter(), 0.0
+        for b in rng.permutation(len(batches)):
+            idx = batches[b]
+            ids, mask = _pad([seqs[i] for i in idx], tok.pad_token_id or 0)
+            out = model(input_ids=torch.from_numpy(ids), attention_mask=torch.from_numpy(mask),
+                        labels=torch.from_numpy(y[idx]))
+            out.loss.backward()
+            torch.nn.utils.clip_grad_norm_(model.parameters(), 1.0)
+            opt.step(); sched.step(); opt.zero_grad()
+            loss_sum += float(out.loss) * len(idx)
+        print(f"[BERT] epoch {ep + 1}/{epochs} loss={loss_sum / max(1, len(seqs)):.4f} "
+              f"({len(seqs)} docs, {time.perf_counter() - t0:.0f}s)", flush=True)
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    model.save_pretrained(out)
+    tok.save_pretrained(out)
+    return out
+
+
+def onnx_export(model_dir: str | Path, export: bool = True) -> Tuple[Path, str]:
+    """
+    Export ONNX du modèle fine-tuné `model_dir` (model_dir/onnx, créé si absent et
+    export=True) et son identité (variante + empreinte de meta.json et du fichier
+    modèle). RuntimeError si l'export présent vient d'un autre modèle.
+    """
+    model_dir = Path(model_dir)
+    onnx_dir = model_dir / "onnx"
+    meta_path = onnx_dir / "meta.json"
+    if not meta_path.exists():
+        if not export:
+            raise FileNotFoundError(f"[bert_stance] no ONNX export in {onnx_dir}")
+        from utils.onnx_encoder import export_onnx
+        export_onnx(str(model_dir), onnx_dir, task="sequence-classification", max_seq_length=MAX_LEN)
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta.get("source") != str(model_dir) or meta.get("task") != "sequence-classification":
+        raise RuntimeError(f"[bert_stance] {onnx_dir} exports {meta.get('source')!r} "
+                           f"({meta.get('task')}), not {str(model_dir)!r}: delete it to re-export")
+    variant = "int8" if "int8" in meta["files"] else "fp32"
+    h = hashlib.blake2b(meta_path.read_bytes(), digest_size=8)
+    h.update(str((onnx_dir / meta["files"][variant]).stat().st_size).encode("ascii"))
+    return onnx_dir, f"onnx-{variant}-{h.hexdigest()}"
+
+
+# ---------- cross-fitting + cache ----------
+def score_docs(docs: pd.DataFrame, labels: Sequence[int], text_col: str = "text", folds: int = FOLDS,
+               cache_dir: Optional[str | Path] = None, base_model: str = BASE_MODEL,
+               use_onnx: Optional[bool] = None) -> np.ndarray:
+    """
+    P(stance = 1) hors échantillon pour chaque document (cross-fitting à `folds` plis) ;
+    use_onnx (défaut env BERT_ONNX) : inférence sur l'export ONNX du modèle de chaque pli.
+    """
+    use_onnx = USE_ONNX if use_onnx is None else use_onnx
+    cache_dir = Path(cache_dir or CACHE_DIR)
+    from features.feature_store import FeatureStore, compute_incremental, content_keys
+    if folds < 2:
+        raise ValueError(f"[bert_stance] need at least 2 folds for out-of-sample scores, got {folds}")
+    y = np.asarray(labels, dtype=np.int64)
+    keys = content_keys(docs, [text_col])
+    fold = fold_of(keys, folds)
+    blob = "\n".join(sorted(f"{k}\t{v}" for k, v in zip(keys, y))) + f"\n{base_model}|{MAX_LEN}|{EPOCHS}|{TRAIN_MAX}"
+    train_fp = hashlib.blake2b(blob.encode("utf-8"), digest_size=8).hexdigest()
+
+    p = np.full(len(docs), np.nan)
+    for k in range(folds):
+        model_dir = Path(cache_dir) / "models" / train_fp / f"fold{k}"
+        if not (model_dir / "config.json").exists():
+            tr = np.flatnonzero(fold != k)
+            if len(tr) > TRAIN_MAX:
+                tr = np.sort(np.random.default_rng(k).choice(tr, TRAIN_MAX, replace=False))
+            fine_tune(docs[text_col].iloc[tr].fillna("").astype(str).tolist(), y[tr], model_dir, base_model)
+        onnx_dir, runtime = onnx_export(model_dir) if use_onnx else (None, "torch")
+        store = FeatureStore(Path(cache_dir) / "preds", {"stage": "bert_stance", "train": train_fp, "fold": k,
+                                                         "max_len": MAX_LEN, "stride": STRIDE,
+                                                         "max_windows": MAX_WINDOWS, "runtime": runtime})
+        sel = np.flatnonzero(fold == k)
+        fn = lambda d: d.assign(p_bert=predict_proba(d[text_col].fillna("").astype(str).tolist(), model_dir, onnx_dir))
+        res = compute_incremental(docs.iloc[sel][[text_col]], keys[sel], fn, store)
+        p[sel] = res["p_bert"].to_numpy(dtype=float)
+    return p
@@ -0,0 +1,94 @@
+# 04_Code_Scripts/bench/bench_conative_matcher.py
+"""
+Benchmark du matcher conatif compilé vs boucle historique (lookups + rx.search par pattern).
+
+Usage:
+  python 04_Code_Scripts/bench/bench_conative_matcher.py [corpus.parquet] [--n 50] [--min-chars 20000]
+         [--lexicon 07_Config/lexicons/lexicon_conative_v1.clean.csv]
+
+Par défaut : artifacts/real/corpus_final.parquet, documents les plus longs (Congressional
+Record). Si absent, documents longs synthétiques (concaténation de data/mock/docs.parquet).
+spaCy est hors mesure : les lemmes sont les tokens \\w+ en minuscules, identiques pour
+les deux chemins. Vérifie que les scores sont identiques.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from features.conative import load_conative_lexicon, conative_from_lemmas
+from utils.tokens import tokenize
+
+
+def _reference(lemmas, text, lang, lex):
+    out = []
+    for tp in ("push", "inhibit"):
+        table = lex.lemmas.get(lang, {}).get(tp, {})
+        acc = {}
+        for lem in lemmas:
+            if lem in table:
+                w, cid = table[lem]
+                acc[cid] = max(acc.get(cid, 0.0), w)
+        raw = text.lower()
+        for rx, w, cid in lex.patterns.get(lang, {}).get(tp, []):
+            if rx.search(raw):
+                acc[cid] = max(acc.get(cid, 0.0), w)
+        out.append(min(1.0, sum(acc.values())))
+    return tuple(out)
+
+
+def _long_docs(corpus: str, n: int, min_chars: int) -> pd.DataFrame:
+    if os.path.exists(corpus):
+        df = pd.read_parquet(corpus)
+        df = df.assign(_len=df["text"].fillna("").str.len()).sort_values("_len", ascending=False)
+        return df.head(n)
+    mock = pd.read_parquet("data/mock/docs.parquet")
+    texts = mock["text"].fillna("").astype(str).tolist()
+    per_doc = max(1, min_chars // max(1, sum(map(len, texts)) // max(1, len(texts))))
+    docs = [" ".join(texts[(i * per_doc + j) % len(texts)] for j in range(per_doc)) for i in range(n)]
+    return pd.DataFrame({"text": docs, "language": "EN"})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?", default="artifacts/real/corpus_final.parquet")
+    ap.add_argument("--n", type=int, default=50)
+    ap.add_argument("--min-chars", type=int, default=20000, help="taille des documents synthétiques")
+    ap.add_argument("--lexicon", default=os.environ.get("CONATIVE_LEXICON_PATH")
+                    or "07_Config/lexicons/lexicon_conative_v1.clean.csv")
+    args = ap.parse_args()
+
+    lex = load_conative_lexicon(args.lexicon)
+    df = _long_docs(args.corpus, args.n, args.min_chars)
+    texts = df["text"].fillna("").astype(str).tolist()
+    langs = (df["language"].astype(str).str.upper().str[:2].tolist()
+             if "language" in df.columns else ["EN"] * len(texts))
+    lemmas = [[t.lower() for t in tokenize(x)] for x in texts]
+    lex.matcher("EN"); lex.matcher("FR")  # compilation hors mesure
+
+    t0 = time.perf_counter()
+    ref = [_reference(l, t, g, lex) for l, t, g in zip(lemmas, texts, langs)]
+    t_ref = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    out = [conative_from_lemmas(l, t, g, lex)[:2] for l, t, g in zip(lemmas, texts, langs)]
+    t_new = time.perf_counter() - t0
+
+    n_chars = sum(map(len, texts))
+    n_pat = sum(len(v) for d in lex.patterns.values() for v in d.values())
+    print(f"[BENCH] docs={len(texts)} chars={n_chars} (mean {n_chars // max(1, len(texts))}) patterns={n_pat}")
+    print(f"[BENCH] reference loop : {len(texts) / t_ref:.1f} docs/s ({t_ref:.3f}s)")
+    print(f"[BENCH] compiled       : {len(texts) / t_new:.1f} docs/s ({t_new:.3f}s)  speedup x{t_ref / t_new:.2f}")
+    same = ref == out
+    print(f"[BENCH] identical scores: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
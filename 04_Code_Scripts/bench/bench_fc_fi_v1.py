@@ -0,0 +1,75 @@
+# 04_Code_Scripts/bench/bench_fc_fi_v1.py
+"""
+Benchmark apply_fc_fi_v1 : boucle historique (chunk_size=0) vs moteur creux vectorisé.
+
+Usage:
+  python 04_Code_Scripts/bench/bench_fc_fi_v1.py [corpus.parquet] [--sizes 10000 100000 1000000]
+         [--chunk-size 100000] [--ref-max 1000000]
+
+Le corpus (défaut data/mock/docs.parquet) est répliqué jusqu'à chaque taille (--concat k :
+documents synthétiques de k textes, plus proches de discours réels). Le lexique
+est celui de tests/test_features_min.py. Au-delà de --ref-max documents, la boucle de
+référence est estimée par extrapolation linéaire depuis la plus grande taille mesurée.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from features.fc_fi import apply_fc_fi_v1
+
+LEXICON = {
+    "climate": {"pro": ["transition", "renewables", "green", "énergétique", "solaire", "éolien"],
+                "anti": ["coal", "fossil", "subsidies", "charbon", "pétrole", "gaz"]},
+    "security": {"pro": ["safety", "border", "security", "contrôles", "police", "protéger"],
+                 "anti": ["crime", "threat", "risque", "violence", "trafic"]},
+}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?", default="data/mock/docs.parquet")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--chunk-size", type=int, default=100_000)
+    ap.add_argument("--ref-max", type=int, default=1_000_000)
+    ap.add_argument("--concat", type=int, default=1,
+                    help="textes du corpus concaténés par document synthétique (documents plus longs)")
+    args = ap.parse_args()
+
+    base = pd.read_parquet(args.corpus)[["text"]]
+    if args.concat > 1:
+        texts = base["text"].fillna("").astype(str).tolist()
+        base = pd.DataFrame({"text": [" ".join(texts[(i + j) % len(texts)] for j in range(args.concat))
+                                      for i in range(len(texts))]})
+    per_doc = None
+    for n in args.sizes:
+        df = base.iloc[np.arange(n) % len(base)].reset_index(drop=True)
+
+        t0 = time.perf_counter()
+        out = apply_fc_fi_v1(df, LEXICON, chunk_size=args.chunk_size)
+        t_new = time.perf_counter() - t0
+
+        if n <= args.ref_max:
+            t0 = time.perf_counter()
+            ref = apply_fc_fi_v1(df, LEXICON, chunk_size=0)
+            t_ref = time.perf_counter() - t0
+            per_doc = t_ref / n
+            same = ref.equals(out)
+            tag = ""
+        else:
+            t_ref = per_doc * n if per_doc else float("nan")
+            same, tag = "n/a", " (estimated)"
+        print(f"[BENCH] docs={n:>9} tokens/doc={out['len_tokens'].mean():.0f} loop={t_ref:8.2f}s{tag} sparse={t_new:7.2f}s "
+              f"speedup x{t_ref / t_new:.1f}  identical={same}")
+        if same is False:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+# 04_Code_Scripts/bench/bench_fc_fi_v3.py
+"""
+Benchmark apply_fc_fi_v3 : chemin ligne à ligne vs moteur batch (nlp.pipe).
+
+Usage:
+  python 04_Code_Scripts/bench/bench_fc_fi_v3.py [corpus.parquet] [--n 500] [--batch-size 64] [--n-process 1]
+
+Par défaut lit data/mock/docs.parquet (colonnes text / language).
+Rapporte docs/sec pour chaque chemin et vérifie que les sorties sont identiques.
+"""
+from __future__ import annotations
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from features.fc_fi_v3 import apply_fc_fi_v3
+
+
+def _run(df: pd.DataFrame, lang_col, batch_size: int, n_process: int):
+    t0 = time.perf_counter()
+    out = apply_fc_fi_v3(df, lang_col=lang_col, batch_size=batch_size, n_process=n_process)
+    return out, time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?", default="data/mock/docs.parquet")
+    ap.add_argument("--n", type=int, default=500, help="nb de documents (échantillon de tête)")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--n-process", type=int, default=1)
+    args = ap.parse_args()
+
+    df = pd.read_parquet(args.corpus).head(args.n).reset_index(drop=True)
+    lang_col = "language" if "language" in df.columns else ("lang" if "lang" in df.columns else None)
+
+    # 1er appel : chauffe (chargement modèles / lexique) exclue des mesures
+    apply_fc_fi_v3(df.head(2), lang_col=lang_col, batch_size=0)
+
+    ref, t_row = _run(df, lang_col, 0, 1)
+    out, t_batch = _run(df, lang_col, args.batch_size, args.n_process)
+
+    same = ref[["fc", "fi", "beta"]].equals(out[["fc", "fi", "beta"]])
+    n = len(df)
+    print(f"[BENCH] docs={n} per-row: {n / t_row:.1f} docs/s ({t_row:.2f}s)")
+    print(f"[BENCH] docs={n} batched(batch_size={args.batch_size}, n_process={args.n_process}): "
+          f"{n / t_batch:.1f} docs/s ({t_batch:.2f}s)  speedup x{t_row / t_batch:.2f}")
+    print(f"[BENCH] identical outputs: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# 04_Code_Scripts/bench/bench_nlp_profiles.py
+"""
+Benchmark des profils spaCy (features.nlp_profiles) : temps de chargement, RSS, docs/sec.
+
+Usage:
+  python 04_Code_Scripts/bench/bench_nlp_profiles.py [corpus.parquet] [--lang EN] [--n 300]
+         [--profiles full lemma-accurate lemma-fast] [--batch-size 64]
+
+Chaque profil est mesuré dans un sous-processus neuf (RSS non pollué par les autres).
+Rapporte aussi le taux d'accord des lemmes avec le premier profil de la liste.
+"""
+from __future__ import annotations
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for ln in f:
+                if ln.startswith("VmRSS:"):
+                    return int(ln.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return float("nan")
+
+
+def _child(profile: str, lang: str, corpus: str, n: int, batch_size: int) -> None:
+    import pandas as pd
+    rss0 = _rss_mb()
+    t0 = time.perf_counter()
+    from features.nlp_profiles import load_profile
+    nlp = load_profile(lang, profile)
+    t_load = time.perf_counter() - t0
+    rss_load = _rss_mb()
+
+    df = pd.read_parquet(corpus)
+    lang_col = "language" if "language" in df.columns else ("lang" if "lang" in df.columns else None)
+    if lang_col:
+        df = df[df[lang_col].astype(str).str.upper().str.startswith(lang[:2])]
+    texts = df["text"].fillna("").astype(str).head(n).tolist()
+
+    t0 = time.perf_counter()
+    lemmas = [[t.lemma_.lower() for t in doc] for doc in nlp.pipe(texts, batch_size=batch_size)]
+    t_run = time.perf_counter() - t0
+    print(json.dumps({
+        "profile": profile, "pipes": nlp.pipe_names, "load_s": t_load,
+        "rss_load_mb": rss_load - rss0, "rss_peak_mb": _rss_mb(),
+        "docs": len(texts), "docs_s": len(texts) / t_run if t_run else float("inf"),
+        "lemmas": lemmas,
+    }))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?", default="data/mock/docs.parquet")
+    ap.add_argument("--lang", default="EN")
+    ap.add_argument("--n", type=int, default=300)
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--profiles", nargs="+", default=["full", "lemma-accurate", "lemma-fast"])
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        _child(args.child, args.lang, args.corpus, args.n, args.batch_size)
+        return
+
+    ref = None
+    for profile in args.profiles:
+        cmd = [sys.executable, __file__, args.corpus, "--lang", args.lang, "--n", str(args.n),
+               "--batch-size", str(args.batch_size), "--child", profile]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=dict(os.environ))
+        if proc.returncode != 0:
+            print(f"[BENCH] {profile}: FAILED " + " | ".join(proc.stderr.strip().splitlines()[-3:]))
+            continue
+        res = json.loads(proc.stdout.strip().splitlines()[-1])
+        toks = [l for doc in res["lemmas"] for l in doc]
+        if ref is None:
+            ref, agree = toks, 1.0
+        else:
+            agree = sum(a == b for a, b in zip(ref, toks)) / max(1, max(len(ref), len(toks)))
+        print(f"[BENCH] {profile:<15} load={res['load_s']:.2f}s rss(load)={res['rss_load_mb']:.0f}MB "
+              f"rss(peak)={res['rss_peak_mb']:.0f}MB {res['docs_s']:.1f} docs/s "
+              f"lemma_agreement={agree:.4f} pipes={','.join(res['pipes'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# 04_Code_Scripts/bench/bench_onnx.py
+"""
+Benchmark utils.onnx_encoder : débit (docs/s) PyTorch vs ONNX fp32 vs ONNX int8
+par nombre de threads, + dérive des embeddings par rapport à PyTorch.
+
+Usage:
+  python 04_Code_Scripts/bench/bench_onnx.py <onnx_dir> [corpus.parquet] [--model NAME]
+         [--n 512] [--threads 1 2 4 8] [--batch-size 32]
+
+<onnx_dir> : sortie de `python -m utils.onnx_encoder export <model> <onnx_dir>`.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import pandas as pd
+
+from utils.onnx_encoder import compare
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("onnx_dir")
+    ap.add_argument("corpus", nargs="?", default="data/mock/docs.parquet")
+    ap.add_argument("--model", default=None, help="modèle source (défaut : meta.json de l'export)")
+    ap.add_argument("--n", type=int, default=512)
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--batch-size", type=int, default=32)
+    args = ap.parse_args()
+
+    model = args.model or json.loads((Path(args.onnx_dir) / "meta.json").read_text(encoding="utf-8"))["source"]
+    base = pd.read_parquet(args.corpus, columns=["text"])
+    texts = base["text"].fillna("").astype(str).sample(args.n, replace=len(base) < args.n, random_state=0).tolist()
+    for th in args.threads:
+        r = compare(model, args.onnx_dir, texts, batch_size=args.batch_size, threads=th)
+        line = f"[BENCH] threads={th:2d} torch={r['torch_docs_s']:7.1f} docs/s"
+        for kind in ("fp32", "int8"):
+            if f"{kind}_docs_s" in r:
+                line += (f" {kind}={r[f'{kind}_docs_s']:7.1f} docs/s (x{r[f'{kind}_docs_s'] / r['torch_docs_s']:.1f},"
+                         f" min_cos={r[f'{kind}_drift']['min_cos']:.4f})")
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# 04_Code_Scripts/bench/bench_sharded.py
+"""
+Benchmark features.sharded : temps réel par nombre de workers + efficacité
+d'ordonnancement simulée (coût = tokens) contre un découpage naïf en blocs égaux.
+
+Usage:
+  python 04_Code_Scripts/bench/bench_sharded.py [corpus.parquet] [--stage v1|v2|v3]
+         [--workers 1 4 8 16 32] [--rows 20000] [--simulate-only]
+
+Efficacité simulée = coût total / (workers × makespan) ; 1.0 = aucun worker inactif.
+Le temps réel n'a de sens que sur une machine avec au moins autant de cœurs que
+de workers (et, pour v2/v3, les modèles spaCy installés).
+"""
+from __future__ import annotations
+import argparse
+import heapq
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from features.sharded import ShardedExecutor, estimate_cost, plan_shards
+from bench_fc_fi_v1 import LEXICON
+
+
+def makespan(shard_costs, workers: int) -> float:
+    # le prochain shard va au worker qui se libère le premier (ordre de soumission)
+    free = [0.0] * workers
+    for c in shard_costs:
+        heapq.heappush(free, heapq.heappop(free) + c)
+    return max(free)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("corpus", nargs="?", default="data/mock/docs.parquet")
+    ap.add_argument("--stage", default="v1", choices=["v1", "v2", "v3"])
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    ap.add_argument("--rows", type=int, default=20_000)
+    ap.add_argument("--simulate-only", action="store_true")
+    args = ap.parse_args()
+
+    base = pd.read_parquet(args.corpus)
+    df = base.sample(args.rows, replace=len(base) < args.rows, random_state=0).reset_index(drop=True)
+    if "tokens" not in df.columns:
+        # longueurs très inégales (GOV.UK vs Congressional Record) : textes répétés 1..100 fois
+        reps = np.random.default_rng(0).pareto(1.2, size=len(df)).clip(0, 99).astype(int) + 1
+        df["text"] = [(" " + t) * r for t, r in zip(df["text"].fillna("").astype(str), reps)]
+    cost = estimate_cost(df)
+    print(f"[BENCH] rows={len(df)} cost max/median={cost.max() / np.median(cost):.0f}x", flush=True)
+
+    ref = None
+    for w in args.workers:
+        shards = plan_shards(cost, w)
+        naive = np.array_split(np.arange(len(df)), w)
+        eff = cost.sum() / (w * makespan([cost[s].sum() for s in shards], w))
+        eff_naive = cost.sum() / (w * max(cost[s].sum() for s in naive))
+        line = f"[BENCH] workers={w:3d} shards={len(shards):4d} sim_eff={eff:.2f} (naive {eff_naive:.2f})"
+        if not args.simulate_only:
+            with ShardedExecutor(w) as ex:
+                ex.run(df.iloc[:w], args.stage, lexicon=LEXICON)  # démarrage du pool hors mesure
+                t0 = time.perf_counter()
+                out = ex.run(df, args.stage, lexicon=LEXICON)
+                dt = time.perf_counter() - t0
+            if ref is None:
+                ref = (dt, out)
+            same = out.equals(ref[1])
+            line += f" wall={dt:7.2f}s speedup x{ref[0] / dt:.1f} identical={same}"
+        print(line, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ import pandas as pd
 from bs4 import BeautifulSoup
 from dateutil import parser as dtparse
 from .domains import DOMAINS, MIN_MATCHES, MIN_TOKENS
+from utils.tokens import count_tokens  # tokenisation \w+ partagée
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
 
@@ -21,10 +22,6 @@ def clean_html_to_text(html_text: str) -> str:
     text = html.unescape(re.sub(r"\s+", " ", text)).strip()
     return text
 
-def count_tokens(txt: str) -> int:
-    # proxy simple
-    return len(re.findall(r"\w+", txt))
-
 def assign_domain(text: str) -> Optional[str]:
     text_l = text.lower()
     best = None
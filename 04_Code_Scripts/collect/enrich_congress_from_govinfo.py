@@ -20,6 +20,9 @@ Seuils contrôlables par env:
   CONGRESS_MIN_TOKENS  (int, défaut 0)
   CONGRESS_PDF_MAX_MB  (float, défaut 25.0)
   CONGRESS_UA          (str,   défaut "Axiodynamics-POC/1.0 (+research)")
+Télémétrie (cf. collect/telemetry.py):
+  COLLECT_METRICS_PATH (défaut artifacts/metrics/congress_enrich.jsonl, "0" = off)
+  COLLECT_PROM_PATH    (optionnel)
 
 Usage
 -----
@@ -30,6 +33,7 @@ python 04_Code_Scripts\collect\enrich_congress_from_govinfo.py input.csv [output
 
 from __future__ import annotations
 import os, sys, csv, re, io, time, shutil
+from pathlib import Path
 from typing import Tuple, List, Dict, Any, Optional
 
 import requests
@@ -37,12 +41,20 @@ import csv, sys  # (si pas déjà importés tout en haut)
 from bs4 import BeautifulSoup
 from pdfminer.high_level import extract_text
 
+# lancé comme script (cf. Usage) : 04_Code_Scripts sur le chemin, comme avec python -m
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from collect.telemetry import CollectorMetrics
+from utils.tokens import count_tokens as _tokens_count  # \w+ partagé
+
 
 UA = os.environ.get("CONGRESS_UA", "Axiodynamics-POC/1.0 (+research)")
 HDRS = {"User-Agent": UA}
 MIN_TOK = int(os.environ.get("CONGRESS_MIN_TOKENS", "0") or "0")
 PDF_MAX_MB = float(os.environ.get("CONGRESS_PDF_MAX_MB", "25") or "25")
 
+METRICS = CollectorMetrics.from_env("congress_enrich")
+
 def _bump_csv_limit():
     # Monte la limite CSV au maximum supporté par la plateforme
     max_int = sys.maxsize
@@ -54,9 +66,6 @@ def _bump_csv_limit():
             max_int = max_int // 10  # réduit jusqu'à passer
 
 
-def _tokens_count(txt: str) -> int:
-    return len(re.findall(r"\w+", txt or ""))
-
 def _to_public_url(api_url: str) -> str:
     """
     Transforme une URL API → URL publique congress.gov
@@ -73,8 +82,15 @@ def _to_public_url(api_url: str) -> str:
             return f"https://www.congress.gov/congressional-record/{rec_id}"
     return api_url
 
-def _http_get(url: str, allow_redirects: bool = True, timeout: int = 60) -> requests.Response:
-    return requests.get(url, headers=HDRS, allow_redirects=allow_redirects, timeout=timeout)
+def _http_get(url: str, allow_redirects: bool = True, timeout: int = 60, phase: str = "html") -> requests.Response:
+    t0 = time.perf_counter()
+    try:
+        r = requests.get(url, headers=HDRS, allow_redirects=allow_redirects, timeout=timeout)
+    except requests.RequestException as e:
+        METRICS.observe_request(url, phase, type(e).__name__, time.perf_counter() - t0)
+        raise
+    METRICS.observe_request(url, phase, r.status_code, time.perf_counter() - t0, nbytes=len(r.content or b""))
+    return r
 
 def _find_pdf_url_from_public_page(public_url: str) -> str:
     """
@@ -112,23 +128,43 @@ def _find_pdf_url_from_public_page(public_url: str) -> str:
 
 def _download_pdf(url: str) -> Optional[bytes]:
     try:
-        r = _http_get(url)
+        r = _http_get(url, phase="pdf")
         if r.status_code != 200:
             return None
         return r.content
     except Exception:
         return None
 
-def _extract_text_from_pdf_bytes(b: bytes) -> str:
+def _strip_page_furniture(text: str) -> str:
+    """En-têtes courants / numéros de page / lignes VerDate (avant compactage)."""
+    try:
+        from etl.boilerplate import strip_page_furniture  # lazy import
+    except Exception:
+        return text
+    return strip_page_furniture(text)
+
+def _extract_text_from_pdf_bytes(b: bytes, doc: str = "") -> str:
     try:
-        with io.BytesIO(b) as bio:
+        with io.BytesIO(b) as bio, METRICS.cpu_timer("pdfminer", doc=doc) as info:
             txt = extract_text(bio)
-        # Nettoyage léger
-        txt = re.sub(r"\s+", " ", txt or "").strip()
+            info["bytes"] = len(b)
+            info["chars"] = len(txt or "")
+        # Mobilier de page (en-têtes courants, VerDate, n° de page) puis nettoyage léger
+        txt = _strip_page_furniture(txt or "")
+        txt = re.sub(r"\s+", " ", txt).strip()
         return txt
     except Exception:
         return ""
 
+def _title_fallback(row: Dict[str, str], url: str, title: str, n_title: int) -> Optional[Dict[str, str]]:
+    """Garde la ligne avec son titre comme texte s'il atteint MIN_TOK, sinon None."""
+    if n_title >= MIN_TOK:
+        row["url"] = url
+        row["text"] = title
+        row["tokens"] = str(n_title)
+        return row
+    return None
+
 def _enrich_row(row: Dict[str, str]) -> Optional[Dict[str, str]]:
     """
     Tente d’enrichir UNE ligne issue (Congressional Record) :
@@ -139,62 +175,39 @@ def _enrich_row(row: Dict[str, str]) -> Optional[Dict[str, str]]:
     """
     api_url = (row.get("url") or "").strip()
     title   = (row.get("text") or "").strip()
+    n_title = _tokens_count(title)  # compté une fois pour tous les fallbacks
 
     public_url = _to_public_url(api_url)
     if not public_url:
         # fallback : garder la ligne si titre assez long (peu probable)
-        if _tokens_count(title) >= MIN_TOK:
-            row["url"] = api_url
-            row["text"] = title
-            row["tokens"] = str(_tokens_count(title))
-            return row
-        return None
+        return _title_fallback(row, api_url, title, n_title)
 
     pdf_url = _find_pdf_url_from_public_page(public_url)
     if not pdf_url:
         # pas de PDF → garder titre si assez long
-        if _tokens_count(title) >= MIN_TOK:
-            row["url"] = public_url
-            row["text"] = title
-            row["tokens"] = str(_tokens_count(title))
-            return row
-        return None
+        return _title_fallback(row, public_url, title, n_title)
 
     b = _download_pdf(pdf_url)
     if not b:
         # fallback titre
-        if _tokens_count(title) >= MIN_TOK:
-            row["url"] = public_url
-            row["text"] = title
-            row["tokens"] = str(_tokens_count(title))
-            return row
-        return None
+        return _title_fallback(row, public_url, title, n_title)
 
     size_mb = len(b) / 1e6
     if size_mb > PDF_MAX_MB:
         # trop gros → fallback titre
-        if _tokens_count(title) >= MIN_TOK:
-            row["url"] = public_url
-            row["text"] = title
-            row["tokens"] = str(_tokens_count(title))
-            return row
-        return None
+        return _title_fallback(row, public_url, title, n_title)
 
-    txt = _extract_text_from_pdf_bytes(b)
-    if _tokens_count(txt) < MIN_TOK:
+    txt = _extract_text_from_pdf_bytes(b, doc=pdf_url)
+    n_txt = _tokens_count(txt)
+    if n_txt < MIN_TOK:
         # texte trop court → fallback titre si possible
-        if _tokens_count(title) >= MIN_TOK:
-            row["url"] = public_url
-            row["text"] = title
-            row["tokens"] = str(_tokens_count(title))
-            return row
-        return None
+        return _title_fallback(row, public_url, title, n_title)
 
     # Enrichissement réussi
     row["url"] = public_url
     row["language"] = row.get("language") or "EN"
     row["text"] = txt
-    row["tokens"] = str(_tokens_count(txt))
+    row["tokens"] = str(n_txt)
     return row
 
 def _read_rows(path: str) -> List[Dict[str,str]]:
@@ -252,4 +265,5 @@ def main():
     print(f"[OK] Enriched: {outp}  kept={len(kept)} / seen={seen}  (MIN_TOKENS={MIN_TOK}, MAX_MB={PDF_MAX_MB})")
 
 if __name__ == "__main__":
-    main()
+    with METRICS:  # summary / .prom même sur sortie anticipée
+        main()
@@ -20,6 +20,8 @@ CONGRESS_PAGE_SIZE    : taille page offset (défaut 20).
 CONGRESS_MAX_OFFSET   : offset max (défaut 2000).
 CONGRESS_PDF_MAX_MB   : taille max PDF (défaut 30).
 CONGRESS_HTTP_TIMEOUT : timeout HTTP sec (défaut 30).
+COLLECT_METRICS_PATH  : télémétrie JSONL (défaut artifacts/metrics/congress.jsonl, "0" = off).
+COLLECT_PROM_PATH     : export textfile Prometheus (optionnel).
 
 Exemples (PowerShell)
 ---------------------
@@ -44,6 +46,9 @@ from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
+from .telemetry import CollectorMetrics
+from utils.tokens import count_tokens as _tokens_count  # \w+ partagé
+
 # ----------------------------
 # Constantes / ENV
 # ----------------------------
@@ -64,21 +69,28 @@ _SESSION = requests.Session()
 _SESSION.headers.update(HDRS)
 _BACKOFFS = (0.5, 1.0, 2.0)
 
+METRICS = CollectorMetrics.from_env("congress")
+
 
 # ----------------------------
 # Utilitaires
 # ----------------------------
-def _http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout: int = HTTP_TIMEOUT) -> Optional[requests.Response]:
-    """GET avec backoff minimal ; renvoie response ou None."""
+def _http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout: int = HTTP_TIMEOUT,
+              phase: str = "html") -> Optional[requests.Response]:
+    """GET avec backoff minimal ; renvoie response ou None. Chaque tentative est mesurée."""
     for i, delay in enumerate((0, *_BACKOFFS)):
         if delay:
             time.sleep(delay)
+        t0 = time.perf_counter()
         try:
             r = _SESSION.get(url, params=params, timeout=timeout, stream=False)
-        except requests.RequestException:
+        except requests.RequestException as e:
+            METRICS.observe_request(url, phase, type(e).__name__, time.perf_counter() - t0, retries=i)
             if i == len(_BACKOFFS):
                 return None
             continue
+        METRICS.observe_request(url, phase, r.status_code, time.perf_counter() - t0,
+                                nbytes=len(r.content or b""), retries=i)
         if r.status_code in (429, 500, 502, 503, 504):
             if i == len(_BACKOFFS):
                 return r
@@ -87,12 +99,6 @@ def _http_get(url: str, params: Optional[Dict[str, Any]] = None, timeout: int =
     return None
 
 
-def _tokens_count(txt: str) -> int:
-    if not txt:
-        return 0
-    return len(re.findall(r"\w+", txt))
-
-
 def _to_date(s: str) -> Optional[date]:
     if not s:
         return None
@@ -138,7 +144,7 @@ def _strip_noise_bs(soup):
             pass
 
 
-def _extract_long_text_from_html(html: str) -> str:
+def _extract_long_text_from_html(html: str, doc: str = "") -> str:
     """Extrait un texte lisible depuis l'HTML public (fallback brut si bs4 absent)."""
     if not html:
         return ""
@@ -148,6 +154,13 @@ def _extract_long_text_from_html(html: str) -> str:
         # fallback : texte brut compacté
         return re.sub(r"\s+", " ", html)
 
+    with METRICS.cpu_timer("html_parse", doc=doc) as info:
+        text = _html_to_text(BeautifulSoup, html)
+        info["chars"] = len(text)
+    return text
+
+
+def _html_to_text(BeautifulSoup, html: str) -> str:
     try:
         soup = BeautifulSoup(html, "lxml")
     except Exception:
@@ -212,8 +225,12 @@ def _find_pdf_links(html: str, base_url: str = "") -> List[str]:
 # ----------------------------
 def _pdf_bytes_limited(url: str) -> Optional[bytes]:
     """Télécharge un PDF avec limite de taille ; renvoie bytes ou None."""
+    t0 = time.perf_counter()
+    total = 0
+    status: Any = "error"
     try:
         with _SESSION.get(url, timeout=HTTP_TIMEOUT, stream=True, headers=HDRS) as r:
+            status = r.status_code
             if r.status_code != 200:
                 return None
             # Head content-length si dispo
@@ -227,7 +244,6 @@ def _pdf_bytes_limited(url: str) -> Optional[bytes]:
                     pass
             # Téléchargement limité
             chunks = []
-            total = 0
             for chunk in r.iter_content(chunk_size=1024 * 64):
                 if not chunk:
                     break
@@ -236,22 +252,37 @@ def _pdf_bytes_limited(url: str) -> Optional[bytes]:
                 if total > PDF_MAX_BYTES:
                     return None
             return b"".join(chunks)
-    except requests.RequestException:
+    except requests.RequestException as e:
+        status = type(e).__name__
         return None
+    finally:
+        METRICS.observe_request(url, "pdf", status, time.perf_counter() - t0, nbytes=total)
+
+
+def _strip_page_furniture(text: str) -> str:
+    """En-têtes courants / numéros de page / lignes VerDate (avant compactage)."""
+    try:
+        from etl.boilerplate import strip_page_furniture  # lazy import
+    except Exception:
+        return text
+    return strip_page_furniture(text)
 
 
-def _extract_text_from_pdf_bytes(data: bytes) -> str:
+def _extract_text_from_pdf_bytes(data: bytes, doc: str = "") -> str:
     """Extrait du texte depuis des bytes PDF avec pdfminer.six ; fallback si non dispo."""
     if not data:
         return ""
     try:
         from pdfminer.high_level import extract_text
         import io
-        with io.BytesIO(data) as f:
+        with io.BytesIO(data) as f, METRICS.cpu_timer("pdfminer", doc=doc) as info:
             try:
                 text = extract_text(f) or ""
             except Exception:
                 text = ""
+            info["bytes"] = len(data)
+            info["chars"] = len(text)
+        text = _strip_page_furniture(text)
         text = re.sub(r"\s+", " ", text).strip()
         return text
     except Exception:
@@ -278,9 +309,9 @@ def _dig_congressdotgov_url(js: dict) -> str:
     return ""
 
 
-def _expand_issue_text(api_detail_url: str) -> Tuple[str, str]:
+def _expand_issue_text(api_detail_url: str) -> Tuple[str, str, int]:
     """
-    Retourne (public_url, full_text) :
+    Retourne (public_url, full_text, n_tokens) :
       - charge le JSON détail pour obtenir la public URL ;
       - tente extraction HTML ;
       - si tokens insuffisants (<400), cherche un lien PDF et extrait via pdfminer.six ;
@@ -292,7 +323,7 @@ def _expand_issue_text(api_detail_url: str) -> Tuple[str, str]:
     # 1) Obtenir l'URL publique
     try:
         if api_detail_url.startswith(BASE):
-            r = _http_get(api_detail_url, params=_params())
+            r = _http_get(api_detail_url, params=_params(), phase="api")
             if r is not None and r.status_code == 200:
                 try:
                     js = r.json()
@@ -310,12 +341,13 @@ def _expand_issue_text(api_detail_url: str) -> Tuple[str, str]:
         if public_url:
             rh = _http_get(public_url)
             if rh is not None and rh.status_code == 200:
-                full_text = _extract_long_text_from_html(rh.text)
+                full_text = _extract_long_text_from_html(rh.text, doc=public_url)
     except Exception:
         full_text = ""
 
     # 3) Si peu de tokens, tenter PDF
-    if _tokens_count(full_text) < 400 and public_url:
+    n_full = _tokens_count(full_text)
+    if n_full < 400 and public_url:
         # Essayer de trouver un lien PDF dans la page
         pdf_urls = []
         try:
@@ -329,16 +361,17 @@ def _expand_issue_text(api_detail_url: str) -> Tuple[str, str]:
             pdf_bytes = _pdf_bytes_limited(pu)
             if not pdf_bytes:
                 continue
-            pdf_text = _extract_text_from_pdf_bytes(pdf_bytes)
-            if _tokens_count(pdf_text) >= _tokens_count(full_text):
+            pdf_text = _extract_text_from_pdf_bytes(pdf_bytes, doc=pu)
+            n_pdf = _tokens_count(pdf_text)
+            if n_pdf >= n_full:
                 # remplace si mieux
-                full_text = pdf_text
+                full_text, n_full = pdf_text, n_pdf
                 public_url = pu  # pointer directement sur le PDF pour traçabilité
             # si déjà “assez long”, on peut s’arrêter
-            if _tokens_count(full_text) >= max(MIN_TOKENS, 800):
+            if n_full >= max(MIN_TOKENS, 800):
                 break
 
-    return public_url or api_detail_url, full_text
+    return public_url or api_detail_url, full_text, n_full
 
 
 # ----------------------------
@@ -353,7 +386,7 @@ def _collect_cr_by_offset(d1: date, d2: date, limit: int,
     for offset in range(1, max_offset + 1, page_size):
         params = _params({"pageSize": page_size, "offset": offset})
         url = f"{BASE}/congressional-record"
-        r = _http_get(url, params=params)
+        r = _http_get(url, params=params, phase="api")
         if r is None:
             print(f"[WARN] endpoint=congressional-record offset={offset} error=None", flush=True)
             continue
@@ -395,11 +428,11 @@ def _collect_cr_by_offset(d1: date, d2: date, limit: int,
             api_detail_url = f"{BASE}/congressional-record/{issue_id}?format=json"
             title = f"Congressional Record — Vol {vol}, Issue {issue_no}".strip(" —")
 
-            public_url, long_text = _expand_issue_text(api_detail_url)
+            public_url, long_text, tok = _expand_issue_text(api_detail_url)  # texte compté une fois
             # Fallback historique : si extraction faible, retitre
-            if _tokens_count(long_text) < 50:
+            if tok < 50:
                 long_text = title
-            tok = _tokens_count(long_text)
+                tok = _tokens_count(long_text)
 
             # Filtre confirmatory (optionnel)
             if MIN_TOKENS > 0 and tok < MIN_TOKENS:
@@ -497,4 +530,5 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    with METRICS:  # summary / .prom même sur sortie anticipée
+        main()
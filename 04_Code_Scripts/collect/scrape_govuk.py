@@ -24,18 +24,21 @@ import csv
 import sys
 import os
 import math
+import time
 import datetime as dt
 from typing import Any, Dict, List
 
 import requests
 
+from .telemetry import CollectorMetrics
+from utils.tokens import count_tokens as _tokens_count  # \w+ partagé (ex-split())
+
 
 API_URL = "https://www.gov.uk/api/search.json"
 DEFAULT_COUNT = 50  # batch size pour l'API
 
-
-def _tokens_count(text: str) -> int:
-    return len(text.split()) if text else 0
+# Télémétrie JSONL (COLLECT_METRICS_PATH / COLLECT_PROM_PATH, cf. collect/telemetry.py)
+METRICS = CollectorMetrics.from_env("govuk")
 
 
 def _search_once(org_slug: str,
@@ -59,7 +62,13 @@ def _search_once(org_slug: str,
         "count": count,
     }
 
-    r = requests.get(API_URL, params=params, timeout=30)
+    t0 = time.perf_counter()
+    try:
+        r = requests.get(API_URL, params=params, timeout=30)
+    except requests.RequestException as e:
+        METRICS.observe_request(API_URL, "api", type(e).__name__, time.perf_counter() - t0)
+        raise
+    METRICS.observe_request(API_URL, "api", r.status_code, time.perf_counter() - t0, nbytes=len(r.content or b""))
     try:
         r.raise_for_status()
     except Exception as e:
@@ -216,4 +225,5 @@ def main() -> None:
 
 
 if __name__ == "__main__":
-    main()
+    with METRICS:  # summary / .prom même sur sortie anticipée
+        main()
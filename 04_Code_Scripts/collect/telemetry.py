@@ -0,0 +1,203 @@
+# 04_Code_Scripts/collect/telemetry.py
+# -*- coding: utf-8 -*-
+"""
+Télémétrie des collecteurs (débit, latences, statuts, CPU d'extraction).
+
+- Un événement JSON par requête HTTP / extraction, écrit au fil de l'eau (JSON lines,
+  robuste à un crash) ; un événement "summary" final avec les histogrammes.
+- Histogrammes de latence par (host, phase) ; phases usuelles :
+  api (JSON Congress / GOV.UK), html (pages publiques), pdf (téléchargements),
+  pdfminer / html_parse (extraction, temps CPU par document).
+- Export optionnel au format textfile Prometheus (node_exporter textfile collector).
+
+ENV (optionnels)
+---------------
+COLLECT_METRICS_PATH : fichier JSONL (défaut artifacts/metrics/<collector>.jsonl ; "0" = désactivé)
+COLLECT_PROM_PATH    : fichier .prom écrit à la fermeture (défaut : aucun)
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+from urllib.parse import urlsplit
+
+# bornes supérieures (secondes) des histogrammes de latence / CPU
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self) -> None:
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, v: float) -> None:
+        for i, ub in enumerate(LATENCY_BUCKETS):
+            if v <= ub:
+                self.counts[i] += 1
+                break
+        self.total += v
+        self.n += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "buckets": {("+Inf" if ub == float("inf") else str(ub)): c
+                        for ub, c in zip(LATENCY_BUCKETS, self.counts)},
+            "sum": round(self.total, 6),
+            "count": self.n,
+        }
+
+
+def _host(url: str) -> str:
+    try:
+        return urlsplit(url).netloc or "unknown"
+    except Exception:
+        return "unknown"
+
+
+class CollectorMetrics:
+    """Compteurs + histogrammes par (host, phase), sérialisés en JSONL / Prometheus."""
+
+    def __init__(self, collector: str, jsonl_path: Optional[str] = None, prom_path: Optional[str] = None) -> None:
+        self.collector = collector
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self._lock = threading.RLock()  # close() -> summary() sous le même verrou
+        self._fh = None
+        self.requests: Dict[Tuple[str, str, str], int] = {}   # (host, phase, status) -> n
+        self.retries: Dict[Tuple[str, str], int] = {}
+        self.bytes: Dict[Tuple[str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], _Histogram] = {}
+        self.cpu: Dict[str, _Histogram] = {}                  # phase -> CPU s / doc
+        self.t_start = time.time()
+        self._closed = False
+
+    @classmethod
+    def from_env(cls, collector: str) -> "CollectorMetrics":
+        path = os.environ.get("COLLECT_METRICS_PATH", f"artifacts/metrics/{collector}.jsonl")
+        if path.strip() in {"", "0"}:
+            path = None
+        prom = os.environ.get("COLLECT_PROM_PATH") or None
+        return cls(collector, jsonl_path=path, prom_path=prom)
+
+    # ---------- écriture ----------
+    def _emit(self, event: Dict[str, Any]) -> None:
+        if not self.jsonl_path or self._closed:  # rien après le summary
+            return
+        if self._fh is None:
+            os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+            self._fh = open(self.jsonl_path, "a", encoding="utf-8", buffering=1)
+        event = {"ts": round(time.time(), 3), "collector": self.collector, **event}
+        self._fh.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    # ---------- observations ----------
+    def observe_request(self, url: str, phase: str, status: Any, latency_s: float,
+                        nbytes: int = 0, retries: int = 0) -> None:
+        host = _host(url)
+        st = str(status)
+        with self._lock:
+            self.requests[(host, phase, st)] = self.requests.get((host, phase, st), 0) + 1
+            if retries:
+                self.retries[(host, phase)] = self.retries.get((host, phase), 0) + 1
+            self.bytes[(host, phase)] = self.bytes.get((host, phase), 0) + int(nbytes or 0)
+            self.latency.setdefault((host, phase), _Histogram()).observe(latency_s)
+            self._emit({"event": "http", "host": host, "phase": phase, "status": st,
+                        "latency_s": round(latency_s, 6), "bytes": int(nbytes or 0), "retry": int(retries)})
+
+    @contextmanager
+    def cpu_timer(self, phase: str, doc: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Mesure CPU + mur de l'extraction du document `doc` (URL de la page / du PDF) ;
+        l'appelant peut renseigner info['chars'].
+        """
+        info: Dict[str, Any] = {}
+        c0, w0 = time.process_time(), time.perf_counter()
+        try:
+            yield info
+        finally:
+            cpu = time.process_time() - c0
+            wall = time.perf_counter() - w0
+            with self._lock:
+                self.cpu.setdefault(phase, _Histogram()).observe(cpu)
+                self._emit({"event": "extract", "phase": phase, "doc": doc,
+                            "cpu_s": round(cpu, 6), "wall_s": round(wall, 6), **info})
+
+    # ---------- synthèse ----------
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "elapsed_s": round(time.time() - self.t_start, 3),
+                "requests": [{"host": h, "phase": p, "status": s, "n": n}
+                             for (h, p, s), n in sorted(self.requests.items())],
+                "retries": [{"host": h, "phase": p, "n": n} for (h, p), n in sorted(self.retries.items())],
+                "bytes": [{"host": h, "phase": p, "n": n} for (h, p), n in sorted(self.bytes.items())],
+                "latency_s": [{"host": h, "phase": p, **hist.as_dict()}
+                              for (h, p), hist in sorted(self.latency.items())],
+                "extract_cpu_s": [{"phase": p, **hist.as_dict()} for p, hist in sorted(self.cpu.items())],
+            }
+
+    def write_prometheus(self, path: str) -> None:
+        c = self.collector
+        lines = [
+            "# TYPE collector_requests_total counter",
+            *[f'collector_requests_total{{collector="{c}",host="{h}",phase="{p}",status="{s}"}} {n}'
+              for (h, p, s), n in sorted(self.requests.items())],
+            "# TYPE collector_retries_total counter",
+            *[f'collector_retries_total{{collector="{c}",host="{h}",phase="{p}"}} {n}'
+              for (h, p), n in sorted(self.retries.items())],
+            "# TYPE collector_bytes_total counter",
+            *[f'collector_bytes_total{{collector="{c}",host="{h}",phase="{p}"}} {n}'
+              for (h, p), n in sorted(self.bytes.items())],
+        ]
+
+        def _hist(name: str, labels: str, hist: _Histogram) -> None:
+            cum = 0
+            for ub, cnt in zip(LATENCY_BUCKETS, hist.counts):
+                cum += cnt
+                le = "+Inf" if ub == float("inf") else str(ub)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cum}')
+            lines.append(f"{name}_sum{{{labels}}} {hist.total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {hist.n}")
+
+        lines.append("# TYPE collector_request_latency_seconds histogram")
+        for (h, p), hist in sorted(self.latency.items()):
+            _hist("collector_request_latency_seconds", f'collector="{c}",host="{h}",phase="{p}"', hist)
+        lines.append("# TYPE collector_extract_cpu_seconds histogram")
+        for p, hist in sorted(self.cpu.items()):
+            _hist("collector_extract_cpu_seconds", f'collector="{c}",phase="{p}"', hist)
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)  # atomique pour le textfile collector
+
+    def close(self) -> None:
+        """Écrit l'événement summary (+ .prom si demandé) et ferme le JSONL ; idempotent."""
+        with self._lock:  # pas d'événement d'un autre thread intercalé dans la fermeture
+            if self._closed:
+                return
+            self._emit({"event": "summary", **self.summary()})
+            if self.prom_path:
+                self.write_prometheus(self.prom_path)
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+            self._closed = True
+        if self.jsonl_path:
+            print(f"[METRICS] {self.collector} → {self.jsonl_path}"
+                  + (f" (+ {self.prom_path})" if self.prom_path else ""), flush=True)
+
+    # with METRICS: main()  -> summary écrit aussi sur return anticipé / sys.exit / exception
+    def __enter__(self) -> "CollectorMetrics":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
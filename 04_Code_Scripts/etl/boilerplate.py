@@ -0,0 +1,242 @@
+# 04_Code_Scripts/etl/boilerplate.py
+# -*- coding: utf-8 -*-
+"""
+Suppression du boilerplate (mobilier de page) avant NLP.
+
+Deux niveaux :
+  1) strip_page_furniture(text) : par document, AVANT compactage des espaces
+     (texte pdfminer avec sauts de ligne / \\f entre pages). Supprime les lignes
+     de haut / bas de page répétées sur une majorité de pages (en-têtes courants,
+     numéros de page, lignes "VerDate ... Sfmt ...").
+  2) strip_boilerplate(df) : étape batch vectorisée sur le corpus fusionné.
+     Apprend, par source (actor_id), la fréquence documentaire des segments
+     (lignes ou phrases normalisées) et retire ceux répétés dans une large part
+     des documents (bandeau cookies GOV.UK, navigation, tables de sommaire).
+
+Le nombre de tokens retirés est reporté (colonne `tokens_removed` + résumé),
+pour rendre visible le travail spaCy économisé.
+
+Usage
+-----
+python -m etl.boilerplate artifacts/real/corpus_final.parquet artifacts/real/corpus_clean.parquet
+"""
+
+from __future__ import annotations
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Set
+
+import pandas as pd
+
+from utils.tokens import count_tokens_batch
+
+# Mobilier connu (Congressional Record / GPO / GOV.UK), valable même sur texte compacté
+_FURNITURE_RES = [
+    # ligne technique GPO : "VerDate Sep 11 2014 01:23 Mar 02, 2021 Jkt 019060 PO 00000 Frm 00001 Fmt 4634 Sfmt 0634 E:\CR\FM\..."
+    re.compile(r"VerDate\b.{0,160}?Sfmt\s+\d+(?:\s+[A-Z]:\\\S+)?(?:\s+[A-Z]\d{2}[A-Z]{2}[A-Z0-9]*)?", re.IGNORECASE),
+    # en-tête courant : "CONGRESSIONAL RECORD — HOUSE H1234"
+    re.compile(r"CONGRESSIONAL RECORD\s*[—–-]+\s*(?:HOUSE|SENATE|Extensions of Remarks)(?:\s+[HSE]\s?\d{1,5})?", re.IGNORECASE),
+    # bandeau cookies / navigation GOV.UK
+    re.compile(r"Cookies on GOV\.UK.{0,400}?(?:Hide this message|Change your cookie settings)", re.IGNORECASE),
+    re.compile(r"Skip to main content", re.IGNORECASE),
+]
+
+# Ligne entièrement "numéro de page" (H1234, S 567, Page 3 of 12, 42)
+_PAGE_NO_RE = re.compile(r"^\s*(?:[HSE]\s?\d{1,5}|page\s+\d+(?:\s+of\s+\d+)?|\d{1,5})\s*$", re.IGNORECASE)
+
+# Segmentation : lignes si présentes, sinon phrases
+_SEG_SPLIT_RE = r"\s*\n\s*|(?<=[.!?])\s+"
+
+
+def _norm_segment(s: str) -> str:
+    s = re.sub(r"\d+", "0", s.lower())
+    return re.sub(r"\s+", " ", s).strip()
+
+
+def _strip_furniture_inline(text: str) -> str:
+    for rx in _FURNITURE_RES:
+        text = rx.sub(" ", text)
+    return text
+
+
+# =============== niveau document (collecteurs) ===============
+
+def strip_page_furniture(text: str, min_page_frac: float = 0.5, min_chars: int = 12,
+                         edge_lines: int = 3) -> str:
+    """
+    Retire le mobilier de page d'un texte pdfminer (pages séparées par \\f).
+    - lignes identiques (chiffres masqués) présentes sur >= min_page_frac des pages
+      (au moins 2 pages), parmi les `edge_lines` premières / dernières lignes de
+      chaque page : en-têtes/pieds courants. Comme fit_boilerplate, les lignes de
+      moins de min_chars caractères (normalisées) ne sont jamais retirées, et une
+      formule répétée dans le corps des pages ("There was no objection.") reste.
+    - lignes "numéro de page" seules, en première / dernière ligne non vide d'une
+      page et seulement si le texte a plusieurs pages : une année, un
+      n° d'amendement ou un décompte de vote seul sur sa ligne dans le corps reste
+    - motifs connus (VerDate, en-tête Congressional Record, cookies GOV.UK)
+    Les sauts de ligne sont conservés ; le compactage reste à la charge de l'appelant.
+    """
+    if not text:
+        return ""
+    pages = [page.splitlines() for page in text.split("\f")]
+    repeated: Set[str] = set()
+    if len(pages) >= 3:
+        counts: Dict[str, int] = {}
+        for lines in pages:
+            edges = lines if len(lines) <= 2 * edge_lines else lines[:edge_lines] + lines[-edge_lines:]
+            for key in {_norm_segment(ln) for ln in edges}:
+                if len(key) >= min_chars:
+                    counts[key] = counts.get(key, 0) + 1
+        thr = max(2, min_page_frac * len(pages))
+        repeated = {k for k, n in counts.items() if n >= thr}
+
+    paged = len(pages) >= 2  # sans \f, pas de bord de page fiable
+    kept = []
+    for lines in pages:
+        n = len(lines)
+        filled = [i for i, ln in enumerate(lines) if ln.strip()]
+        ends = {filled[0], filled[-1]} if paged and filled else set()
+        for i, ln in enumerate(lines):
+            if i in ends and _PAGE_NO_RE.match(ln):
+                continue
+            if repeated and (i < edge_lines or i >= n - edge_lines) and _norm_segment(ln) in repeated:
+                continue
+            kept.append(ln)
+    return _strip_furniture_inline("\n".join(kept))
+
+
+# =============== niveau corpus (batch vectorisé) ===============
+
+@dataclass
+class BoilerplateModel:
+    """Segments normalisés jugés boilerplate, par source."""
+    keys: Dict[str, Set[str]] = field(default_factory=dict)
+    n_docs: Dict[str, int] = field(default_factory=dict)
+
+    def n_keys(self) -> int:
+        return sum(len(v) for v in self.keys.values())
+
+    def to_index(self) -> pd.MultiIndex:
+        pairs = [(src, k) for src, ks in self.keys.items() for k in ks]
+        return pd.MultiIndex.from_tuples(pairs, names=["_src", "_key"]) if pairs else \
+            pd.MultiIndex.from_arrays([[], []], names=["_src", "_key"])
+
+
+def _texts_and_sources(df: pd.DataFrame, text_col: str, source_col: str):
+    # index positionnel : l'index d'entrée peut être non unique
+    texts = df[text_col].fillna("").astype(str).reset_index(drop=True)
+    if source_col in df.columns:
+        sources = df[source_col].fillna("").astype(str).reset_index(drop=True)
+    else:
+        sources = pd.Series("", index=texts.index)
+    return texts, sources
+
+
+def _norm_segments(seg: pd.Series) -> pd.Series:
+    # équivalent vectorisé de _norm_segment
+    return (seg.str.lower()
+               .str.replace(r"\d+", "0", regex=True)
+               .str.replace(r"\s+", " ", regex=True)
+               .str.strip())
+
+
+def _explode_segments(texts: pd.Series) -> pd.Series:
+    seg = texts.map(_strip_furniture_inline).str.split(_SEG_SPLIT_RE, regex=True).explode()
+    return seg.fillna("").astype(str)
+
+
+def fit_boilerplate(
+    df: pd.DataFrame,
+    text_col: str = "text",
+    source_col: str = "actor_id",
+    min_docs: int = 5,
+    min_doc_frac: float = 0.3,
+    min_chars: int = 12,
+) -> BoilerplateModel:
+    """
+    Apprend les segments répétés par source.
+    Un segment est boilerplate s'il apparaît dans >= max(min_docs, min_doc_frac * N_source)
+    documents distincts de la même source. Les segments plus courts que min_chars
+    (normalisés) sont ignorés pour ne pas retirer de formules brèves légitimes.
+    """
+    texts, sources = _texts_and_sources(df, text_col, source_col)
+
+    seg = _explode_segments(texts)
+    keys = _norm_segments(seg)
+    long_enough = keys.str.len() >= min_chars
+    pairs = pd.DataFrame({
+        "_doc": seg.index[long_enough],
+        "_src": sources.reindex(seg.index[long_enough]).to_numpy(),
+        "_key": keys[long_enough].to_numpy(),
+    }).drop_duplicates(["_doc", "_key"])
+
+    n_docs = sources.value_counts()
+    dfreq = pairs.groupby(["_src", "_key"]).size().rename("n").reset_index()
+    dfreq["thr"] = dfreq["_src"].map(n_docs).astype(float).mul(min_doc_frac).clip(lower=min_docs)
+    hits = dfreq[dfreq["n"] >= dfreq["thr"]]
+
+    model = BoilerplateModel(n_docs={str(k): int(v) for k, v in n_docs.items()})
+    for src, grp in hits.groupby("_src"):
+        model.keys[str(src)] = set(grp["_key"])
+    return model
+
+
+def strip_boilerplate(
+    df: pd.DataFrame,
+    model: Optional[BoilerplateModel] = None,
+    text_col: str = "text",
+    source_col: str = "actor_id",
+    tokens_col: Optional[str] = "tokens",
+    **fit_kwargs,
+) -> pd.DataFrame:
+    """
+    Étape batch : retire furniture + segments boilerplate (appris sur df si model=None).
+    Ajoute `tokens_removed` et, si tokens_col est fourni, recompte cette colonne.
+    """
+    if text_col not in df.columns:
+        raise ValueError(f"[boilerplate] text_col '{text_col}' is missing in df")
+    if model is None:
+        model = fit_boilerplate(df, text_col=text_col, source_col=source_col, **fit_kwargs)
+
+    out = df.copy()
+    texts, sources = _texts_and_sources(out, text_col, source_col)
+    tok_before = pd.Series(count_tokens_batch(texts), index=texts.index)
+
+    seg = _explode_segments(texts)
+    keys = _norm_segments(seg)
+    src = sources.reindex(seg.index)
+    drop = pd.Series(
+        pd.MultiIndex.from_arrays([src.to_numpy(), keys.to_numpy()]).isin(model.to_index()),
+        index=seg.index,
+    )
+    kept = seg[~drop & seg.str.strip().ne("")]
+    cleaned = kept.groupby(level=0).agg(" ".join).reindex(texts.index).fillna("")
+    cleaned = cleaned.str.replace(r"\s+", " ", regex=True).str.strip()
+
+    tok_after = pd.Series(count_tokens_batch(cleaned), index=cleaned.index)
+    out[text_col] = cleaned.to_numpy()
+    out["tokens_removed"] = (tok_before - tok_after).clip(lower=0).astype(int).to_numpy()
+    if tokens_col:
+        out[tokens_col] = tok_after.astype(int).to_numpy()
+
+    n_before = int(tok_before.sum())
+    n_removed = int(out["tokens_removed"].sum())
+    pct = 100.0 * n_removed / n_before if n_before else 0.0
+    print(f"[BOILERPLATE] docs={len(out)} sources={len(model.n_docs)} patterns={model.n_keys()} "
+          f"segments_dropped={int(drop.sum())} tokens_removed={n_removed}/{n_before} ({pct:.1f}%)", flush=True)
+    return out
+
+
+def main(inp: str, outp: str) -> None:
+    df = pd.read_parquet(inp)
+    out = strip_boilerplate(df)
+    out.to_parquet(outp, index=False)
+    print(f"OK parquet: {outp} ({len(out)} docs)")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python -m etl.boilerplate <in_parquet> <out_parquet>", file=sys.stderr)
+        sys.exit(2)
+    main(sys.argv[1], sys.argv[2])
@@ -1,31 +1,18 @@
 # 04_Code_Scripts/features/conative.py
 from __future__ import annotations
-import csv, io, re
+import csv, io, os, pickle, re, sys
 from pathlib import Path
 from typing import Dict, List, Tuple, Optional
 
 # --- spaCy loader (demandé par fc_fi_v3._precheck_or_fail) -------------------
-def _load_spacy_or_fail(lang: str):
+def _load_spacy_or_fail(lang: str, profile: Optional[str] = None):
     """
-    Charge et retourne le pipeline spaCy pour 'FR' ou 'EN'.
+    Retourne le pipeline spaCy partagé (features.nlp_registry) pour 'FR' ou 'EN'.
+    profile : profil features.nlp_profiles (env SPACY_PROFILE, défaut lemma-accurate).
     Échec immédiat si indisponible.
     """
-    import spacy
-    lang = lang.upper()
-    model_by_lang = {
-        "FR": "fr_core_news_lg",
-        "EN": "en_core_web_lg",
-    }
-    if lang not in model_by_lang:
-        raise ValueError(f"[conative] unknown language {lang!r} (expected FR or EN)")
-    model = model_by_lang[lang]
-    try:
-        return spacy.load(model)
-    except Exception as e:
-        raise RuntimeError(
-            f"[conative] spaCy model '{model}' not available. "
-            f"Install it, e.g.:\n  python -m spacy download {model}\nOriginal error: {e}"
-        )
+    from features.nlp_registry import get_nlp
+    return get_nlp(lang.upper(), profile)
 
 # --- Types & constantes -------------------------------------------------------
 Entry = Dict[str, str]
@@ -34,16 +21,27 @@ REQUIRED_MIN = {"lemma", "language", "type", "weight"}
 ALLOWED_TYPES = {"push", "inhibit"}
 ALLOWED_POS = {None, "", "VERB", "AUX", "ADV", "NOUN", "ADJ", "PHRASE"}
 
-# --- Utils --------------------------------------------------------------------
-def _norm_txt(s: str) -> str:
-    return s.lower()
+# Artefact compilé : version du format (à incrémenter si la structure change)
+LEXICON_FORMAT = 2
+_LEXICON_CACHE_DIR = os.environ.get("CONATIVE_LEXICON_CACHE", "artifacts/cache/lexicon")  # "0" = désactivé
+_LEXICON_MEMO: Dict[Tuple[str, str], "ConativeLexicon"] = {}
 
-def _read_utf8_no_bom(path: Path) -> str:
-    raw = path.read_bytes()
-    # strip UTF-8 BOM if present
-    if raw.startswith(b"\xef\xbb\xbf"):
-        raw = raw[3:]
-    return raw.decode("utf-8")
+# --- Utils --------------------------------------------------------------------
+def read_lexicon_rows(path: str | Path) -> Tuple[List[str], List[Dict[str, Optional[str]]], bool]:
+    """
+    Lecture CSV partagée (loader, verify_lexicon.py, repair_lexicon.py).
+    UTF-8 avec ou sans BOM ; en-têtes normalisés (strip + minuscules) ; valeurs brutes
+    (None si la ligne est trop courte). Retourne (header, rows, had_bom).
+    """
+    raw = Path(path).read_bytes()
+    had_bom = raw.startswith(b"\xef\xbb\xbf")
+    text = (raw[3:] if had_bom else raw).decode("utf-8")
+    reader = csv.DictReader(io.StringIO(text, newline=""))
+    if not reader.fieldnames:
+        return [], [], had_bom
+    header = [h.lstrip("\ufeff").strip().lower() for h in reader.fieldnames]
+    reader.fieldnames = header
+    return header, list(reader), had_bom
 
 def _parse_float(x: str) -> float:
     try:
@@ -62,12 +60,27 @@ class ConativeLexicon:
         self.lemmas: Dict[str, Dict[str, Dict[str, Tuple[float, Optional[str]]]]] = {}
         # patterns[lang][type] = List[(compiled_re, weight, concept_id)]
         self.patterns: Dict[str, Dict[str, List[Tuple[re.Pattern, float, Optional[str]]]]] = {}
+        # matchers compilés par langue (features.conative_matcher), construits à la demande
+        self._matchers: Dict[str, "CompiledMatcher"] = {}
+        # empreinte du CSV source (blake2b du contenu) + format ; None si construit en mémoire
+        self.fingerprint: Optional[str] = None
+        self.source: Optional[str] = None
+        self.format = LEXICON_FORMAT
+
+    def matcher(self, lang: str) -> "CompiledMatcher":
+        lang = lang.upper()
+        m = self._matchers.get(lang)
+        if m is None:
+            from features.conative_matcher import CompiledMatcher
+            m = self._matchers[lang] = CompiledMatcher(self, lang)
+        return m
 
     def add_lemma(self, lang: str, tp: str, lemma: str, weight: float, concept_id: Optional[str]) -> None:
         self.lemmas.setdefault(lang, {}).setdefault(tp, {})
         prev = self.lemmas[lang][tp].get(lemma)
         if prev is None or weight > prev[0]:
             self.lemmas[lang][tp][lemma] = (weight, concept_id)
+        self._matchers.pop(lang, None)
 
     def add_pattern(self, lang: str, tp: str, pattern: str, weight: float, concept_id: Optional[str]) -> None:
         try:
@@ -75,52 +88,40 @@ class ConativeLexicon:
         except re.error as e:
             raise ValueError(f"[conative] invalid regex for {lang}/{tp}: {pattern!r} ({e})")
         self.patterns.setdefault(lang, {}).setdefault(tp, []).append((rx, weight, concept_id))
+        self._matchers.pop(lang, None)
 
-def load_conative_lexicon(csv_path: Optional[str|Path] = None) -> ConativeLexicon:
-    """Charge un CSV riche ou minimal. Échec immédiat si problème."""
+def _find_lexicon(csv_path: Optional[str|Path]) -> Path:
     # Emplacements possibles
     candidates = []
     if csv_path:
         candidates.append(Path(csv_path))
     candidates += [Path("01_Protocoles/lexicon_conative_v1.csv"),
                    Path("01_Protocoles/lexicon_conative.csv")]
-
-    found: Optional[Path] = None
     for p in candidates:
         if p.exists():
-            found = p
-            break
-    if not found:
-        raise FileNotFoundError("[conative] lexicon CSV not found in 01_Protocoles (expected lexicon_conative_v1.csv)")
+            return p
+    raise FileNotFoundError("[conative] lexicon CSV not found in 01_Protocoles (expected lexicon_conative_v1.csv)")
 
-    text = _read_utf8_no_bom(found)
-    reader = csv.DictReader(io.StringIO(text))
-    if not reader.fieldnames:
+def parse_conative_lexicon(path: str | Path) -> ConativeLexicon:
+    """Parse + valide le CSV (sans cache). Échec immédiat si problème."""
+    header, rows, _ = read_lexicon_rows(path)
+    if not header:
         raise ValueError("[conative] CSV has no header")
-
-    # Normalise en-têtes
-    hdr = [h.strip() for h in reader.fieldnames]
-    field_map = {h.lower(): h for h in hdr}
-
-    if not REQUIRED_MIN.issubset(set(field_map.keys())):
-        raise ValueError(f"[conative] CSV header must contain {REQUIRED_MIN}, got {set(field_map.keys())}")
-
-    # Champs optionnels
-    f_concept = field_map.get("concept_id")
-    f_pos     = field_map.get("pos")
-    f_re      = field_map.get("pattern_lemma_re")
+    if not REQUIRED_MIN.issubset(set(header)):
+        raise ValueError(f"[conative] CSV header must contain {REQUIRED_MIN}, got {set(header)}")
 
     lex = ConativeLexicon()
     n_rows = 0
-    for row in reader:
+    _i = sys.intern
+    for row in rows:
         n_rows += 1
-        lemma    = row[field_map["lemma"]].strip()
-        lang     = row[field_map["language"]].strip().upper()
-        tp       = row[field_map["type"]].strip().lower()
-        weight   = _parse_float(row[field_map["weight"]].strip())
-        concept  = row[f_concept].strip() if f_concept and row.get(f_concept) else None
-        pos      = row[f_pos].strip().upper() if f_pos and row.get(f_pos) else None
-        patt_re  = row[f_re].strip() if f_re and row.get(f_re) else None
+        lemma    = row["lemma"].strip()
+        lang     = row["language"].strip().upper()
+        tp       = row["type"].strip().lower()
+        weight   = _parse_float(row["weight"].strip())
+        concept  = row["concept_id"].strip() if row.get("concept_id") else None
+        pos      = row["pos"].strip().upper() if row.get("pos") else None
+        patt_re  = row["pattern_lemma_re"].strip() if row.get("pattern_lemma_re") else None
 
         if not lemma or not lang or not tp:
             raise ValueError(f"[conative] empty lemma/lang/type at row {n_rows}")
@@ -129,6 +130,9 @@ def load_conative_lexicon(csv_path: Optional[str|Path] = None) -> ConativeLexico
         if pos not in ALLOWED_POS:
             raise ValueError(f"[conative] invalid pos {pos!r} at row {n_rows}, allowed {ALLOWED_POS}")
 
+        # chaînes internées : tables partagées entre lexique, matchers et scores
+        lang, tp, lemma = _i(lang), _i(tp), _i(lemma)
+        concept = _i(concept) if concept else None
         lex.add_lemma(lang, tp, lemma, weight, concept)
         if patt_re:
             lex.add_pattern(lang, tp, patt_re, weight, concept)
@@ -138,57 +142,131 @@ def load_conative_lexicon(csv_path: Optional[str|Path] = None) -> ConativeLexico
 
     return lex
 
+def load_conative_lexicon(csv_path: Optional[str|Path] = None, use_cache: bool = True) -> ConativeLexicon:
+    """
+    Charge un CSV riche ou minimal. Échec immédiat si problème.
+
+    Artefact compilé : le lexique validé (tables internées + matchers par langue)
+    est picklé sous CONATIVE_LEXICON_CACHE (défaut artifacts/cache/lexicon), nommé
+    par l'empreinte du contenu CSV et LEXICON_FORMAT. Réutilisé tant que l'empreinte
+    correspond, reconstruit automatiquement sinon. Mémo par processus en plus.
+    `lex.fingerprint` identifie la version du lexique utilisée par un run.
+    """
+    from utils.hashing import file_hash
+    found = _find_lexicon(csv_path)
+    fp = f"{file_hash(found)}-f{LEXICON_FORMAT}"
+    memo_key = (str(found.resolve()), fp)
+    if use_cache and memo_key in _LEXICON_MEMO:
+        return _LEXICON_MEMO[memo_key]
+
+    art = None
+    if use_cache and _LEXICON_CACHE_DIR.strip() not in {"", "0"}:
+        art = Path(_LEXICON_CACHE_DIR) / f"{found.stem}.{fp}.lexc"
+        if art.exists():
+            try:
+                with open(art, "rb") as f:
+                    lex = pickle.load(f)
+                if getattr(lex, "fingerprint", None) == fp and getattr(lex, "format", None) == LEXICON_FORMAT:
+                    _LEXICON_MEMO[memo_key] = lex
+                    return lex
+            except Exception:
+                pass  # artefact corrompu / incompatible : reconstruit ci-dessous
+
+    lex = parse_conative_lexicon(found)
+    lex.fingerprint = fp
+    lex.source = str(found)
+    for lang in lex.lemmas.keys() | lex.patterns.keys():
+        lex.matcher(lang)  # pré-construits dans l'artefact
+    if art is not None:
+        try:
+            art.parent.mkdir(parents=True, exist_ok=True)
+            tmp = art.with_suffix(f".tmp{os.getpid()}")
+            with open(tmp, "wb") as f:
+                pickle.dump(lex, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, art)
+        except OSError as e:
+            print(f"[WARN] [conative] cannot write lexicon artifact {art}: {e}", flush=True)
+    if use_cache:
+        _LEXICON_MEMO[memo_key] = lex
+    return lex
+
 # --- API principale -----------------------------------------------------------
-def conative_from_text(text: str, lang: str, nlp=None, lex: Optional[ConativeLexicon]=None) -> Tuple[float, float, Dict]:
+def conative_from_text(text: str, lang: str, nlp=None, lex: Optional[ConativeLexicon]=None,
+                       store=None, max_chars: Optional[int] = None,
+                       spans: bool = False) -> Tuple[float, float, Dict]:
     """
     Retourne (push, inhibit, debug) pour un texte/lang.
     - utilise spaCy (nlp) pour lemmes
     - applique en plus les regex pattern_lemma_re s'il y en a
     - dé-double par concept_id si présent (max des signaux lemma/pattern)
+    - store (features.lemma_store.LemmaStore du même modèle) : lemmes relus si le
+      texte est connu, sinon nlp(text) puis persistance
+    - texte plus long que max_chars (env CONATIVE_MAX_CHARS, défaut nlp.max_length) :
+      parsé par tranches (features.nlp_chunks) ; lemmes concaténés, patterns sur le
+      texte complet. debug["n_chunks"] = nb de tranches.
+    - spans=True : debug["spans"] = [(entrée, début, fin)] des passages qui ont matché
+      (offsets des tokens du store ou des tranches ; features.conative_evidence)
     """
+    from features.nlp_chunks import chunk_lemmas, chunk_offsets, n_chunks, pipe_chunks
     if lex is None:
         lex = load_conative_lexicon()
 
-    lang = lang.upper()
-    push_lem = lex.lemmas.get(lang, {}).get("push", {})
-    inh_lem  = lex.lemmas.get(lang, {}).get("inhibit", {})
-    push_rx  = lex.patterns.get(lang, {}).get("push", [])
-    inh_rx   = lex.patterns.get(lang, {}).get("inhibit", [])
-
     if nlp is None:
         raise RuntimeError("[conative] spaCy nlp pipeline is required (no fallback in production)")
 
-    doc = nlp(text)
-    # 1) signaux par lemme
-    concept_score_push: Dict[Optional[str], float] = {}
-    concept_score_inh: Dict[Optional[str], float]  = {}
-
-    for tok in doc:
-        lem = tok.lemma_.lower()
-        if lem in push_lem:
-            w, cid = push_lem[lem]
-            concept_score_push[cid] = max(concept_score_push.get(cid, 0.0), w)
-        if lem in inh_lem:
-            w, cid = inh_lem[lem]
-            concept_score_inh[cid] = max(concept_score_inh.get(cid, 0.0), w)
-
-    # 2) signaux par pattern (regex sur texte normalisé)
-    raw = _norm_txt(text)
-    for rx, w, cid in push_rx:
-        if rx.search(raw):
-            concept_score_push[cid] = max(concept_score_push.get(cid, 0.0), w)
-    for rx, w, cid in inh_rx:
-        if rx.search(raw):
-            concept_score_inh[cid] = max(concept_score_inh.get(cid, 0.0), w)
-
-    # 3) agrégation (somme bornée à 1.0 par canal)
-    push_score = min(1.0, sum(concept_score_push.values()))
-    inh_score  = min(1.0, sum(concept_score_inh.values()))
+    if store is not None:
+        from utils.hashing import text_hash
+        key = text_hash(text)
+        dl = store.get(key)
+        if dl is None:
+            parts = next(pipe_chunks(nlp, [text], max_chars))
+            store.put_chunks(key, parts)
+            dl = store.get(key)
+            n_parts = len(parts)
+        else:
+            n_parts = n_chunks(text, nlp, max_chars)  # lemmes relus : pas de parse
+        push, inh, debug = conative_from_lemmas(store.lemmas(dl), text, lang, lex,
+                                                offsets=(dl.starts, dl.ends) if spans else None)
+    else:
+        parts = next(pipe_chunks(nlp, [text], max_chars))
+        push, inh, debug = conative_from_lemmas(chunk_lemmas(parts), text, lang, lex,
+                                                offsets=(lambda: chunk_offsets(parts)) if spans else None)
+        n_parts = len(parts)
+    debug["n_chunks"] = n_parts
+    return push, inh, debug
+
+def conative_from_doc(doc, text: str, lang: str, lex: ConativeLexicon) -> Tuple[float, float, Dict]:
+    """
+    Même calcul que conative_from_text, sur un Doc spaCy déjà produit
+    (ex. par nlp.pipe en batch). `text` est le texte brut ayant produit `doc`.
+    """
+    return conative_from_lemmas([tok.lemma_.lower() for tok in doc], text, lang, lex)
+
+def conative_from_lemmas(lemmas: List[str], text: str, lang: str, lex: ConativeLexicon,
+                         offsets=None) -> Tuple[float, float, Dict]:
+    """
+    Même calcul sur la séquence des lemmes (minuscules) d'un texte, p. ex. relue
+    depuis le LemmaStore sans repasser par spaCy. Lemmes et patterns passent par le
+    matcher compilé du lexique (un seul parcours du texte pour tous les patterns).
+    offsets (débuts, fins des tokens, ou fonction les calculant, appelée seulement
+    s'il y a des hits) : debug["spans"] = passages ayant matché.
+    """
+    lang = lang.upper()
+    m = lex.matcher(lang)
+    hits = m.match(lemmas, text)
+    push_score, inh_score, concept_score_push, concept_score_inh = m.score(hits)
 
     debug = {
         "lang": lang,
         "push_matched": concept_score_push,
         "inhibit_matched": concept_score_inh,
-        "n_tokens": len(doc),
+        "n_tokens": len(lemmas),
+        "hits": hits,
     }
+    if offsets is not None:
+        if not (hits.lemma or hits.pattern):
+            debug["spans"] = []
+        else:
+            starts, ends = offsets() if callable(offsets) else offsets
+            debug["spans"] = m.spans(hits, lemmas, starts, ends, text)
     return push_score, inh_score, debug
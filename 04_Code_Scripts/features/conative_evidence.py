@@ -0,0 +1,177 @@
+# 04_Code_Scripts/features/conative_evidence.py
+"""
+Preuves conatives par document : quels passages ont produit push / inhibit.
+
+conative_from_text calcule les hits puis les réduit en deux scores ; pour
+montrer à un relecteur les tokens qui ont fait β il fallait repasser spaCy.
+En option (apply_fc_fi_v3(evidence_path=...), env FCFI_EVIDENCE_PATH), les
+passages sont gardés au moment du scoring, à partir des offsets de tokens déjà
+disponibles (LemmaStore starts / ends, ou tranches spaCy) et des regex touchées :
+
+  une ligne par passage : entry (colonne de la table des entrées, comme
+  features.conative_hits), start, end (caractères du texte)
+  indptr : passages du document i = [indptr[i], indptr[i+1])
+
+Colonnes compactes (int32 / uint32) ; chaque save() ajoute une part à <dir>
+(part-*.npz, .entries.parquet, .docs.parquet (doc_id, key = text_hash, lang),
+.json), comme features.conative_hits : lots du runner en flux et shards des
+workers s'ajoutent sans s'écraser. load() concatène les parts (un doc_id
+présent dans plusieurs parts est pris dans la plus récente), puis recherche
+par doc_id en O(1) :
+
+    ev = Evidence.load("artifacts/mock/features_doc.evidence")
+    ev.spans("d42")                    # DataFrame start, end, type, source, concept_id, weight, key
+    ev.highlight("d42", text)          # "... we [[must|push:C_OBLIG 0.90]] act ..."
+
+Usage
+-----
+python -m features.conative_evidence artifacts/mock/features_doc.evidence <doc_id> [features_doc.parquet]
+"""
+from __future__ import annotations
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features.conative_hits import entry_table, latest_rows, merge_entries, read_parts, write_part
+
+
+class Evidence:
+    """Passages (entrée, début, fin) par document, en colonnes ; recherche par doc_id."""
+
+    def __init__(self, indptr: np.ndarray, entry: np.ndarray, start: np.ndarray, end: np.ndarray,
+                 entries: pd.DataFrame, docs: pd.DataFrame, lexicon_fp: Optional[str] = None) -> None:
+        self.indptr, self.entry, self.start, self.end = indptr, entry, start, end
+        self.entries = entries.reset_index(drop=True)
+        self.docs = docs.reset_index(drop=True)
+        self.lexicon_fp = lexicon_fp
+        self._rows: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    @property
+    def n_spans(self) -> int:
+        return int(self.indptr[-1])
+
+    def row(self, doc_id) -> int:
+        """Ligne d'un doc_id (KeyError si inconnu)."""
+        if self._rows is None:
+            self._rows = {str(d): i for i, d in enumerate(self.docs["doc_id"])}
+        try:
+            return self._rows[str(doc_id)]
+        except KeyError:
+            raise KeyError(f"[conative_evidence] unknown doc_id {doc_id!r}") from None
+
+    def spans(self, doc_id) -> pd.DataFrame:
+        """Passages d'un document triés par position, avec leur entrée du lexique."""
+        i = self.row(doc_id)
+        sl = slice(int(self.indptr[i]), int(self.indptr[i + 1]))
+        e = self.entry[sl]
+        out = pd.DataFrame({"start": self.start[sl].astype(np.int64), "end": self.end[sl].astype(np.int64)})
+        for c in ("type", "source", "concept_id", "weight", "key"):
+            out[c] = self.entries[c].to_numpy()[e]
+        return out
+
+    def highlight(self, doc_id, text: str, mark: Tuple[str, str] = ("[[", "]]"), labels: bool = True) -> str:
+        """
+        `text` (celui du document, p. ex. features_doc[text]) avec les passages entourés
+        de `mark` ; passages qui se chevauchent fusionnés, étiquettes type:concept poids.
+        """
+        sp = self.spans(doc_id)
+        if not len(sp):
+            return text
+        merged: List[List] = []
+        for r in sp.itertuples(index=False):
+            lab = f"{r.type}:{r.concept_id or r.key} {r.weight:.2f}"
+            if merged and r.start < merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], r.end)
+                if lab not in merged[-1][2]:
+                    merged[-1][2].append(lab)
+            else:
+                merged.append([r.start, r.end, [lab]])
+        out, pos = [], 0
+        for a, b, labs in merged:
+            out.append(text[pos:a])
+            out.append(mark[0] + text[a:b] + ("|" + "; ".join(labs) if labels else "") + mark[1])
+            pos = b
+        out.append(text[pos:])
+        return "".join(out)
+
+    # ---------- persistance ----------
+    def save(self, path: str | Path) -> Path:
+        """Ajoute ces documents comme nouvelle part de `path` (sans toucher aux autres parts)."""
+        write_part(path, {"indptr": self.indptr, "entry": self.entry, "start": self.start, "end": self.end},
+                   self.entries, self.docs, {"lexicon_fp": self.lexicon_fp, "n_spans": self.n_spans})
+        return Path(path)
+
+    @classmethod
+    def load(cls, path: str | Path) -> "Evidence":
+        try:
+            parts = read_parts(path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"[conative_evidence] no evidence in {path}") from None
+        entries, maps = merge_entries([pt[1] for pt in parts])
+        indptr, ent, st, en, docs = [np.zeros(1, dtype=np.int64)], [], [], [], []
+        for (a, _, d, _), cmap, keep in zip(parts, maps, latest_rows([pt[2] for pt in parts], "doc_id")):
+            lo, hi = a["indptr"][keep], a["indptr"][keep + 1]
+            n = hi - lo
+            # passages des lignes gardées, dans l'ordre
+            sel = np.repeat(lo - np.r_[0, np.cumsum(n)[:-1]], n) + np.arange(int(n.sum()))
+            ent.append(cmap[a["entry"][sel]].astype(np.int32))
+            st.append(a["start"][sel])
+            en.append(a["end"][sel])
+            indptr.append(indptr[-1][-1] + np.cumsum(n))
+            docs.append(d.iloc[keep])
+        return cls(np.concatenate(indptr), np.concatenate(ent), np.concatenate(st), np.concatenate(en),
+                   entries=entries, docs=pd.concat(docs, ignore_index=True), lexicon_fp=parts[-1][3].get("lexicon_fp"))
+
+
+def build_evidence(doc_spans: Sequence[Optional[Tuple[str, Sequence[Tuple[int, int, int]]]]],
+                   lexicon,
+                   docs: pd.DataFrame) -> Evidence:
+    """
+    doc_spans[i] = (lang, [(entrée du matcher de lang, début, fin)]) du document i,
+    None si non scoré. docs : une ligne par document (doc_id, key, lang).
+    """
+    langs = {d[0] for d in doc_spans if d is not None}
+    entries, offsets = entry_table(lexicon, langs)
+    indptr = np.zeros(len(doc_spans) + 1, dtype=np.int64)
+    ent: List[int] = []
+    st: List[int] = []
+    en: List[int] = []
+    for i, d in enumerate(doc_spans):
+        if d is not None:
+            off = offsets[d[0]]
+            for eid, a, b in d[1]:
+                ent.append(off + eid)
+                st.append(a)
+                en.append(b)
+        indptr[i + 1] = len(ent)
+    return Evidence(indptr, np.asarray(ent, dtype=np.int32), np.asarray(st, dtype=np.uint32),
+                    np.asarray(en, dtype=np.uint32), entries, docs, getattr(lexicon, "fingerprint", None))
+
+
+def load(path: str | Path) -> Evidence:
+    return Evidence.load(path)
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) not in (2, 3):
+        print("Usage: python -m features.conative_evidence <evidence_dir> <doc_id> [features_doc.parquet]",
+              file=sys.stderr)
+        sys.exit(2)
+    ev = Evidence.load(argv[0])
+    sp = ev.spans(argv[1])
+    print(sp.to_string(index=False) if len(sp) else "(no conative span)")
+    if len(argv) == 3:
+        docs = pd.read_parquet(argv[2])
+        row = docs.index[docs["doc_id"].astype(str) == argv[1]] if "doc_id" in docs.columns else [int(argv[1])]
+        print()
+        print(ev.highlight(argv[1], str(docs.loc[row[0], "text"])))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
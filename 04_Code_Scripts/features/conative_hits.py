@@ -0,0 +1,312 @@
+# 04_Code_Scripts/features/conative_hits.py
+"""
+Matrice documents × entrées du lexique conatif (hits) + re-scoring sans spaCy.
+
+_compute_fc_fi_beta réduit tout de suite les hits d'un document en deux
+scalaires push / inhibit : changer un poids du lexique, λ ou l'alignement
+obligeait à repasser spaCy sur tout le corpus. Les hits ne dépendent pourtant
+que des lemmes / du texte et des clés du lexique (pas des poids) :
+
+  H[d, e] = 1 si l'entrée e (lemme ou pattern, une langue) touche le document d
+
+Table des entrées : lang, type (push | inhibit), source (lemma | pattern),
+weight, concept_id, key — dans l'ordre des CompiledMatcher, langues triées.
+
+Re-scoring (rescore) : poids w_e (lexique d'origine, surchargés par concept_id
+ou par un nouveau lexique), puis pour chaque (document, type, concept) le max
+des w_e touchés, somme bornée à 1 -> push, inhibit ; puis Fc, Fi, β (A4) avec
+l'alignement et λ voulus. Tri + maximum.reduceat sur les seuls non-zéros :
+quelques secondes pour des millions de documents.
+
+Persistance (save / load) : chaque save() ajoute une part à <dir> —
+part-<date>-<pid>-<n>.npz (CSR), .entries.parquet, .docs.parquet (key =
+text_hash, doc_id si présent, lang, alignment), .json (empreinte du lexique, λ ;
+écrit en dernier). Un lot du runner en flux, un shard d'un worker ou un appel
+hors store écrivent chacun leur part, sans écraser celles des autres ; load()
+les concatène (colonnes ré-indexées sur la table des entrées commune), un
+document présent dans plusieurs parts (doc_id, sinon key) étant pris dans la
+plus récente. select() réaligne ensuite les lignes sur un features_doc.
+
+    out, hm = apply_fc_fi_v3(df, return_hits=True)
+    res = rescore(hm, weights={"C_OBLIG": 0.9}, lam=0.3)
+"""
+from __future__ import annotations
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+ENTRY_COLS = ["lang", "type", "source", "weight", "concept_id", "key"]
+_PART_SEQ = itertools.count()
+
+
+class HitMatrix(NamedTuple):
+    H: "sparse.csr_matrix"      # documents × entrées (bool)
+    entries: pd.DataFrame        # ENTRY_COLS, une ligne par colonne de H
+    docs: pd.DataFrame           # key (text_hash), doc_id?, lang, alignment — une ligne par ligne de H
+    lexicon_fp: Optional[str]
+    lam: float
+
+
+def entry_table(lexicon, langs: Sequence[str]) -> Tuple[pd.DataFrame, Dict[str, int]]:
+    """Entrées des matchers compilés des `langs` (triées) + offset de colonne par langue."""
+    rows: List[tuple] = []
+    offsets: Dict[str, int] = {}
+    for lang in sorted({l.upper() for l in langs}):
+        offsets[lang] = len(rows)
+        rows.extend((lang, e.type, e.source, e.weight, e.concept_id, e.key) for e in lexicon.matcher(lang).entries)
+    return pd.DataFrame(rows, columns=ENTRY_COLS), offsets
+
+
+def build_hit_matrix(doc_hits: Sequence[Optional[Tuple[str, object]]],
+                     lexicon,
+                     docs: pd.DataFrame,
+                     lam: float) -> HitMatrix:
+    """
+    doc_hits[i] = (lang, Hits) du document i (None si non scoré -> ligne vide).
+    docs : métadonnées ligne à ligne (key, doc_id?, lang, alignment).
+    """
+    from scipy import sparse
+    langs = {h[0] for h in doc_hits if h is not None}
+    entries, offsets = entry_table(lexicon, langs)
+    indptr = np.zeros(len(doc_hits) + 1, dtype=np.int64)
+    cols: List[int] = []
+    for i, h in enumerate(doc_hits):
+        if h is not None:
+            off = offsets[h[0]]
+            cols.extend(sorted({off + e for e in (*h[1].lemma, *h[1].pattern)}))
+        indptr[i + 1] = len(cols)
+    H = sparse.csr_matrix((np.ones(len(cols), dtype=bool), np.asarray(cols, dtype=np.int64), indptr),
+                          shape=(len(doc_hits), len(entries)))
+    return HitMatrix(H, entries, docs.reset_index(drop=True), getattr(lexicon, "fingerprint", None), float(lam))
+
+
+# ---------- persistance (parts ajoutées, fusionnées au chargement) ----------
+def write_part(path: str | Path, arrays: Dict[str, np.ndarray], entries: pd.DataFrame, docs: pd.DataFrame,
+               meta: Dict[str, object]) -> Path:
+    """Ajoute une part à `path` (tableaux .npz, entries / docs .parquet, .json écrit en dernier)."""
+    out = Path(path)
+    out.mkdir(parents=True, exist_ok=True)
+    stem = out / f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_PART_SEQ):05d}"
+    tmp = stem.with_name(f"{stem.name}.tmp{os.getpid()}.npz")
+    np.savez_compressed(tmp, **arrays)
+    os.replace(tmp, stem.with_suffix(".npz"))
+    entries.to_parquet(stem.with_suffix(".entries.parquet"), index=False)
+    docs.to_parquet(stem.with_suffix(".docs.parquet"), index=False)
+    tmp = stem.with_name(f"{stem.name}.tmp{os.getpid()}.json")
+    tmp.write_text(json.dumps(dict(meta, n_docs=len(docs)), indent=1), encoding="utf-8")
+    os.replace(tmp, stem.with_suffix(".json"))
+    return stem.with_suffix(".npz")
+
+
+def clear_parts(path: str | Path) -> int:
+    """Supprime les parts de `path` (nouveau run complet) ; renvoie le nb de parts supprimées."""
+    metas = list(Path(path).glob("part-*.json"))
+    for f in Path(path).glob("part-*"):
+        f.unlink(missing_ok=True)
+    return len(metas)
+
+
+def read_parts(path: str | Path, same: Sequence[str] = ("lexicon_fp",)) -> List[Tuple[Dict[str, np.ndarray],
+                                                                                      pd.DataFrame, pd.DataFrame,
+                                                                                      Dict[str, object]]]:
+    """
+    Parts complètes de `path`, de la plus ancienne à la plus récente : (tableaux,
+    entries, docs, meta). Parts dont les champs `same` du meta diffèrent de la plus
+    récente (run précédent, autre lexique) ignorées avec un avertissement.
+    """
+    p = Path(path)
+    metas = sorted(p.glob("part-*.json"))
+    if not metas:
+        raise FileNotFoundError(f"[conative_hits] no parts in {p}")
+    parts = []
+    for m in metas:
+        with np.load(m.with_suffix(".npz")) as z:
+            arrays = {k: z[k] for k in z.files}
+        parts.append((arrays, pd.read_parquet(m.with_suffix(".entries.parquet")),
+                      pd.read_parquet(m.with_suffix(".docs.parquet")), json.loads(m.read_text(encoding="utf-8"))))
+    last = {k: parts[-1][3].get(k) for k in same}
+    kept = [pt for pt in parts if all(pt[3].get(k) == v for k, v in last.items())]
+    if len(kept) < len(parts):
+        print(f"[WARN] [conative_hits] {len(parts) - len(kept)} parts in {p} from another configuration "
+              f"ignored ({', '.join(same)})", flush=True)
+    return kept
+
+
+def merge_entries(tables: Sequence[pd.DataFrame]) -> Tuple[pd.DataFrame, List[np.ndarray]]:
+    """
+    Table des entrées commune (blocs par langue, langues triées, comme entry_table)
+    + pour chaque table, la nouvelle colonne de chacune de ses entrées.
+    """
+    blocks: Dict[str, pd.DataFrame] = {}
+    for t in tables:
+        for lang, b in t.groupby("lang", sort=False):
+            blocks.setdefault(lang, b)
+    offsets, n = {}, 0
+    for lang in sorted(blocks):
+        offsets[lang] = n
+        n += len(blocks[lang])
+    merged = (pd.concat([blocks[l] for l in sorted(blocks)], ignore_index=True) if blocks
+              else pd.DataFrame(columns=ENTRY_COLS))
+    maps = []
+    for t in tables:
+        lang = t["lang"].to_numpy()
+        first = t.groupby("lang", sort=False).cumcount().to_numpy()  # rang dans le bloc de la langue
+        maps.append(np.fromiter((offsets[l] for l in lang), dtype=np.int64, count=len(t)) + first)
+    return merged, maps
+
+
+def latest_rows(docs: Sequence[pd.DataFrame], id_col: str) -> List[np.ndarray]:
+    """Lignes gardées de chaque part : un document (id_col) présent dans une part plus récente est écarté."""
+    seen: set = set()
+    keep: List[np.ndarray] = []
+    for d in reversed(docs):
+        ids = d[id_col].astype(str).to_numpy()
+        keep.append(np.flatnonzero([i not in seen for i in ids]))
+        seen.update(ids)
+    return keep[::-1]
+
+
+def save(hm: HitMatrix, path: str | Path) -> Path:
+    """Ajoute la matrice `hm` comme nouvelle part de `path` (sans toucher aux autres parts)."""
+    H = hm.H.tocsr()
+    write_part(path, {"indptr": H.indptr.astype(np.int64), "indices": H.indices.astype(np.int64)},
+               hm.entries, hm.docs, {"lexicon_fp": hm.lexicon_fp, "lambda": hm.lam})
+    return Path(path)
+
+
+def load(path: str | Path) -> HitMatrix:
+    """Parts de `path` concaténées (une ligne par document, la plus récente en cas de doublon)."""
+    from scipy import sparse
+    parts = read_parts(path, same=("lexicon_fp", "lambda"))
+    entries, maps = merge_entries([pt[1] for pt in parts])
+    id_col = "doc_id" if all("doc_id" in pt[2].columns for pt in parts) else "key"
+    mats, docs = [], []
+    for (arrays, _, d, _), cmap, keep in zip(parts, maps, latest_rows([pt[2] for pt in parts], id_col)):
+        H = sparse.csr_matrix((np.ones(len(arrays["indices"]), dtype=bool), cmap[arrays["indices"]],
+                               arrays["indptr"]), shape=(len(d), len(entries)))
+        mats.append(H[keep])
+        docs.append(d.iloc[keep])
+    docs = pd.concat(docs, ignore_index=True)
+    meta = parts[-1][3]
+    return HitMatrix(sparse.vstack(mats, format="csr"), entries, docs, meta.get("lexicon_fp"), float(meta["lambda"]))
+
+
+def select(hm: HitMatrix, ids: Sequence, by: str = "doc_id") -> HitMatrix:
+    """Lignes de `hm` dans l'ordre de `ids` (valeurs de la colonne `by` de hm.docs) ; KeyError si l'une manque."""
+    # clé répétée (même texte, faute de doc_id) : mêmes hits, la dernière ligne suffit
+    rows = pd.Series(range(len(hm.docs)), index=hm.docs[by].astype(str)).groupby(level=0).last() \
+        .reindex([str(i) for i in ids])
+    if rows.isna().any():
+        missing = rows.index[rows.isna()][:5].tolist()
+        raise KeyError(f"[conative_hits] {int(rows.isna().sum())} documents missing from the hit matrix "
+                       f"(e.g. {missing})")
+    rows = rows.to_numpy(dtype=np.int64)
+    return hm._replace(H=hm.H[rows], docs=hm.docs.iloc[rows].reset_index(drop=True))
+
+
+# ---------- poids ----------
+def entry_weights(hm: HitMatrix, weights: Optional[Dict[str, float]] = None, lexicon=None) -> np.ndarray:
+    """
+    Poids par entrée : ceux du lexique d'origine ; `lexicon` (nouveau ConativeLexicon)
+    remplace chaque poids par celui de la même (lang, type, source, clé) — 0 si l'entrée
+    a disparu ; `weights` fixe le poids de toutes les entrées d'un concept_id.
+    """
+    e = hm.entries
+    w = e["weight"].to_numpy(dtype=float).copy()
+    if lexicon is not None:
+        new, _ = entry_table(lexicon, e["lang"].unique())
+        lut = {tuple(r): wt for r, wt in zip(new[["lang", "type", "source", "key"]].itertuples(index=False, name=None),
+                                             new["weight"])}
+        w = np.fromiter((lut.get(k, 0.0) for k in e[["lang", "type", "source", "key"]].itertuples(index=False, name=None)),
+                        dtype=float, count=len(e))
+        added = len(set(lut) - set(e[["lang", "type", "source", "key"]].itertuples(index=False, name=None)))
+        if added:
+            print(f"[WARN] [conative_hits] {added} lexicon entries absent from the hit matrix are ignored "
+                  f"(new keys need a spaCy pass)", flush=True)
+    if weights:
+        for cid, val in weights.items():
+            if not (0.0 <= float(val) <= 1.0):
+                raise ValueError(f"[conative_hits] weight must be in [0,1], got {cid}={val}")
+            w[(e["concept_id"] == cid).to_numpy()] = float(val)
+    return w
+
+
+def _groups(entries: pd.DataFrame, by: Sequence[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Groupe (factorisé) de chaque entrée selon `by` ; concept_id manquant = un groupe, comme le matcher."""
+    keys = entries[list(by)].astype(object).where(entries[list(by)].notna(), "\x00none")
+    codes, uniq = pd.factorize(pd.MultiIndex.from_frame(keys))
+    cols = pd.DataFrame(list(uniq), columns=list(by))
+    return codes.astype(np.int64), cols.where(cols != "\x00none", None)
+
+
+def _group_max(H, w: np.ndarray, group: np.ndarray, n_groups: int) -> "sparse.csr_matrix":
+    """M[d, g] = max des w_e touchés par d sur les entrées du groupe g (CSR)."""
+    from scipy import sparse
+    coo = H.tocoo()
+    vals = w[coo.col]
+    keep = vals > 0
+    r, g, v = coo.row[keep], group[coo.col[keep]], vals[keep]
+    if not len(r):
+        return sparse.csr_matrix((H.shape[0], n_groups))
+    order = np.lexsort((g, r))
+    r, g, v = r[order], g[order], v[order]
+    start = np.flatnonzero(np.r_[True, (r[1:] != r[:-1]) | (g[1:] != g[:-1])])
+    return sparse.csr_matrix((np.maximum.reduceat(v, start), (r[start], g[start])), shape=(H.shape[0], n_groups))
+
+
+def concept_signals(hm: HitMatrix, weights: Optional[Dict[str, float]] = None, lexicon=None,
+                    by_source: bool = True) -> Tuple["sparse.csr_matrix", pd.DataFrame]:
+    """
+    Signaux max par concept : CSR documents × (type, concept_id[, source]) + table des colonnes.
+    by_source=True sépare lemmes et patterns ; False = max lemme/pattern (ce que score() somme).
+    """
+    w = entry_weights(hm, weights, lexicon)
+    by = ["type", "concept_id", "source"] if by_source else ["type", "concept_id"]
+    group, cols = _groups(hm.entries, by)
+    return _group_max(hm.H, w, group, len(cols)), cols
+
+
+def push_inhibit(hm: HitMatrix, weights: Optional[Dict[str, float]] = None, lexicon=None) -> Tuple[np.ndarray, np.ndarray]:
+    """(push, inhibit) par document : max par concept puis somme bornée à 1 (CompiledMatcher.score)."""
+    M, cols = concept_signals(hm, weights, lexicon, by_source=False)
+    is_push = (cols["type"] == "push").to_numpy(dtype=float)
+    push = np.minimum(1.0, M @ is_push)
+    inh = np.minimum(1.0, M @ (1.0 - is_push))
+    return np.asarray(push, dtype=float).ravel(), np.asarray(inh, dtype=float).ravel()
+
+
+def fc_fi_beta(push: np.ndarray, inh: np.ndarray, alignment: np.ndarray, lam: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """A4 vectorisé : Fc = p·a + λ·h·(1-a), Fi = h·a + λ·p·(1-a), β = clip(((Fc - Fi) + 1) / 2)."""
+    a = np.asarray(alignment)
+    a = a if a.dtype.kind == "f" else a.astype(float)  # float32 conservé (features.sensitivity)
+    fc = push * a + lam * inh * (1.0 - a)
+    fi = inh * a + lam * push * (1.0 - a)
+    return fc, fi, np.clip(((fc - fi) + 1.0) / 2.0, 0.0, 1.0)
+
+
+def rescore(hm: HitMatrix,
+            weights: Optional[Dict[str, float]] = None,
+            lexicon=None,
+            alignment: Optional[np.ndarray | float] = None,
+            lam: Optional[float] = None) -> pd.DataFrame:
+    """
+    push, inhibit, fc, fi, beta pour de nouveaux poids / alignements / λ, sans spaCy.
+    alignment : tableau (un par document) ou scalaire ; défaut = alignement du run d'origine.
+    """
+    push, inh = push_inhibit(hm, weights, lexicon)
+    if alignment is None:
+        a = hm.docs["alignment"].to_numpy(dtype=float) if "alignment" in hm.docs.columns else np.full(len(push), 0.5)
+    else:
+        a = np.broadcast_to(np.asarray(alignment, dtype=float), push.shape)
+        a = np.where(np.isnan(a), 0.5, np.clip(a, 0.0, 1.0))
+    fc, fi, beta = fc_fi_beta(push, inh, a, hm.lam if lam is None else float(lam))
+    out = hm.docs.copy()
+    for c, v in (("push", push), ("inhibit", inh), ("fc", fc), ("fi", fi), ("beta", beta)):
+        out[c] = v
+    return out
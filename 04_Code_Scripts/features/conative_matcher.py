@@ -0,0 +1,132 @@
+# 04_Code_Scripts/features/conative_matcher.py
+"""
+Matcher conatif compilé (une langue d'un ConativeLexicon).
+
+- Lemmes : une seule table lemme -> entrées (push et inhibit confondus) ; une
+  recherche dict par lemme distinct du document.
+- Patterns (pattern_lemma_re) : texte mis en minuscules une seule fois par
+  document ; chaque regex est précédée d'un pré-filtre littéral (la plus longue
+  sous-chaîne obligatoire du pattern, extraite à la compilation, testée par
+  `in`). La regex n'est exécutée que si ce littéral est présent : résultat
+  identique à `rx.search`, pour un coût quasi nul sur les documents longs.
+  (Une alternance unique de lookaheads nommés a été mesurée plus lente avec le
+  moteur `re` de CPython, qui réessaie chaque branche à chaque position.)
+
+Les entrées (type, source, poids, concept, clé) sont numérotées ; `match`
+renvoie les numéros touchés, `score` applique le max par concept puis la somme
+bornée à 1, dans le même ordre d'insertion que l'implémentation historique.
+`spans` retrouve, pour des hits donnés, les passages du texte qui les ont
+produits (features.conative_evidence) : appelé seulement si on le demande.
+"""
+from __future__ import annotations
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+try:  # Python >= 3.11
+    from re import _parser as _sre_parse
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+# lettres ASCII auxquelles IGNORECASE associe un caractère non ASCII qui reste
+# distinct après str.lower() (ı U+0131, ſ U+017F) : exclues des pré-filtres
+_UNSAFE_LITERAL = set("is")
+
+
+def required_literal(pattern: str, flags: int = re.IGNORECASE | re.UNICODE) -> Optional[str]:
+    """
+    Plus longue sous-chaîne littérale présente dans toute correspondance de
+    `pattern` (séquence de niveau supérieur), en minuscules ; None si aucune.
+    """
+    try:
+        tree = _sre_parse.parse(pattern, flags)
+    except Exception:
+        return None
+    best, run = "", []
+    for op, av in list(tree) + [(None, None)]:
+        ch = chr(av) if op is _sre_parse.LITERAL else None
+        if ch is not None and ch.isascii() and ch.lower() not in _UNSAFE_LITERAL:
+            run.append(ch.lower())
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best or None
+
+
+class Entry(NamedTuple):
+    type: str              # push | inhibit
+    source: str            # lemma | pattern
+    weight: float
+    concept_id: Optional[str]
+    key: str               # lemme ou source regex
+
+
+class Hits(NamedTuple):
+    lemma: List[int]       # entrées touchées par lemme (ordre de 1re occurrence)
+    pattern: List[int]     # entrées touchées par pattern (ordre du lexique)
+
+
+class CompiledMatcher:
+    def __init__(self, lex, lang: str) -> None:
+        self.lang = lang.upper()
+        self.entries: List[Entry] = []
+        self.by_lemma: Dict[str, Tuple[int, ...]] = {}
+        self.patterns: List[Tuple[int, re.Pattern, Optional[str]]] = []
+
+        for tp in ("push", "inhibit"):
+            for lemma, (w, cid) in lex.lemmas.get(self.lang, {}).get(tp, {}).items():
+                self.by_lemma[lemma] = self.by_lemma.get(lemma, ()) + (len(self.entries),)
+                self.entries.append(Entry(tp, "lemma", w, cid, lemma))
+        for tp in ("push", "inhibit"):
+            for rx, w, cid in lex.patterns.get(self.lang, {}).get(tp, []):
+                self.patterns.append((len(self.entries), rx, required_literal(rx.pattern, rx.flags)))
+                self.entries.append(Entry(tp, "pattern", w, cid, rx.pattern))
+
+    def match(self, lemmas: Iterable[str], text: str) -> Hits:
+        # 1) lemmes : un lookup par lemme distinct, ordre de 1re occurrence conservé
+        get = self.by_lemma.get
+        lemma_hits = [eid for lem in dict.fromkeys(lemmas) for eid in get(lem, ())]
+
+        # 2) patterns : texte minuscule une fois, regex seulement si son littéral est présent
+        pattern_hits: List[int] = []
+        if self.patterns:
+            raw = text.lower()
+            for eid, rx, lit in self.patterns:
+                if (lit is None or lit in raw) and rx.search(raw):
+                    pattern_hits.append(eid)
+        return Hits(lemma_hits, pattern_hits)
+
+    def spans(self, hits: Hits, lemmas: Sequence[str], starts: Sequence[int], ends: Sequence[int],
+              text: str) -> List[Tuple[int, int, int]]:
+        """
+        (entrée, début, fin) en caractères du texte pour chaque occurrence ayant produit
+        `hits` : tokens dont le lemme est la clé d'une entrée lemme touchée (starts / ends
+        = offsets des tokens, p. ex. LemmaStore), correspondances des patterns touchés.
+        """
+        out: List[Tuple[int, int, int]] = []
+        if hits.lemma:
+            by_key: Dict[str, List[int]] = {}
+            for eid in hits.lemma:
+                by_key.setdefault(self.entries[eid].key, []).append(eid)
+            for lem, a, b in zip(lemmas, starts, ends):
+                for eid in by_key.get(lem, ()):
+                    out.append((eid, int(a), int(b)))
+        if hits.pattern:
+            raw = text.lower()
+            if len(raw) != len(text):  # lower() a changé la longueur (İ...) : offsets du texte brut
+                raw = text
+            rx_of = {eid: rx for eid, rx, _ in self.patterns}
+            for eid in hits.pattern:
+                out.extend((eid, m.start(), m.end()) for m in rx_of[eid].finditer(raw) if m.end() > m.start())
+        out.sort(key=lambda t: (t[1], t[2], t[0]))
+        return out
+
+    def score(self, hits: Hits) -> Tuple[float, float, Dict[Optional[str], float], Dict[Optional[str], float]]:
+        """(push, inhibit, push_matched, inhibit_matched) : max par concept, somme bornée à 1."""
+        push: Dict[Optional[str], float] = {}
+        inh: Dict[Optional[str], float] = {}
+        for eid in (*hits.lemma, *hits.pattern):
+            e = self.entries[eid]
+            acc = push if e.type == "push" else inh
+            acc[e.concept_id] = max(acc.get(e.concept_id, 0.0), e.weight)
+        return min(1.0, sum(push.values())), min(1.0, sum(inh.values())), push, inh
@@ -0,0 +1,234 @@
+# 04_Code_Scripts/features/embedding_store.py
+"""
+Memory-mapped document embedding store (one model per store).
+
+A DataFrame of Python lists costs ~10x the vector bytes and must be unpickled
+entirely before any cosine. Here the vectors live in one contiguous row-major
+matrix on disk:
+
+  root/<model>/
+    meta.json     format, model, dim, dtype (float16 | int8), normalized
+    vectors.f16   rows × dim float16        (dtype="float16")
+    vectors.i8    rows × dim int8           (dtype="int8")
+    scales.f32    one float32 scale per row (int8 only: x ≈ q × scale)
+    ids.tsv       doc_id <TAB> row
+
+- append(doc_ids, vectors): rows appended under a lock file, ids written last
+  (a reader never sees an id without its row); ids already stored are skipped.
+  Rows (or a partial ids line) left by a writer that crashed before its ids were
+  written are truncated away first, so row = position in ids.tsv always holds;
+- matrix() / raw(start, stop): zero-copy np.memmap views;
+- rows(doc_ids), get(doc_ids): row lookup / float32 vectors of some documents;
+- blocks(), dot(queries): streaming float32 blocks / products, RAM bounded by
+  `block_rows` whatever the corpus size.
+
+    store = EmbeddingStore("artifacts/embeddings", model="paraphrase-multilingual-MiniLM-L12-v2", dim=384)
+    store.append(df["doc_id"], vecs)
+    scores = store.dot(telos_vecs)  # n_docs × n_teloi
+"""
+from __future__ import annotations
+import json
+import os
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from features.lemma_store import _FileLock, _read_new_lines
+
+FORMAT_VERSION = 1
+DTYPES = {"float16": (np.float16, "vectors.f16"), "int8": (np.int8, "vectors.i8")}
+
+
+def quantize_int8(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Quantification symétrique par ligne : (q int8, scale float32), x ≈ q × scale."""
+    v = np.asarray(vectors, dtype=np.float32)
+    scale = np.abs(v).max(axis=1) / 127.0 if v.size else np.zeros(len(v), dtype=np.float32)
+    scale = np.where(scale > 0, scale, 1.0).astype(np.float32)
+    q = np.clip(np.rint(v / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale
+
+
+class EmbeddingStore:
+    """Append-only, memory-mapped embedding matrix with a doc_id -> row index."""
+
+    def __init__(self, root: str | Path, model: str, dim: Optional[int] = None,
+                 dtype: str = "float16", normalized: bool = True) -> None:
+        if dtype not in DTYPES:
+            raise ValueError(f"[embedding_store] dtype must be one of {sorted(DTYPES)}, got {dtype!r}")
+        self.dir = Path(root) / re.sub(r"[^\w.\-]+", "_", model)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta_path = self.dir / "meta.json"
+        if meta_path.exists():
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            if meta.get("format") != FORMAT_VERSION:
+                raise RuntimeError(f"[embedding_store] incompatible store format in {self.dir}")
+            if dim is not None and int(dim) != meta["dim"]:
+                raise ValueError(f"[embedding_store] dim {dim} != stored dim {meta['dim']} in {self.dir}")
+        else:
+            if dim is None:
+                raise ValueError(f"[embedding_store] no store in {self.dir}: dim is required to create it")
+            meta = {"format": FORMAT_VERSION, "model": model, "dim": int(dim), "dtype": dtype,
+                    "normalized": bool(normalized)}
+            meta_path.write_text(json.dumps(meta, indent=1), encoding="utf-8")
+        self.meta: Dict[str, object] = meta
+        self.model: str = meta["model"]
+        self.dim: int = int(meta["dim"])
+        self.dtype: str = meta["dtype"]
+        self.normalized: bool = bool(meta["normalized"])
+        self._np_dtype, self._fname = DTYPES[self.dtype]
+        self.index: Dict[str, int] = {}
+        self._ids: List[str] = []
+        self._read = 0
+        self._maps: Optional[Tuple[np.ndarray, Optional[np.ndarray]]] = None
+        self._refresh()
+
+    # ---------- index ----------
+    def _refresh(self) -> None:
+        lines, self._read = _read_new_lines(self.dir / "ids.tsv", self._read)
+        if lines:
+            for ln in lines:
+                doc_id, row = ln.decode("utf-8").split("\t")
+                self.index[doc_id] = int(row)
+                self._ids.append(doc_id)
+            self._maps = None
+
+    def __contains__(self, doc_id) -> bool:
+        return str(doc_id) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def ids(self) -> List[str]:
+        """doc_id par ligne (ordre des lignes de la matrice)."""
+        return self._ids
+
+    def rows(self, doc_ids: Sequence) -> np.ndarray:
+        """Lignes des doc_ids (-1 si absent)."""
+        idx = self.index
+        return np.fromiter((idx.get(str(d), -1) for d in doc_ids), dtype=np.int64, count=len(doc_ids))
+
+    # ---------- lecture ----------
+    def _arrays(self) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        if self._maps is None:
+            n = len(self._ids)
+            p = self.dir / self._fname
+            need = n * self.dim * np.dtype(self._np_dtype).itemsize
+            if n and (not p.exists() or p.stat().st_size < need):
+                raise RuntimeError(f"[embedding_store] {p} holds fewer than the {n} rows listed in ids.tsv")
+            vec = (np.memmap(p, dtype=self._np_dtype, mode="r", shape=(n, self.dim)) if n
+                   else np.zeros((0, self.dim), dtype=self._np_dtype))
+            scales = None
+            if self.dtype == "int8":
+                scales = (np.memmap(self.dir / "scales.f32", dtype=np.float32, mode="r", shape=(n,)) if n
+                          else np.zeros(0, dtype=np.float32))
+            self._maps = (vec, scales)
+        return self._maps
+
+    def matrix(self) -> np.ndarray:
+        """Matrice complète (rows × dim) en memmap, sans copie (float16 ou int8 brut)."""
+        return self._arrays()[0]
+
+    def raw(self, start: int = 0, stop: Optional[int] = None) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Tranche de lignes sans copie : (vecteurs stockés, scales int8 ou None)."""
+        vec, scales = self._arrays()
+        return vec[start:stop], (None if scales is None else scales[start:stop])
+
+    def _decode(self, vec: np.ndarray, scales: Optional[np.ndarray]) -> np.ndarray:
+        out = vec.astype(np.float32)
+        if scales is not None:
+            out *= scales[:, None]
+        return out
+
+    def get(self, doc_ids: Sequence) -> np.ndarray:
+        """Vecteurs float32 des doc_ids (KeyError si l'un manque)."""
+        rows = self.rows(doc_ids)
+        if (rows < 0).any():
+            missing = [d for d, r in zip(doc_ids, rows) if r < 0][:5]
+            raise KeyError(f"[embedding_store] unknown doc_ids {missing} in {self.dir}")
+        vec, scales = self._arrays()
+        return self._decode(vec[rows], None if scales is None else scales[rows])
+
+    def blocks(self, block_rows: int = 65536) -> Iterator[Tuple[int, np.ndarray]]:
+        """(première ligne, bloc float32) sur toute la matrice ; RAM bornée par block_rows."""
+        n = len(self._ids)
+        for a in range(0, n, block_rows):
+            yield a, self._decode(*self.raw(a, min(a + block_rows, n)))
+
+    def dot(self, queries: np.ndarray, block_rows: int = 65536) -> np.ndarray:
+        """Produits scalaires (rows × q) de toutes les lignes avec `queries` (q × dim) ;
+        cosinus si le store et les requêtes sont normalisés."""
+        q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if q.shape[1] != self.dim:
+            raise ValueError(f"[embedding_store] query dim {q.shape[1]} != store dim {self.dim}")
+        out = np.empty((len(self._ids), q.shape[0]), dtype=np.float32)
+        vec, scales = self._arrays()
+        for a in range(0, len(self._ids), block_rows):
+            b = min(a + block_rows, len(self._ids))
+            blk = vec[a:b].astype(np.float32) @ q.T
+            if scales is not None:
+                blk *= scales[a:b, None]
+            out[a:b] = blk
+        return out
+
+    # ---------- écriture ----------
+    def append(self, doc_ids: Sequence, vectors: np.ndarray) -> int:
+        """Ajoute des lignes ; doc_ids déjà présents (ou répétés) ignorés. Retourne le nb ajouté."""
+        v = np.asarray(vectors, dtype=np.float32)
+        ids = [str(d) for d in doc_ids]
+        if v.ndim != 2 or v.shape != (len(ids), self.dim):
+            raise ValueError(f"[embedding_store] expected vectors of shape ({len(ids)}, {self.dim}), got {v.shape}")
+        with _FileLock(self.dir / ".lock"):
+            self._refresh()
+            seen = set(self.index)
+            keep = []
+            for i, d in enumerate(ids):
+                if d not in seen:
+                    seen.add(d)
+                    keep.append(i)
+            if not keep:
+                return 0
+            v = v[keep]
+            if self.normalized:
+                n = np.linalg.norm(v, axis=1, keepdims=True)
+                v = v / np.where(n == 0, 1.0, n)
+            start = len(self._ids)
+            self._truncate_orphans(start)
+            if self.dtype == "int8":
+                q, scale = quantize_int8(v)
+                with open(self.dir / "scales.f32", "ab") as f:
+                    f.write(scale.tobytes())
+            else:
+                q = v.astype(np.float16)
+            with open(self.dir / self._fname, "ab") as f:
+                f.write(np.ascontiguousarray(q).tobytes())
+            lines = "".join(f"{ids[i]}\t{start + j}\n" for j, i in enumerate(keep)).encode("utf-8")
+            with open(self.dir / "ids.tsv", "ab") as f:
+                f.write(lines)
+            self._refresh()
+        return len(keep)
+
+
+    def _truncate_orphans(self, n_rows: int) -> None:
+        # sous le verrou : données au-delà des ids complets = écriture interrompue
+        sizes = [(self.dir / self._fname, n_rows * self.dim * np.dtype(self._np_dtype).itemsize)]
+        if self.dtype == "int8":
+            sizes.append((self.dir / "scales.f32", n_rows * 4))
+        sizes.append((self.dir / "ids.tsv", self._read))
+        for path, size in sizes:
+            if path.exists() and path.stat().st_size > size:
+                print(f"[embedding_store] truncating {path.stat().st_size - size} orphan bytes in {path}", flush=True)
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+                self._maps = None
+
+
+def open_embedding_store(model: str, dim: Optional[int] = None, root: Optional[str | Path] = None,
+                         dtype: Optional[str] = None) -> Optional[EmbeddingStore]:
+    """Store sous `root` (ou env EMBEDDING_STORE_DIR, dtype env EMBEDDING_STORE_DTYPE) ; None si non configuré."""
+    root = root or os.environ.get("EMBEDDING_STORE_DIR")
+    if not root:
+        return None
+    return EmbeddingStore(root, model, dim, dtype or os.environ.get("EMBEDDING_STORE_DTYPE", "float16"))
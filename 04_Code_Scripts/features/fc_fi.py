@@ -1,20 +1,111 @@
 from __future__ import annotations
-import re
-from typing import Dict, List, Optional
+import os
+from typing import Dict, List, NamedTuple, Optional
 import pandas as pd
 
+from utils.tokens import TOKEN_RE
+
 __all__ = [
     "apply_fc_fi",        # wrapper rétro-compatible (défaut v1)
     "apply_fc_fi_v1",     # version simple/rapide
     "apply_fc_fi_v2",     # version spaCy + TF-IDF léger
+    "v2_lemmas",          # lemmes v2 seuls (étape spaCy, parallélisable)
+    "TelosMatrix",        # scores v2 par telos (return_telos_matrix=True)
 ]
 
 # =============== v1 : simple, rapide (baseline actuelle) ===============
 
+def _lexicon_sets(lexicon: Dict[str, Dict[str, List[str]]]):
+    # Prépare sets pro/anti (tous teloi confondus)
+    pro = set()
+    anti = set()
+    for _, sides in lexicon.items():
+        pro.update((w or "").lower() for w in sides.get("pro", []))
+        anti.update((w or "").lower() for w in sides.get("anti", []))
+    return pro, anti
+
+
+_DOC_SEP = "fcfidocsep7d3a"  # token sentinelle entre documents (vérifié absent du corpus)
+# octets ASCII hors \\w -> espace ; octets >= 0x80 (UTF-8 multi-octets) conservés
+_BYTE_WORD = bytes(c if (c >= 0x80 or chr(c).isalnum() or c == 0x5F) else 0x20 for c in range(256))
+
+
+def lexicon_dtm(texts: pd.Series, vocab: pd.Index):
+    """
+    Matrice documents × vocabulaire (CSR, comptes) sur les tokens \\w+ en minuscules,
+    + nb de tokens par document, sans boucle Python par document ni par token :
+    - bloc de textes joints par un token sentinelle, encodé UTF-8 ; les octets ASCII
+      hors \\w deviennent des espaces (bytes.translate) puis bytes.split -> segments ;
+    - segments dictionnaire-encodés (Arrow) ; seuls les segments distincts sont
+      tokenisés en Python : ASCII = 1 token, sinon TOKEN_RE.findall (exact : les
+      séparateurs non ASCII restent à l'intérieur des segments) ; minuscules après
+      tokenisation, comme la boucle v1 ;
+    - X = (documents × segments) @ (segments × vocabulaire), comptes via bincount.
+    """
+    return _segment_dtm(texts, {w: i for i, w in enumerate(vocab)}, grow=False)
+
+
+def corpus_dtm(texts: pd.Series):
+    """
+    Comme lexicon_dtm, vocabulaire ouvert : (X documents × tokens distincts du bloc,
+    nb de tokens, vocabulaire pd.Index dans l'ordre d'apparition).
+    """
+    vocab_pos: Dict[str, int] = {}
+    X, n_tok = _segment_dtm(texts, vocab_pos, grow=True)
+    return X, n_tok, pd.Index(list(vocab_pos), dtype=object)
+
+
+def _segment_dtm(texts: pd.Series, vocab_pos: Dict[str, int], grow: bool):
+    import numpy as np
+    import pyarrow as pa
+    from scipy import sparse
+
+    vals = texts.tolist()
+    n = len(vals)
+    joined = f" {_DOC_SEP} ".join(vals)
+    if joined.count(_DOC_SEP) != max(0, n - 1):
+        raise ValueError(f"[fc_fi] sentinel {_DOC_SEP!r} found in corpus text")
+    runs = joined.encode("utf-8").translate(_BYTE_WORD).split()
+    enc = pa.array(runs, type=pa.binary()).dictionary_encode()
+    codes = enc.indices.to_numpy(zero_copy_only=False).astype(np.int64)
+    uniq = enc.dictionary.to_pylist()
+
+    sep = _DOC_SEP.encode("ascii")
+    sep_code = -1
+    ntok_u = np.zeros(len(uniq), dtype=np.int64)
+    r_u: List[int] = []
+    c_u: List[int] = []
+    for k, u in enumerate(uniq):
+        if u == sep:
+            sep_code = k
+            continue
+        toks = (u.decode("ascii").lower(),) if u.isascii() else \
+            [t.lower() for t in TOKEN_RE.findall(u.decode("utf-8"))]
+        ntok_u[k] = len(toks)
+        for t in toks:
+            c = vocab_pos.get(t)
+            if c is None and grow:
+                c = vocab_pos[t] = len(vocab_pos)
+            if c is not None:
+                r_u.append(k)
+                c_u.append(c)
+    R = sparse.csr_matrix((np.ones(len(r_u)), (r_u, c_u)), shape=(len(uniq), len(vocab_pos)))
+
+    is_sep = codes == sep_code
+    doc = np.cumsum(is_sep)[~is_sep]
+    seg = codes[~is_sep]
+    n_tok = np.bincount(doc, weights=ntok_u[seg], minlength=n).astype(np.int64)
+
+    sel = np.diff(R.indptr)[seg] > 0  # segments portant au moins un mot du lexique
+    D = sparse.csr_matrix((np.ones(int(sel.sum())), (doc[sel], seg[sel])), shape=(n, len(uniq)))
+    return (D @ R).tocsr(), n_tok
+
+
 def apply_fc_fi_v1(
     docs: pd.DataFrame,
     lexicon: Dict[str, Dict[str, List[str]]],
     text_col: str = "text",
+    chunk_size: Optional[int] = None,
 ) -> pd.DataFrame:
     r"""
     Fc/Fi v1 : comptage lexique naïf (tokens bruts en minuscules).
@@ -22,19 +113,46 @@ def apply_fc_fi_v1(
     - fi_mean : ratio d'occurrences anti / total tokens
     - ambivalence_flag : |fc - fi| < 0.1
     - len_tokens : nb de tokens simples (\w+)   <-- docstring en "raw" pour éviter le warning
+
+    Moteur vectorisé : matrice creuse documents × vocabulaire du lexique, puis
+    produits matrice-vecteur avec les indicatrices pro / anti, par blocs de
+    chunk_size documents (env FCFI_V1_CHUNK, défaut 100000). chunk_size=0 ->
+    boucle historique (référence). Sorties identiques.
     """
+    import numpy as np
+
     df = docs.copy()
-    tok_re = re.compile(r"\w+", flags=re.UNICODE)
+    pro, anti = _lexicon_sets(lexicon)
+    texts = df[text_col].astype(str)
 
-    # Prépare sets pro/anti (tous teloi confondus)
-    pro = set()
-    anti = set()
-    for _, sides in lexicon.items():
-        pro.update((w or "").lower() for w in sides.get("pro", []))
-        anti.update((w or "").lower() for w in sides.get("anti", []))
+    cs = int(os.environ.get("FCFI_V1_CHUNK", "100000")) if chunk_size is None else int(chunk_size)
+    if cs <= 0:
+        fc_vals, fi_vals, lengths = _fc_fi_v1_loop(texts, pro, anti)
+    else:
+        vocab = pd.Index(sorted(pro | anti))
+        is_pro = np.fromiter((w in pro for w in vocab), dtype=np.float64, count=len(vocab))
+        is_anti = np.fromiter((w in anti for w in vocab), dtype=np.float64, count=len(vocab))
+        fc_vals = np.empty(len(df)); fi_vals = np.empty(len(df)); lengths = np.empty(len(df), dtype=np.int64)
+        for a in range(0, len(df), cs):
+            X, n_tok = lexicon_dtm(texts.iloc[a:a + cs], vocab)
+            L = np.maximum(1, n_tok)
+            fc_vals[a:a + cs] = (X @ is_pro) / L
+            fi_vals[a:a + cs] = (X @ is_anti) / L
+            lengths[a:a + cs] = n_tok
+
+    # valeurs positionnelles : l'index de docs peut ne pas être un RangeIndex
+    df["fc_mean"] = pd.Series(fc_vals, dtype=float).clip(0, 1).to_numpy()
+    df["fi_mean"] = pd.Series(fi_vals, dtype=float).clip(0, 1).to_numpy()
+    df["len_tokens"] = pd.Series(lengths).astype(int).to_numpy()
+    df["ambivalence_flag"] = (df["fc_mean"] - df["fi_mean"]).abs().lt(0.1).astype(int)
+    df["fcfi_version"] = "v1"
+    return df
 
+
+def _fc_fi_v1_loop(texts: pd.Series, pro: set, anti: set):
+    tok_re = TOKEN_RE  # même définition que la colonne `tokens` de la collecte
     fc_vals, fi_vals, lengths = [], [], []
-    for t in df[text_col].astype(str):
+    for t in texts:
         toks = [w.lower() for w in tok_re.findall(t)]
         L = max(1, len(toks))
         pro_hits = sum(1 for w in toks if w in pro)
@@ -42,36 +160,164 @@ def apply_fc_fi_v1(
         fc_vals.append(pro_hits / L)
         fi_vals.append(anti_hits / L)
         lengths.append(len(toks))
-
-    df["fc_mean"] = pd.Series(fc_vals).clip(0, 1)
-    df["fi_mean"] = pd.Series(fi_vals).clip(0, 1)
-    df["len_tokens"] = pd.Series(lengths).astype(int)
-    df["ambivalence_flag"] = (df["fc_mean"] - df["fi_mean"]).abs().lt(0.1).astype(int)
-    df["fcfi_version"] = "v1"
-    return df
+    return fc_vals, fi_vals, lengths
 
 
 # =============== v2 : spaCy lemmatisation + TF-IDF léger ===============
 
+class TelosMatrix(NamedTuple):
+    """Scores v2 par telos : matrices creuses documents × teloi (ordre des lignes = docs)."""
+    teloi: List[str]
+    fc: "sparse.csr_matrix"
+    fi: "sparse.csr_matrix"
+
+
+def lemma_csr(lemmas: List[List[str]]):
+    """
+    Matrice creuse documents × lemmes (comptes) + vocabulaire (ordre de 1re occurrence).
+    Mémoire proportionnelle au nombre de couples (document, lemme) distincts.
+    """
+    import numpy as np
+    from scipy import sparse
+
+    lens = np.fromiter((len(l) for l in lemmas), dtype=np.int64, count=len(lemmas))
+    flat = [w for l in lemmas for w in l]
+    codes, vocab = pd.factorize(pd.Series(flat, dtype=object))
+    rows = np.repeat(np.arange(len(lemmas)), lens)
+    C = sparse.csr_matrix((np.ones(len(flat)), (rows, codes)), shape=(len(lemmas), len(vocab)))
+    C.sum_duplicates()
+    return C, pd.Index(vocab, dtype=object)
+
+
+def telos_indicators(LEX: Dict[str, Dict[str, List[str]]], vocab: pd.Index, side: str):
+    """Indicatrice lemmes × teloi (1 si le lemme est dans le côté `side` du telos)."""
+    import numpy as np
+    from scipy import sparse
+
+    r: List[int] = []
+    c: List[int] = []
+    for t, sides in enumerate(LEX.values()):
+        pos = vocab.get_indexer(list(set(sides.get(side, []))))
+        pos = pos[pos >= 0]
+        r.extend(pos.tolist())
+        c.extend([t] * len(pos))
+    return sparse.csr_matrix((np.ones(len(r)), (r, c)), shape=(len(vocab), len(LEX)))
+
+
+def domain_idf(dfreq, n_docs: int):
+    """IDF lissé d'un domaine : log((N+1)/(df+1)) + 1 (df = nb de documents contenant le lemme)."""
+    import numpy as np
+    N = max(1, n_docs)
+    return np.log((N + 1) / (dfreq + 1)) + 1.0
+
+
+def tfidf_weights(C, domains: pd.Series, vocab: Optional[pd.Index] = None, idf_store=None):
+    """
+    Poids TF-IDF (documents × lemmes) : un vecteur IDF par domaine, calculé sur les
+    entrées CSR des documents du domaine. Domaine manquant (NaN) -> poids nuls
+    (groupby ignorait déjà NaN).
+    idf_store (features.idf_store.DocFreqStore) : IDF lu dans le store pour `vocab`
+    au lieu d'être recalculé sur le lot.
+    """
+    import numpy as np
+
+    dom_codes, dom_vals = pd.factorize(domains)
+    n_dom = int(dom_codes.max()) + 1 if len(dom_codes) else 0
+    W = C.tocsr(copy=True)
+    W.data[:] = 0.0
+    # entrées de la CSR regroupées par domaine (tri stable : ordre des lignes conservé)
+    ent_dom = np.repeat(dom_codes, np.diff(C.indptr))
+    order = np.argsort(ent_dom, kind="stable")
+    bounds = np.searchsorted(ent_dom[order], np.arange(n_dom + 1))
+    n_docs = np.bincount(dom_codes[dom_codes >= 0], minlength=n_dom)
+    for d in range(n_dom):
+        ent = order[bounds[d]:bounds[d + 1]]
+        cols = C.indices[ent]
+        if idf_store is not None:
+            idf = idf_store.idf(dom_vals[d], vocab)
+        else:
+            dfreq = np.bincount(cols, minlength=C.shape[1])  # 1 entrée par (document, lemme)
+            idf = domain_idf(dfreq, int(n_docs[d]))
+        W.data[ent] = C.data[ent] * idf[cols]
+    W.eliminate_zeros()
+    return W
+
+
+def v2_lemmas(
+    docs: pd.DataFrame,
+    lang_col: str = "language",
+    text_col: str = "text",
+    lemma_store_dir: Optional[str] = None,
+    spacy_profile: Optional[str] = None,
+) -> List[List[str]]:
+    """Lemmes v2 par document (minuscules, alphabétiques, hors stopwords), ordre des lignes."""
+    # imports locaux pour éviter de charger spaCy quand v1 suffit
+    from features.nlp_registry import scoped
+    from features.lemma_store import open_lemma_store, FLAG_ALPHA, FLAG_STOP
+    from features.nlp_chunks import pipe_chunks
+
+    def norm_lemmas(text: str, nlp) -> list[str]:
+        parts = next(pipe_chunks(nlp, [text or ""]))  # textes > CONATIVE_MAX_CHARS : par tranches
+        return [t.lemma_.lower() for _, doc in parts for t in doc if t.is_alpha and not t.is_stop]
+
+    texts = [t or "" for t in docs[text_col]]
+    langs = docs[lang_col].tolist() if lang_col in docs.columns else ["fr"] * len(docs)
+    use_store = bool(lemma_store_dir or os.environ.get("LEMMA_STORE_DIR"))
+    out: List[List[str]] = [[] for _ in texts]
+    # un groupe de langue à la fois : charger son modèle libère les autres au-delà
+    # de NLP_RSS_BUDGET_MB (features.nlp_registry)
+    for lang, is_fr in (("FR", True), ("EN", False)):
+        idx = [i for i, l in enumerate(langs) if str(l).lower().startswith("fr") == is_fr]
+        if not idx:
+            continue
+        with scoped(lang, spacy_profile) as nlp:
+            if use_store:
+                # un flux nlp.pipe ; lemmes filtrés via les flags stockés
+                store = open_lemma_store(nlp, lemma_store_dir)
+                for i, dl in zip(idx, store.lemmatize([texts[i] for i in idx], nlp)):
+                    keep = (dl.flags & FLAG_ALPHA).astype(bool) & ~(dl.flags & FLAG_STOP).astype(bool)
+                    out[i] = [store.strings[j] for j in dl.lemma_ids[keep].tolist()]
+            else:
+                for i in idx:
+                    out[i] = norm_lemmas(texts[i], nlp)
+    return out
+
+
 def apply_fc_fi_v2(
     docs: pd.DataFrame,
     lexicon: Dict[str, Dict[str, List[str]]],
     lang_col: str = "language",
     text_col: str = "text",
-) -> pd.DataFrame:
+    lemma_store_dir: Optional[str] = None,
+    spacy_profile: Optional[str] = None,
+    return_telos_matrix: bool = False,
+    idf_store=None,
+    update_idf: bool = False,
+    lemmas: Optional[List[List[str]]] = None,
+):
     """
     Fc/Fi v2 : lemmatisation spaCy (FR/EN), stopwords out, pondération TF-IDF (idf par domaine).
-    - Requiert fr_core_news_lg & en_core_web_lg installés.
+    - Requiert fr_core_news_lg / en_core_web_lg pour les langues présentes (pipelines
+      partagés du registre features.nlp_registry, profil SPACY_PROFILE : sans
+      parser/ner par défaut ; un groupe de langue à la fois sous NLP_RSS_BUDGET_MB).
     - lexicon donné en surface -> on le passe en minuscules (approx simple).
-    """
-    import spacy  # import local pour éviter de charger spaCy quand v1 suffit
-    nlp_fr = spacy.load("fr_core_news_lg", disable=["ner", "parser"])
-    nlp_en = spacy.load("en_core_web_lg", disable=["ner", "parser"])
+    - lemma_store_dir (ou env LEMMA_STORE_DIR) : lemmes relus depuis le LemmaStore,
+      seuls les textes absents passent par spaCy.
 
-    def norm_lemmas(text: str, lang: str) -> list[str]:
-        nlp = nlp_fr if str(lang).lower().startswith("fr") else nlp_en
-        doc = nlp(text or "")
-        return [t.lemma_.lower() for t in doc if t.is_alpha and not t.is_stop]
+    Moteur creux : W = comptes documents × lemmes pondérés par l'IDF du domaine,
+    puis W @ P (P = indicatrices lemmes × teloi pro / anti) donne Fc/Fi de tous
+    les documents pour tous les teloi ; fc_mean / fi_mean = somme sur les teloi / poids total.
+    return_telos_matrix=True -> (df, TelosMatrix) avec les scores par telos
+    (docs × teloi, même normalisation, non bornés).
+
+    idf_store (features.idf_store.DocFreqStore) : IDF figé lu dans le store (le
+    score d'un document ne dépend plus du lot) ; update_idf=True ajoute d'abord
+    le lot au store (documents identifiés par text_hash, comptés une fois). Sans
+    store : IDF recalculé sur le lot (comportement historique).
+    lemmas : lemmes déjà calculés (v2_lemmas, p. ex. par features.sharded) ; spaCy non appelé.
+    """
+    import numpy as np
+    from scipy import sparse
 
     # Lexique vers minuscules (proxy “lemmatisation lexique”)
     LEX = {}
@@ -81,52 +327,32 @@ def apply_fc_fi_v2(
             LEX[tel][side] = list({(w or "").lower() for w in words})
 
     df = docs.copy()
-    df["_lemmas"] = [norm_lemmas(t, l) for t, l in zip(df[text_col], df.get(lang_col, "fr"))]
-
-    # IDF lissé par domaine
-    from collections import Counter, defaultdict
-    import math
-
-    idf = {}
-    for dom, sub in df.groupby("domain_id"):
-        dfreq = Counter()
-        for lemmas in sub["_lemmas"]:
-            for w in set(lemmas):
-                dfreq[w] += 1
-        N = max(1, len(sub))
-        dmap = defaultdict(float)
-        for w, dfw in dfreq.items():
-            dmap[w] = math.log((N + 1) / (dfw + 1)) + 1.0
-        idf[dom] = dmap
+    if lemmas is None:
+        lemmas = v2_lemmas(df, lang_col, text_col, lemma_store_dir, spacy_profile)
+    elif len(lemmas) != len(df):
+        raise ValueError(f"[fc_fi] lemmas has {len(lemmas)} entries for {len(df)} docs")
 
-    fc_vals, fi_vals, lengths = [], [], []
-    for (_, row) in df.iterrows():
-        lemmas = row["_lemmas"]
-        dom = row["domain_id"]
-        weights = [idf.get(dom, {}).get(w, 0.0) for w in lemmas]
-        totw = sum(weights) or 1.0
-
-        pro_hits = 0.0
-        anti_hits = 0.0
-        for _, sides in LEX.items():
-            pro_set = set(sides.get("pro", []))
-            anti_set = set(sides.get("anti", []))
-            for w, w_idf in zip(lemmas, weights):
-                if w in pro_set:
-                    pro_hits += w_idf
-                if w in anti_set:
-                    anti_hits += w_idf
-
-        fc_vals.append(pro_hits / totw)
-        fi_vals.append(anti_hits / totw)
-        lengths.append(len(lemmas))
-
-    df["fc_mean"] = pd.Series(fc_vals).clip(0, 1)
-    df["fi_mean"] = pd.Series(fi_vals).clip(0, 1)
-    df["len_tokens"] = pd.Series(lengths).astype(int)
+    if idf_store is not None and update_idf:
+        from utils.hashing import text_hash
+        idf_store.add(df["domain_id"].tolist(), [text_hash(t) for t in df[text_col]], lemmas)
+
+    C, vocab = lemma_csr(lemmas)
+    W = tfidf_weights(C, df["domain_id"], vocab, idf_store)
+    totw = np.asarray(W.sum(axis=1)).ravel()
+    totw[totw == 0] = 1.0
+    inv = sparse.diags(1.0 / totw)
+    FC = (inv @ (W @ telos_indicators(LEX, vocab, "pro"))).tocsr()
+    FI = (inv @ (W @ telos_indicators(LEX, vocab, "anti"))).tocsr()
+
+    # valeurs positionnelles : l'index de docs peut ne pas être un RangeIndex
+    df["fc_mean"] = np.clip(np.asarray(FC.sum(axis=1)).ravel(), 0, 1)
+    df["fi_mean"] = np.clip(np.asarray(FI.sum(axis=1)).ravel(), 0, 1)
+    df["len_tokens"] = np.asarray(C.sum(axis=1)).ravel().astype(int)
     df["ambivalence_flag"] = (df["fc_mean"] - df["fi_mean"]).abs().lt(0.1).astype(int)
     df["fcfi_version"] = "v2"
-    return df.drop(columns=["_lemmas"], errors="ignore")
+    if return_telos_matrix:
+        return df, TelosMatrix(list(LEX), FC, FI)
+    return df
 
 
 # =============== wrapper rétro-compatible ===============
@@ -1,7 +1,10 @@
 # 04_Code_Scripts/features/fc_fi_v3.py
 from __future__ import annotations
 import os
-from typing import Optional, Dict, Tuple
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Optional, Dict, List, Tuple
+import numpy as np
 import pandas as pd
 
 # spaCy is required in v3
@@ -10,11 +13,23 @@ import spacy
 from features.conative import (
     load_conative_lexicon,
     conative_from_text,
+    conative_from_lemmas,
 )
+from features.lemma_store import open_lemma_store
+from features.nlp_chunks import chunk_lemmas, chunk_offsets, n_chunks, pipe_chunks
+from features.nlp_profiles import LEMMA_PIPES, model_name
+from features.nlp_registry import get_nlp, trim as trim_models
 
 # λ (cross-term) fixed a priori per Appendix A4 clarification
 _LAMBDA = 0.5
 
+# Batched engine (nlp.pipe). batch_size=0 -> historical per-row path.
+_DEFAULT_BATCH_SIZE = int(os.environ.get("FCFI_BATCH_SIZE", "64"))
+_DEFAULT_N_PROCESS = int(os.environ.get("FCFI_N_PROCESS", "1"))
+# Components lemmas depend on; everything else (parser, ner, senter...) is disabled
+# while streaming. Lemmas are unchanged: none of the disabled pipes feed the lemmatizer.
+_LEMMA_PIPES = LEMMA_PIPES
+
 def _need_langs_from_df(df: pd.DataFrame, lang_col: Optional[str]) -> set[str]:
     if lang_col is None or lang_col not in df.columns:
         return {"FR"}  # default
@@ -29,46 +44,71 @@ def _need_langs_from_df(df: pd.DataFrame, lang_col: Optional[str]) -> set[str]:
         keep = {"FR"}
     return keep
 
-def _load_spacy_models(langs: set[str]) -> Dict[str, "spacy.Language"]:
+def _load_spacy_models(langs: set[str], profile: Optional[str] = None) -> Dict[str, "spacy.Language"]:
+    """
+    Shared spaCy pipelines (features.nlp_registry) for the needed langs, per
+    features.nlp_profiles profile (env SPACY_PROFILE). Loaded once per process.
+    """
     models: Dict[str, "spacy.Language"] = {}
-    if "FR" in langs:
-        try:
-            models["FR"] = spacy.load("fr_core_news_lg")
-        except Exception as e:
-            raise RuntimeError("spaCy FR model 'fr_core_news_lg' not available") from e
-    if "EN" in langs:
-        try:
-            models["EN"] = spacy.load("en_core_web_lg")
-        except Exception as e:
-            raise RuntimeError("spaCy EN model 'en_core_web_lg' not available") from e
+    for lang in ("FR", "EN"):
+        if lang in langs:
+            try:
+                models[lang] = get_nlp(lang, profile)
+            except RuntimeError as e:
+                raise RuntimeError(f"spaCy {lang} model '{model_name(lang, profile)}' not available") from e
     return models
 
-def _resolve_alignment(row: pd.Series, alignment_col: Optional[str]) -> float:
+@contextmanager
+def _scoped_models(lang: str, profile: Optional[str] = None):
+    """{lang: nlp} for one language group; other models released on exit over NLP_RSS_BUDGET_MB."""
+    from features.nlp_profiles import resolve_profile
+    try:
+        yield _load_spacy_models({lang}, profile)
+    finally:
+        trim_models(keep=[(lang.upper(), resolve_profile(profile))])  # next batch reuses it
+
+def _resolve_alignments(df: pd.DataFrame, alignment_col: Optional[str]) -> np.ndarray:
     """
-    Alignment a(d,T) ∈ [0,1]. If not provided, return neutral 0.5.
+    Alignment a(d,T) ∈ [0,1] per row. Missing / non-numeric -> neutral 0.5.
     """
-    if alignment_col and alignment_col in row and pd.notna(row[alignment_col]):
-        try:
-            a = float(row[alignment_col])
-            if a < 0.0: a = 0.0
-            if a > 1.0: a = 1.0
-            return a
-        except Exception:
-            pass
-    return 0.5
+    if alignment_col and alignment_col in df.columns:
+        a = pd.to_numeric(df[alignment_col], errors="coerce").astype(float).clip(0.0, 1.0)
+        return a.fillna(0.5).to_numpy()
+    return np.full(len(df), 0.5)
+
+def _effective_lang(lang: str, available) -> str:
+    """Row language among `available` (loaded models or needed langs), FR otherwise."""
+    lang = "FR" if str(lang).upper() in {"", "NONE", "NAN"} else str(lang).upper()
+    if lang not in available:
+        # fallback to FR if unknown label appears (row-level tolerant)
+        lang = "FR"
+    return lang
 
 def _compute_fc_fi_beta(text: str,
                         lang: str,
                         nlp_map: Dict[str, "spacy.Language"],
                         lexicon: Dict[str, Dict[str, float]],
-                        alignment: float) -> Tuple[float, float, float]:
-    lang = "FR" if str(lang).upper() in {"", "NONE", "NAN"} else str(lang).upper()
-    if lang not in nlp_map:
-        # fallback to FR if unknown label appears (row-level tolerant)
-        lang = "FR"
+                        alignment: float,
+                        store=None,
+                        max_chars: Optional[int] = None) -> Tuple[float, float, float]:
+    push, inh = _row_conative(text, lang, nlp_map, lexicon, store, max_chars)[:2]
+    return _fc_fi_beta_from_scores(push, inh, alignment)
+
+def _row_conative(text: str,
+                  lang: str,
+                  nlp_map: Dict[str, "spacy.Language"],
+                  lexicon,
+                  store=None,
+                  max_chars: Optional[int] = None,
+                  spans: bool = False) -> Tuple[float, float, object, Optional[list], int]:
+    """(push, inhibit, Hits, spans or None, n_chunks) of one text (per-row path)."""
+    lang = _effective_lang(lang, nlp_map)
     nlp = nlp_map[lang]
+    push, inh, dbg = conative_from_text(text, lang, nlp, lexicon, store=store, max_chars=max_chars,
+                                        spans=spans)  # already in [0,1] after clipping
+    return push, inh, dbg["hits"], dbg.get("spans"), dbg["n_chunks"]
 
-    push, inh, _dbg = conative_from_text(text, lang, nlp, lexicon)  # already in [0,1] after clipping
+def _fc_fi_beta_from_scores(push: float, inh: float, alignment: float) -> Tuple[float, float, float]:
     # A4 clarification (λ=0.5 fixed):
     # Fc = p*a + λ*h*(1-a)
     # Fi = h*a + λ*p*(1-a)
@@ -81,11 +121,60 @@ def _compute_fc_fi_beta(text: str,
     if beta > 1.0: beta = 1.0
     return float(fc), float(fi), float(beta)
 
+def _pipe_conative(texts: List[str],
+                   lang: str,
+                   nlp: "spacy.Language",
+                   lexicon,
+                   batch_size: int,
+                   n_process: int,
+                   store=None,
+                   max_chars: Optional[int] = None,
+                   spans: bool = False) -> List[Optional[Tuple[float, float, object, Optional[list], int]]]:
+    """
+    (push, inhibit, Hits, spans, n_chunks) for every text of one language group, streamed through nlp.pipe
+    with lemma-only components. Output order == input order. If the stream fails,
+    the remaining texts fall back to the per-row path (None marks a failed row).
+    With a LemmaStore, only texts it does not hold yet go through spaCy.
+    Texts longer than max_chars are streamed as chunks (features.nlp_chunks).
+    spans=True also returns the matched (entry, start, end) character spans (else None).
+    """
+    out: List[Optional[Tuple[float, float, object, Optional[list], int]]] = []
+    disable = [p for p in nlp.pipe_names if p not in _LEMMA_PIPES]
+    try:
+        if store is not None:
+            for txt, dl in zip(texts, store.lemmatize(texts, nlp, batch_size, n_process, disable, max_chars)):
+                push, inh, dbg = conative_from_lemmas(store.lemmas(dl), txt, lang, lexicon,
+                                                      offsets=(dl.starts, dl.ends) if spans else None)
+                out.append((push, inh, dbg["hits"], dbg.get("spans"), n_chunks(txt, nlp, max_chars)))
+            return out
+        with nlp.select_pipes(disable=disable):
+            for txt, parts in zip(texts, pipe_chunks(nlp, texts, max_chars, batch_size, n_process)):
+                push, inh, dbg = conative_from_lemmas(chunk_lemmas(parts), txt, lang, lexicon,
+                                                      offsets=(lambda: chunk_offsets(parts)) if spans else None)
+                out.append((push, inh, dbg["hits"], dbg.get("spans"), len(parts)))
+    except Exception:
+        for txt in texts[len(out):]:
+            try:
+                push, inh, dbg = conative_from_text(txt, lang, nlp, lexicon, store=store, max_chars=max_chars,
+                                                    spans=spans)
+                out.append((push, inh, dbg["hits"], dbg.get("spans"), dbg["n_chunks"]))
+            except Exception:
+                out.append(None)
+    return out
+
 def apply_fc_fi_v3(df: pd.DataFrame,
                    text_col: str = "text",
                    lang_col: Optional[str] = None,
                    alignment_col: Optional[str] = None,
-                   lexicon_path: Optional[str] = None) -> pd.DataFrame:
+                   lexicon_path: Optional[str] = None,
+                   batch_size: Optional[int] = None,
+                   n_process: Optional[int] = None,
+                   lemma_store_dir: Optional[str] = None,
+                   spacy_profile: Optional[str] = None,
+                   max_chars: Optional[int] = None,
+                   hits_path: Optional[str] = None,
+                   return_hits: bool = False,
+                   evidence_path: Optional[str] = None):
     """
     Compute Fc, Fi, beta (A4 clarification with λ=0.5) for each row of df.
 
@@ -102,11 +191,52 @@ def apply_fc_fi_v3(df: pd.DataFrame,
     lexicon_path : Optional[str]
         Path to csv lexicon. If None, read from env CONATIVE_LEXICON_PATH or
         default '01_Protocoles/lexicon_conative_v1.csv'.
+    batch_size : Optional[int]
+        nlp.pipe batch size (env FCFI_BATCH_SIZE, default 64). Rows are grouped by
+        language and streamed with lemma-only components; results are reassembled in
+        row order and are identical to the per-row path. 0 -> per-row path.
+    n_process : Optional[int]
+        nlp.pipe worker processes (env FCFI_N_PROCESS, default 1).
+    lemma_store_dir : Optional[str]
+        Persistent lemma store root (env LEMMA_STORE_DIR). Texts already parsed by the
+        same model are scored from the stored lemmas, without calling spaCy again.
+    spacy_profile : Optional[str]
+        features.nlp_profiles profile (env SPACY_PROFILE, default 'lemma-accurate':
+        `_lg` models with lemma components only, same lemmas as 'full').
+        Rows are processed one language group at a time; loading a group's model
+        first releases the least recently used ones past NLP_RSS_BUDGET_MB
+        (features.nlp_registry, accounted model sizes), so a mixed FR/EN run keeps
+        one `_lg` model resident.
+    max_chars : Optional[int]
+        Texts longer than this (env CONATIVE_MAX_CHARS, default and cap nlp.max_length,
+        i.e. only texts spaCy would reject) are split on paragraph / sentence boundaries
+        and streamed as chunks; lemmas are concatenated and patterns run on the full
+        text. Nothing is truncated, but tagging / lemmatisation lose the neighbouring
+        chunk's context at each cut.
+    hits_path : Optional[str]
+        Directory where the docs × lexicon-entry hit matrix of this call is added as
+        one part (features.conative_hits, env FCFI_HITS_PATH): each streaming batch or
+        worker shard appends its own part, conative_hits.load merges them.
+        conative_hits.rescore then recomputes push / inhibit / Fc / Fi / β for new
+        weights, λ or alignments without spaCy.
+    return_hits : bool
+        Also return the conative_hits.HitMatrix: (df, hits).
+    evidence_path : Optional[str]
+        Directory where the matched spans are saved (features.conative_evidence,
+        env FCFI_EVIDENCE_PATH, one part per call, like hits_path): per document,
+        lexicon entry (concept, type, source, weight) and character offsets, from the
+        token offsets already at hand.
+        Evidence.load(path).highlight(doc_id, text) then shows what drove β without
+        spaCy. Documents are keyed by 'doc_id' (row index if absent).
 
     Returns
     -------
     DataFrame
-        df with added columns: 'fc', 'fi', 'beta'. It preserves other columns.
+        df with added columns: 'fc', 'fi', 'beta', 'push', 'inhibit' (conative scores
+        before λ / alignment, for features.sensitivity), 'lexicon_fp' (lexicon content
+        fingerprint), 'fcfi_status' ('ok' | 'chunked' | 'failed': a failed row keeps
+        fc=fi=push=inhibit=0, beta=0.5). It preserves other columns. Chunked / failed counts are
+        printed.
     """
     if text_col not in df.columns:
         raise ValueError(f"[fc_fi_v3] text_col '{text_col}' is missing in df")
@@ -121,34 +251,137 @@ def apply_fc_fi_v3(df: pd.DataFrame,
         raise FileNotFoundError(f"[fc_fi_v3] conative lexicon not found at '{lex_path}'")
     lexicon = load_conative_lexicon(lex_path)  # fail-fast if malformed
 
-    # Load spaCy models for needed langs (fail-fast on missing models)
+    # One language group at a time: loading its model evicts the others when they would
+    # exceed NLP_RSS_BUDGET_MB (features.nlp_registry)
     langs_needed = _need_langs_from_df(df, lang_col)
-    nlp_map = _load_spacy_models(langs_needed)
-
-    # Compute per row (row-level tolerant)
-    out_fc, out_fi, out_beta = [], [], []
-    for _, row in df.iterrows():
-        txt = str(row[text_col]) if pd.notna(row[text_col]) else ""
-        lang = str(row[lang_col]).upper() if (lang_col and lang_col in row and pd.notna(row[lang_col])) else "FR"
-        a = _resolve_alignment(row, alignment_col)
-        try:
-            fc, fi, beta = _compute_fc_fi_beta(txt, lang, nlp_map, lexicon, a)
-        except Exception:
-            # tolerate the row, mark zeros (and continue the batch)
-            fc, fi, beta = 0.0, 0.0, 0.5
-        out_fc.append(fc); out_fi.append(fi); out_beta.append(beta)
+
+    texts = [str(x) if pd.notna(x) else "" for x in df[text_col]]
+    if lang_col and lang_col in df.columns:
+        langs = [str(x).upper() if pd.notna(x) else "FR" for x in df[lang_col]]
+    else:
+        langs = ["FR"] * len(df)
+    align = _resolve_alignments(df, alignment_col)
+
+    bs = _DEFAULT_BATCH_SIZE if batch_size is None else int(batch_size)
+    n_proc = _DEFAULT_N_PROCESS if n_process is None else int(n_process)
+
+    # tolerate failed rows, mark zeros (and continue the batch)
+    out_fc = [0.0] * len(df)
+    out_fi = [0.0] * len(df)
+    out_beta = [0.5] * len(df)
+    out_push = [0.0] * len(df)
+    out_inh = [0.0] * len(df)
+    status = ["failed"] * len(df)
+    hits: List[Optional[Tuple[str, object]]] = [None] * len(df)
+    evidence_path = evidence_path or os.environ.get("FCFI_EVIDENCE_PATH")
+    spans: List[Optional[Tuple[str, list]]] = [None] * len(df)
+
+    groups: Dict[str, List[int]] = {}
+    for i, lang in enumerate(langs):
+        groups.setdefault(_effective_lang(lang, langs_needed), []).append(i)
+    for lang, idx in groups.items():
+        if lang not in langs_needed:
+            continue  # FR fallback without FR model: rows stay at (0, 0, 0.5)
+        with _scoped_models(lang, spacy_profile) as nlp_map:
+            nlp = nlp_map[lang]
+            store = open_lemma_store(nlp, lemma_store_dir)
+            if bs <= 0:
+                # Per-row path (reference)
+                scores = []
+                for i in idx:
+                    try:
+                        scores.append(_row_conative(texts[i], lang, nlp_map, lexicon, store, max_chars,
+                                                    spans=bool(evidence_path)))
+                    except Exception:
+                        scores.append(None)
+            else:
+                # Batched path: one nlp.pipe stream for the group
+                scores = _pipe_conative([texts[i] for i in idx], lang, nlp, lexicon, bs, n_proc,
+                                        store=store, max_chars=max_chars, spans=bool(evidence_path))
+            for i, sc in zip(idx, scores):
+                if sc is not None:
+                    out_fc[i], out_fi[i], out_beta[i] = _fc_fi_beta_from_scores(sc[0], sc[1], align[i])
+                    out_push[i], out_inh[i] = sc[0], sc[1]
+                    hits[i] = (lang, sc[2])
+                    if sc[3] is not None:
+                        spans[i] = (lang, sc[3])
+                    status[i] = "chunked" if sc[4] > 1 else "ok"
+
+    n_chunked, n_failed = status.count("chunked"), status.count("failed")
+    if n_chunked or n_failed:
+        print(f"[INFO] fc_fi_v3 docs={len(df)} chunked={n_chunked} failed={n_failed}", flush=True)
 
     out = df.copy()
     out["fc"] = out_fc
     out["fi"] = out_fi
     out["beta"] = out_beta
+    out["push"] = out_push      # conative scores before λ / alignment (features.sensitivity)
+    out["inhibit"] = out_inh
+    out["lexicon_fp"] = lexicon.fingerprint  # which compiled lexicon produced these scores
+    out["fcfi_status"] = status
+
+    hits_path = hits_path or os.environ.get("FCFI_HITS_PATH")
+    if not (hits_path or return_hits or evidence_path):
+        return out
+    from utils.hashing import text_hash
+    meta = pd.DataFrame({"key": [text_hash(t) for t in texts]})
+    if "doc_id" in df.columns:
+        meta["doc_id"] = df["doc_id"].astype(str).to_numpy()
+    meta["lang"] = [h[0] if h is not None else None for h in hits]
+    if evidence_path:
+        from features.conative_evidence import build_evidence
+        ev_docs = meta[["key", "lang"]].copy()
+        ev_docs.insert(0, "doc_id", meta["doc_id"] if "doc_id" in meta.columns else df.index.astype(str).to_numpy())
+        ev = build_evidence(spans, lexicon, ev_docs)
+        ev.save(evidence_path)
+        print(f"[INFO] fc_fi_v3 evidence docs={len(ev)} spans={ev.n_spans} -> {evidence_path}", flush=True)
+    if hits_path or return_hits:
+        from features import conative_hits
+        meta["alignment"] = align
+        hm = conative_hits.build_hit_matrix(hits, lexicon, meta, _LAMBDA)
+        if hits_path:
+            conative_hits.save(hm, hits_path)
+            print(f"[INFO] fc_fi_v3 hit matrix {hm.H.shape} nnz={hm.H.nnz} -> {hits_path}", flush=True)
+        if return_hits:
+            return out, hm
     return out
 
+def feature_config(lexicon_path: Optional[str] = None,
+                   spacy_profile: Optional[str] = None,
+                   langs: Tuple[str, ...] = ("FR", "EN"),
+                   **extra) -> Dict[str, object]:
+    """
+    Everything v3 scores depend on besides the row content: feature version, lexicon
+    fingerprint, spaCy profile + model versions, chunk size. Namespace of the
+    features.feature_store.FeatureStore (extra: e.g. lang_col / alignment_col used).
+    Model versions come from the packages' meta.json: no pipeline is loaded here.
+    """
+    import inspect
+    from features.lemma_store import model_key
+    from features.nlp_chunks import effective_max_chars
+    from features.nlp_profiles import model_meta, resolve_profile
+    lex_path = lexicon_path or os.environ.get("CONATIVE_LEXICON_PATH") or "01_Protocoles/lexicon_conative_v1.csv"
+    keys = {lang: model_key(meta=model_meta(lang, spacy_profile)) for lang in sorted(set(langs))}
+    # profiles keep spaCy's default nlp.max_length
+    limit = SimpleNamespace(max_length=inspect.signature(spacy.Language.__init__).parameters["max_length"].default)
+    max_chars = {lang: effective_max_chars(limit) for lang in sorted(set(langs))}
+    return {
+        "stage": "v3",
+        "outputs": ["fc", "fi", "beta", "push", "inhibit"],
+        "lambda": _LAMBDA,
+        "lexicon": load_conative_lexicon(lex_path).fingerprint,
+        "profile": resolve_profile(spacy_profile),
+        "models": keys,
+        "max_chars": max_chars,
+        **extra,
+    }
+
 def _precheck_or_fail() -> None:
     """
     Quick fail-fast check for CI / shell sanity:
       - lexicon file present & well-formed
-      - spaCy FR/EN models load
+      - spaCy FR/EN model packages installed (SPACY_PROFILE), checked from their
+        meta.json without loading them: each language group loads its own model later
     """
     lex_path = (
         os.environ.get("CONATIVE_LEXICON_PATH")
@@ -156,13 +389,12 @@ def _precheck_or_fail() -> None:
     )
     if not os.path.exists(lex_path):
         raise FileNotFoundError(f"[fc_fi_v3 precheck] missing lexicon at '{lex_path}'")
-    load_conative_lexicon(lex_path)
-    # Load both to fail-fast if pipeline will need EN later
-    try:
-        _ = spacy.load("fr_core_news_lg")
-    except Exception as e:
-        raise RuntimeError("Missing spaCy FR model 'fr_core_news_lg'") from e
+    lex = load_conative_lexicon(lex_path)
+    print(f"[INFO] conative lexicon {lex_path} fp={lex.fingerprint}", flush=True)
+    from features.lemma_store import model_key
+    from features.nlp_profiles import model_meta
     try:
-        _ = spacy.load("en_core_web_lg")
-    except Exception as e:
-        raise RuntimeError("Missing spaCy EN model 'en_core_web_lg'") from e
+        found = {lang: model_key(meta=model_meta(lang)) for lang in ("FR", "EN")}
+    except RuntimeError as e:
+        raise RuntimeError(f"[fc_fi_v3 precheck] {e}") from e
+    print(f"[INFO] spaCy models installed: {found}", flush=True)
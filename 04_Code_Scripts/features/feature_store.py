@@ -0,0 +1,216 @@
+# 04_Code_Scripts/features/feature_store.py
+"""
+Content-addressed store of doc-level features.
+
+A corpus top-up adds a few % of new rows, yet every run recomputed features for
+every document. Features only depend on the document content (text, and the
+language / alignment columns when the stage reads them) and on the feature
+configuration (version, lexicon fingerprint, spaCy models). So:
+
+  root/<namespace>/
+    meta.json                 configuration the namespace stands for
+    part-<time>-<pid>.parquet `key` + feature columns, one file per write
+
+- namespace = hash of the configuration: a new lexicon or model version starts
+  an empty namespace instead of mixing results;
+- key       = content hash of the document (content_keys);
+- compute_incremental(df, ...) computes only the keys the store does not hold
+  (each distinct content once), appends them, then assembles the output for
+  every row from the store;
+- an in-memory key -> (part, row) index (built from the key columns only) lets
+  get() read just the parts / row groups holding the requested keys; past
+  FEATURE_STORE_COMPACT_PARTS files (default 64) the parts are merged into one,
+  sorted by key, so a streaming run does not pile up one file per batch.
+
+    store = FeatureStore("artifacts/feature_store", fc_fi_v3.feature_config(...))
+    out = compute_incremental(df, content_keys(df, ["text"]), apply_fc_fi_v3, store)
+"""
+from __future__ import annotations
+import hashlib
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY_COL = "key"
+# au-delà de COMPACT_PARTS fichiers, put() fusionne les parts (une par lot en flux sinon)
+COMPACT_PARTS = int(os.environ.get("FEATURE_STORE_COMPACT_PARTS", "64"))
+ROW_GROUP_ROWS = 8192
+
+
+def content_keys(df: pd.DataFrame, cols: Sequence[str]) -> np.ndarray:
+    """Clé de contenu par ligne : blake2b des colonnes `cols` (valeur manquante = '')."""
+    parts = [df[c].astype(object).where(df[c].notna(), "").astype(str).tolist() for c in cols]
+    return np.array([hashlib.blake2b("\x1f".join(vals).encode("utf-8"), digest_size=16).hexdigest()
+                     for vals in zip(*parts)] if parts else [], dtype=object)
+
+
+def namespace_id(config: Dict[str, object]) -> str:
+    blob = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=8).hexdigest()
+
+
+class FeatureStore:
+    """Append-only feature table for one configuration (namespace)."""
+
+    def __init__(self, root: str | Path, config: Dict[str, object], compact_parts: Optional[int] = None) -> None:
+        self.config = dict(config)
+        self.namespace = namespace_id(self.config)
+        self.dir = Path(root) / self.namespace
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta = self.dir / "meta.json"
+        if not meta.exists():
+            meta.write_text(json.dumps({"config": self.config}, indent=1, default=str), encoding="utf-8")
+        self.compact_parts = COMPACT_PARTS if compact_parts is None else int(compact_parts)
+        self._index: Optional[Dict[str, Tuple[str, int]]] = None   # key -> (part file name, row)
+
+    def parts(self) -> List[Path]:
+        return sorted(self.dir.glob("part-*.parquet"))
+
+    def schema(self):
+        import pyarrow.parquet as pq
+        ps = self.parts()
+        return pq.read_schema(ps[0]).remove_metadata() if ps else None
+
+    def _load_index(self) -> Dict[str, Tuple[str, int]]:
+        # colonne `key` seule de chaque part : emplacement de chaque clé
+        if self._index is None:
+            import pyarrow.parquet as pq
+            index: Dict[str, Tuple[str, int]] = {}
+            for p in reversed(self.parts()):  # doublon éventuel (compaction concurrente) : 1re part gagne
+                ks = pq.read_table(p, columns=[KEY_COL]).column(0).to_pylist()
+                index.update(zip(ks, zip(itertools.repeat(p.name), range(len(ks)))))
+            self._index = index
+        return self._index
+
+    def keys(self):
+        return self._load_index().keys()
+
+    def __len__(self) -> int:
+        return len(self._load_index())
+
+    def put(self, feats: pd.DataFrame) -> int:
+        """Ajoute des lignes (`key` + features) ; clés déjà présentes ignorées."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if KEY_COL not in feats.columns:
+            raise ValueError(f"[feature_store] missing '{KEY_COL}' column")
+        index = self._load_index()
+        new = feats[~feats[KEY_COL].isin(index.keys())].drop_duplicates(KEY_COL)
+        if new.empty:
+            return 0
+        tbl = pa.Table.from_pandas(new, preserve_index=False)
+        schema = self.schema()
+        if schema is not None:
+            if set(schema.names) != set(tbl.schema.names):
+                raise ValueError(f"[feature_store] columns {sorted(tbl.schema.names)} differ from "
+                                 f"store columns {sorted(schema.names)} in {self.dir}")
+            tbl = tbl.select(schema.names).cast(schema)
+        n_parts = len(self.parts())
+        path = self.dir / f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{n_parts:05d}.parquet"
+        self._write(tbl, path)
+        ks = new[KEY_COL].tolist()
+        index.update(zip(ks, zip(itertools.repeat(path.name), range(len(ks)))))
+        if self.compact_parts and n_parts + 1 > self.compact_parts:
+            self.compact()
+        return len(new)
+
+    def _write(self, tbl, path: Path) -> None:
+        import pyarrow.parquet as pq
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        pq.write_table(tbl, tmp, row_group_size=ROW_GROUP_ROWS)
+        os.replace(tmp, path)
+
+    def compact(self) -> int:
+        """Fusionne toutes les parts en une seule (triée par clé) ; renvoie le nb de parts remplacées."""
+        import pyarrow as pa
+        parts = self.parts()
+        if len(parts) <= 1:
+            return 0
+        import pyarrow.parquet as pq
+        schema = self.schema()
+        tbl = pa.concat_tables([pq.read_table(p).select(schema.names).cast(schema) for p in parts])
+        tbl = tbl.sort_by(KEY_COL)
+        # nom trié après les parts existantes : un lecteur qui liste entre-temps voit des doublons, pas de trou
+        path = self.dir / f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{len(parts):05d}c.parquet"
+        self._write(tbl, path)
+        for p in parts:
+            p.unlink(missing_ok=True)
+        self._index = None
+        print(f"[FEATURE_STORE] {self.namespace}: compacted {len(parts)} parts ({tbl.num_rows} rows)", flush=True)
+        return len(parts)
+
+    def get(self, keys: Sequence[str], _retry: bool = True) -> pd.DataFrame:
+        """
+        Features des clés demandées (indexées par clé ; clés absentes omises).
+        Seules les parts (et, dans une part, les row groups) qui contiennent ces clés sont lues.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        index = self._load_index()
+        rows: Dict[str, List[int]] = {}
+        for k in dict.fromkeys(keys):
+            loc = index.get(k)
+            if loc is not None:
+                rows.setdefault(loc[0], []).append(loc[1])
+        if not rows:
+            return pd.DataFrame(index=pd.Index([], name=KEY_COL))
+        tables = []
+        try:
+            for name, rs in rows.items():
+                pf = pq.ParquetFile(self.dir / name)
+                sizes = [pf.metadata.row_group(g).num_rows for g in range(pf.num_row_groups)]
+                bounds = np.cumsum([0] + sizes)
+                rs = np.asarray(rs, dtype=np.int64)
+                g_of = np.searchsorted(bounds, rs, side="right") - 1
+                groups = np.unique(g_of)
+                # début de chaque row group lu dans la table concaténée
+                start = dict(zip(groups.tolist(), np.cumsum([0] + [sizes[g] for g in groups[:-1]]).tolist()))
+                local = rs - bounds[g_of] + np.array([start[g] for g in g_of.tolist()], dtype=np.int64)
+                tables.append(pf.read_row_groups(groups.tolist()).take(pa.array(local)))
+        except FileNotFoundError:
+            if not _retry:
+                raise
+            self._index = None  # parts compactées par un autre processus entre-temps
+            return self.get(keys, _retry=False)
+        schema = tables[0].schema
+        return pa.concat_tables([t.select(schema.names).cast(schema) for t in tables]).to_pandas().set_index(KEY_COL)
+
+
+def compute_incremental(df: pd.DataFrame,
+                        keys: Sequence[str],
+                        compute_fn: Callable[[pd.DataFrame], pd.DataFrame],
+                        store: FeatureStore) -> pd.DataFrame:
+    """
+    Sortie de compute_fn(df) assemblée depuis le store : seules les lignes dont la
+    clé manque sont calculées (une fois par contenu distinct). Les colonnes ajoutées
+    par compute_fn sont stockées ; les colonnes d'entrée restent celles de df.
+    """
+    keys = np.asarray(keys, dtype=object)
+    if len(keys) != len(df):
+        raise ValueError(f"[feature_store] {len(keys)} keys for {len(df)} rows")
+    known = store.keys()
+    missing = np.fromiter((k not in known for k in keys), dtype=bool, count=len(keys))
+    todo = pd.Series(keys[missing]).drop_duplicates().index.to_numpy()
+    todo_pos = np.flatnonzero(missing)[todo]
+    print(f"[FEATURE_STORE] {store.namespace}: {len(df)} docs, {int((~missing).sum())} cached, "
+          f"{len(todo_pos)} to compute", flush=True)
+    if len(todo_pos):
+        sub = df.iloc[todo_pos]
+        res = compute_fn(sub)
+        feat_cols = [c for c in res.columns if c not in sub.columns]
+        feats = res[feat_cols].reset_index(drop=True)
+        feats.insert(0, KEY_COL, keys[todo_pos])
+        store.put(feats)
+
+    got = store.get(keys.tolist())
+    out = df.copy()
+    rows = got.reindex(keys)
+    for c in got.columns:
+        out[c] = rows[c].to_numpy()
+    return out
@@ -0,0 +1,233 @@
+# 04_Code_Scripts/features/idf_store.py
+"""
+Document frequencies per domain, maintained incrementally (IDF of Fc/Fi v2).
+
+apply_fc_fi_v2 used to recompute IDF over the DataFrame it receives: the score
+of a document depended on the batch it came with, and scoring new documents
+meant re-counting the whole corpus. A DocFreqStore keeps, per domain, the number
+of documents and the document frequency of each lemma:
+
+- add / remove     : update with a batch (cost proportional to the batch);
+                     a document is identified by its key (text_hash of the
+                     text by default) and is counted at most once per domain
+- idf(domain, ...) : smoothed IDF vector for a given vocabulary,
+                     log((N+1)/(df+1)) + 1, same formula as the batch IDF
+- snapshot / load  : versioned, immutable snapshots under root/ : counts per
+                     version (vNNNN.json.gz), document ids in one append-only
+                     log shared by all versions (docs.bin, 17 bytes per
+                     add / remove) ; a snapshot only appends what changed
+                     since the version it was loaded from
+
+    store = DocFreqStore.load("artifacts/idf")           # dernière version (ou vide)
+    store.add(domains, keys, lemmas)
+    store.snapshot()                                     # -> "v0002"
+    apply_fc_fi_v2(batch, lexicon, idf_store=store)      # IDF figé
+
+Corpus réel : run_real_features.py --stage v2 --idf-store DIR (env IDF_STORE_DIR).
+"""
+from __future__ import annotations
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+FORMAT_VERSION = 2
+_VERSION_RE = re.compile(r"^v(\d+)\.json\.gz$")
+DOCS_LOG = "docs.bin"
+_ADD, _REMOVE = b"+", b"-"
+_REC = 17  # op (1 octet) + id du document (16 octets)
+
+
+def domain_key(domain) -> Optional[str]:
+    """Clé de domaine (str) ; None pour une valeur manquante (document ignoré)."""
+    if domain is None or (isinstance(domain, float) and math.isnan(domain)):
+        return None
+    return str(domain)
+
+
+def _doc_id(domain: str, key: str) -> bytes:
+    """Id binaire (blake2b 128 bits) d'un document dans un domaine."""
+    return hashlib.blake2b(f"{domain}\x00{key}".encode("utf-8"), digest_size=16).digest()
+
+
+def _replay(path: Path, nbytes: int) -> set:
+    """Ids présents après les `nbytes` premiers octets du journal."""
+    ids: set = set()
+    if nbytes == 0:
+        return ids
+    with open(path, "rb") as f:
+        buf = f.read(nbytes)
+    if len(buf) != nbytes or nbytes % _REC:
+        raise RuntimeError(f"[idf_store] document log {path} is shorter than its snapshot ({len(buf)} < {nbytes})")
+    for i in range(0, nbytes, _REC):
+        doc = buf[i + 1:i + _REC]
+        if buf[i:i + 1] == _ADD:
+            ids.add(doc)
+        else:
+            ids.discard(doc)
+    return ids
+
+
+class DocFreqStore:
+    """Per-domain document counts and lemma document frequencies."""
+
+    def __init__(self, root: Optional[str | Path] = None) -> None:
+        self.root = Path(root) if root else None
+        self.version: Optional[str] = None
+        self.n_docs: Dict[str, int] = {}
+        self.df: Dict[str, Counter] = {}
+        self._ids: set = set()
+        self._pending = bytearray()  # opérations pas encore dans le journal
+
+    # ---------- mise à jour ----------
+    def add(self, domains: Sequence, keys: Sequence[str], lemmas: Sequence[Iterable[str]]) -> int:
+        """Ajoute des documents (lemmes déjà filtrés) ; renvoie le nombre réellement ajouté."""
+        n = 0
+        for dom, key, lem in zip(domains, keys, lemmas):
+            d = domain_key(dom)
+            if d is None:
+                continue
+            doc = _doc_id(d, key)
+            if doc in self._ids:
+                continue
+            self._ids.add(doc)
+            self._pending += _ADD + doc
+            self.n_docs[d] = self.n_docs.get(d, 0) + 1
+            self.df.setdefault(d, Counter()).update(set(lem))
+            n += 1
+        return n
+
+    def remove(self, domains: Sequence, keys: Sequence[str], lemmas: Sequence[Iterable[str]]) -> int:
+        """Retire des documents (mêmes lemmes qu'à l'ajout) ; clés inconnues ignorées."""
+        n = 0
+        for dom, key, lem in zip(domains, keys, lemmas):
+            d = domain_key(dom)
+            doc = _doc_id(d, key) if d is not None else None
+            if doc not in self._ids:
+                continue
+            self._ids.discard(doc)
+            self._pending += _REMOVE + doc
+            self.n_docs[d] -= 1
+            cnt = self.df[d]
+            for w in set(lem):
+                if cnt[w] <= 1:
+                    cnt.pop(w, None)
+                else:
+                    cnt[w] -= 1
+            n += 1
+        return n
+
+    def __contains__(self, item) -> bool:
+        dom, key = item
+        d = domain_key(dom)
+        return d is not None and _doc_id(d, key) in self._ids
+
+    # ---------- lecture ----------
+    def idf(self, domain, vocab: Sequence[str]) -> np.ndarray:
+        """Vecteur IDF lissé pour `vocab` (domaine inconnu : N=0, df=0)."""
+        d = domain_key(domain)
+        cnt = self.df.get(d, {})
+        dfreq = np.fromiter((cnt.get(w, 0) for w in vocab), dtype=np.float64, count=len(vocab))
+        N = max(1, self.n_docs.get(d, 0))
+        return np.log((N + 1) / (dfreq + 1)) + 1.0
+
+    @property
+    def dirty(self) -> bool:
+        """Ajouts / retraits pas encore écrits par snapshot()."""
+        return bool(self._pending)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {d: {"n_docs": self.n_docs[d], "n_lemmas": len(self.df.get(d, ()))} for d in sorted(self.n_docs)}
+
+    # ---------- snapshots ----------
+    def _require_root(self) -> Path:
+        if self.root is None:
+            raise RuntimeError("[idf_store] no root directory configured for snapshots")
+        return self.root
+
+    def versions(self) -> List[str]:
+        root = self._require_root()
+        if not root.exists():
+            return []
+        found = [(int(m.group(1)), f"v{m.group(1)}") for p in root.iterdir() if (m := _VERSION_RE.match(p.name))]
+        return [v for _, v in sorted(found)]
+
+    def _docs_bytes(self, version: str) -> int:
+        with gzip.open(self._require_root() / f"{version}.json.gz", "rt", encoding="utf-8") as f:
+            return int(json.load(f)["docs_bytes"])
+
+    def snapshot(self, version: Optional[str] = None) -> str:
+        """
+        Écrit l'état courant comme nouvelle version (immuable) ; renvoie son nom.
+        Le journal des ids reçoit les opérations depuis la dernière version (ou,
+        si le store part d'une version plus ancienne, la différence avec elle).
+        """
+        root = self._require_root()
+        root.mkdir(parents=True, exist_ok=True)
+        prev = self.versions()
+        if version is None:
+            version = f"v{(int(prev[-1][1:]) + 1) if prev else 1:04d}"
+        if not _VERSION_RE.match(f"{version}.json.gz"):
+            raise ValueError(f"[idf_store] invalid version name {version!r} (expected v<digits>)")
+        path = root / f"{version}.json.gz"
+        if path.exists():
+            raise FileExistsError(f"[idf_store] snapshot {path} already exists")
+        log = root / DOCS_LOG
+        head = self._docs_bytes(prev[-1]) if prev else 0
+        if prev and self.version == prev[-1]:
+            ops = bytes(self._pending)
+        else:
+            # pas issu de la dernière version : différence avec son ensemble d'ids
+            last = _replay(log, head)
+            ops = b"".join([_REMOVE + d for d in sorted(last - self._ids)] +
+                           [_ADD + d for d in sorted(self._ids - last)])
+        with open(log, "ab") as f:
+            f.truncate(head)  # fin orpheline d'un snapshot interrompu
+            f.write(ops)
+            f.flush()
+            os.fsync(f.fileno())
+        payload = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "docs_bytes": head + len(ops),
+            "domains": {d: {"n_docs": self.n_docs[d], "df": dict(self.df.get(d, {}))} for d in sorted(self.n_docs)},
+        }
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp, path)
+        self.version = version
+        self._pending.clear()
+        return version
+
+    @classmethod
+    def load(cls, root: str | Path, version: Optional[str] = None) -> "DocFreqStore":
+        """Charge une version (défaut : la dernière) ; store vide si aucune n'existe encore."""
+        store = cls(root)
+        if version is None:
+            vs = store.versions()
+            if not vs:
+                return store
+            version = vs[-1]
+        path = Path(root) / f"{version}.json.gz"
+        if not path.exists():
+            raise FileNotFoundError(f"[idf_store] snapshot not found: {path}")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("format") != FORMAT_VERSION:
+            raise RuntimeError(f"[idf_store] incompatible snapshot format in {path}")
+        for d, st in payload["domains"].items():
+            store.n_docs[d] = int(st["n_docs"])
+            store.df[d] = Counter(st["df"])
+        store._ids = _replay(Path(root) / DOCS_LOG, int(payload["docs_bytes"]))
+        store.version = version
+        return store
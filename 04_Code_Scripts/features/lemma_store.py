@@ -0,0 +1,326 @@
+# 04_Code_Scripts/features/lemma_store.py
+"""
+Persistent token/lemma store keyed by (text hash, spaCy model version).
+
+The spaCy parse dominates feature time; lemmas only depend on the text and the
+model, not on the lexicon or λ. Each document is stored once, as compact arrays:
+
+  root/<model_key>/
+    strings.jsonl   lemma string table (line n = lemma id n), shared by all docs
+    pos.jsonl       POS tag table
+    lemma.u32       lemma ids (lower-cased lemma_), concatenated over documents
+    pos.u8          POS ids
+    flags.u8        bit0 = is_alpha, bit1 = is_stop
+    start.u32       token char offsets (tok.idx)
+    end.u32         tok.idx + len(tok.text)
+    index.tsv       text_hash <TAB> token offset <TAB> n_tokens
+
+Arrays are read through np.memmap. Writers append under a lock file and re-read
+the tables first, so several processes can share one store. index.tsv is written
+last and is the source of truth: rows (or partial lines) left past it by a writer
+that crashed mid-flush are truncated before the next append. lemmatize() flushes
+every `flush_docs` documents / `flush_tokens` tokens (env LEMMA_STORE_FLUSH_DOCS,
+LEMMA_STORE_FLUSH_TOKENS), so a whole language group is never buffered in RAM.
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from utils.hashing import text_hash
+
+FORMAT_VERSION = 1
+FLAG_ALPHA = 1
+FLAG_STOP = 2
+
+# plafond du tampon d'écriture de lemmatize() (listes Python : ~100 o / token)
+FLUSH_DOCS = int(os.environ.get("LEMMA_STORE_FLUSH_DOCS", "2000"))
+FLUSH_TOKENS = int(os.environ.get("LEMMA_STORE_FLUSH_TOKENS", "1000000"))
+
+# (nom, dtype, fichier)
+_ARRAYS = (("lemma", np.uint32, "lemma.u32"), ("pos", np.uint8, "pos.u8"), ("flags", np.uint8, "flags.u8"),
+           ("start", np.uint32, "start.u32"), ("end", np.uint32, "end.u32"))
+
+
+def model_key(nlp=None, meta: Optional[Dict] = None) -> str:
+    """
+    Store namespace for a pipeline: '<lang>_<name>-<version>' (e.g. en_core_web_lg-3.7.1),
+    from nlp.meta or from a meta.json dict (nlp_profiles.model_meta, model not loaded).
+    """
+    meta = (getattr(nlp, "meta", {}) if meta is None else meta) or {}
+    lang = meta.get("lang") or getattr(nlp, "lang", "xx")
+    return f"{lang}_{meta.get('name', 'pipeline')}-{meta.get('version', '0.0.0')}"
+
+
+@dataclass
+class DocLemmas:
+    lemma_ids: np.ndarray
+    pos_ids: np.ndarray
+    flags: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.lemma_ids.shape[0])
+
+
+class _FileLock:
+    """Cross-platform exclusive lock file (O_EXCL); stale locks are broken after `stale_s`."""
+
+    def __init__(self, path: Path, stale_s: float = 120.0) -> None:
+        self.path = path
+        self.stale_s = stale_s
+
+    def __enter__(self) -> "_FileLock":
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > self.stale_s:
+                        self.path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                time.sleep(0.05)
+
+    def __exit__(self, *exc) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _read_new_lines(path: Path, offset: int) -> Tuple[List[bytes], int]:
+    """Complete lines appended after byte `offset` (a partial last line is left for later)."""
+    if not path.exists():
+        return [], offset
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    end = data.rfind(b"\n")
+    if end < 0:
+        return [], offset
+    return data[:end].split(b"\n"), offset + end + 1
+
+
+class LemmaStore:
+    """Append-only, memory-mapped lemma store for one spaCy model."""
+
+    def __init__(self, root: str | Path, key: str) -> None:
+        self.key = key
+        self.dir = Path(root) / re.sub(r"[^\w.\-]+", "_", key)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        meta = self.dir / "meta.json"
+        if not meta.exists():
+            meta.write_text(json.dumps({"format": FORMAT_VERSION, "model": key}), encoding="utf-8")
+        elif json.loads(meta.read_text(encoding="utf-8")).get("format") != FORMAT_VERSION:
+            raise RuntimeError(f"[lemma_store] incompatible store format in {self.dir}")
+
+        self.strings: List[str] = []
+        self._sid: Dict[str, int] = {}
+        self.pos_tags: List[str] = []
+        self._pid: Dict[str, int] = {}
+        self.index: Dict[str, Tuple[int, int]] = {}
+        self._read = {"strings": 0, "pos": 0, "index": 0}
+        self._pending: Dict[str, Tuple[List[str], List[str], List[int], List[int], List[int]]] = {}
+        self._pending_tokens = 0
+        self._n_rows = 0  # tokens covered by index.tsv
+        self._maps: Optional[Dict[str, np.ndarray]] = None
+        self._refresh()
+
+    @classmethod
+    def for_nlp(cls, root: str | Path, nlp) -> "LemmaStore":
+        return cls(root, model_key(nlp))
+
+    # ---------- tables ----------
+    def _refresh(self) -> None:
+        lines, self._read["strings"] = _read_new_lines(self.dir / "strings.jsonl", self._read["strings"])
+        for ln in lines:
+            s = json.loads(ln)
+            self._sid[s] = len(self.strings)
+            self.strings.append(s)
+        lines, self._read["pos"] = _read_new_lines(self.dir / "pos.jsonl", self._read["pos"])
+        for ln in lines:
+            s = json.loads(ln)
+            self._pid[s] = len(self.pos_tags)
+            self.pos_tags.append(s)
+        lines, self._read["index"] = _read_new_lines(self.dir / "index.tsv", self._read["index"])
+        if lines:
+            for ln in lines:
+                h, off, n = ln.decode("ascii").split("\t")
+                self.index[h] = (int(off), int(n))
+                self._n_rows = max(self._n_rows, int(off) + int(n))
+            self._maps = None
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        if self._maps is None:
+            maps = {}
+            for name, dt, fname in _ARRAYS:
+                p = self.dir / fname
+                n = p.stat().st_size // np.dtype(dt).itemsize if p.exists() else 0
+                maps[name] = np.memmap(p, dtype=dt, mode="r", shape=(n,)) if n else np.zeros(0, dtype=dt)
+            self._maps = maps
+        return self._maps
+
+    # ---------- lecture ----------
+    def __contains__(self, key: str) -> bool:
+        return key in self.index or key in self._pending
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def get(self, key: str) -> Optional[DocLemmas]:
+        """Arrays of one document (zero-copy memmap slices), or None."""
+        if key in self._pending:
+            self.flush()
+        if key not in self.index:
+            self._refresh()  # written by another process since?
+            if key not in self.index:
+                return None
+        off, n = self.index[key]
+        a = self._arrays()
+        if off + n > a["lemma"].shape[0]:
+            self._maps = None
+            a = self._arrays()
+        sl = slice(off, off + n)
+        return DocLemmas(a["lemma"][sl], a["pos"][sl], a["flags"][sl], a["start"][sl], a["end"][sl])
+
+    def lemmas(self, dl: DocLemmas) -> List[str]:
+        s = self.strings
+        return [s[i] for i in dl.lemma_ids.tolist()]
+
+    def pos(self, dl: DocLemmas) -> List[str]:
+        p = self.pos_tags
+        return [p[i] for i in dl.pos_ids.tolist()]
+
+    # ---------- écriture ----------
+    def put(self, key: str, doc) -> None:
+        """Queue a spaCy Doc (written on flush)."""
+        self.put_chunks(key, [(0, doc)])
+
+    def put_chunks(self, key: str, parts: Sequence[Tuple[int, object]]) -> None:
+        """Queue one text parsed as chunks [(char offset, Doc)] (features.nlp_chunks)."""
+        if key in self.index or key in self._pending:
+            return
+        lem, pos, flags, st, en = [], [], [], [], []
+        for off, doc in parts:
+            for tok in doc:
+                lem.append(tok.lemma_.lower())
+                pos.append(tok.pos_)
+                flags.append((FLAG_ALPHA if tok.is_alpha else 0) | (FLAG_STOP if tok.is_stop else 0))
+                st.append(off + tok.idx)
+                en.append(off + tok.idx + len(tok.text))
+        self._pending[key] = (lem, pos, flags, st, en)
+        self._pending_tokens += len(lem)
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        with _FileLock(self.dir / ".lock"):
+            self._refresh()
+            new_strings: List[str] = []
+            new_pos: List[str] = []
+            cols: Dict[str, List[int]] = {name: [] for name, _, _ in _ARRAYS}
+            idx_lines: List[str] = []
+            self._truncate_orphans()
+            offset = self._n_rows
+            for key, (lem, pos, flags, st, en) in self._pending.items():
+                if key in self.index:
+                    continue
+                for s in lem:
+                    if s not in self._sid:
+                        self._sid[s] = len(self.strings)
+                        self.strings.append(s)
+                        new_strings.append(s)
+                for s in pos:
+                    if s not in self._pid:
+                        self._pid[s] = len(self.pos_tags)
+                        self.pos_tags.append(s)
+                        new_pos.append(s)
+                cols["lemma"].extend(self._sid[s] for s in lem)
+                cols["pos"].extend(self._pid[s] for s in pos)
+                cols["flags"].extend(flags)
+                cols["start"].extend(st)
+                cols["end"].extend(en)
+                self.index[key] = (offset, len(lem))
+                idx_lines.append(f"{key}\t{offset}\t{len(lem)}\n")
+                offset += len(lem)
+
+            # tables first, index last: a reader never sees an entry without its data
+            self._read["strings"] += self._append_lines("strings.jsonl", [json.dumps(s) + "\n" for s in new_strings])
+            self._read["pos"] += self._append_lines("pos.jsonl", [json.dumps(s) + "\n" for s in new_pos])
+            for name, dt, fname in _ARRAYS:
+                with open(self.dir / fname, "ab") as f:
+                    f.write(np.asarray(cols[name], dtype=dt).tobytes())
+            self._read["index"] += self._append_lines("index.tsv", idx_lines)
+            self._n_rows = offset
+        self._pending.clear()
+        self._pending_tokens = 0
+        self._maps = None
+
+    def _truncate_orphans(self) -> None:
+        # sous le verrou : au-delà de index.tsv = flush interrompu (les 5 tableaux restent alignés)
+        sizes = [(self.dir / fname, self._n_rows * np.dtype(dt).itemsize) for _, dt, fname in _ARRAYS]
+        sizes += [(self.dir / "strings.jsonl", self._read["strings"]), (self.dir / "pos.jsonl", self._read["pos"]),
+                  (self.dir / "index.tsv", self._read["index"])]
+        for path, size in sizes:
+            if path.exists() and path.stat().st_size > size:
+                print(f"[lemma_store] truncating {path.stat().st_size - size} orphan bytes in {path}", flush=True)
+                with open(path, "r+b") as f:
+                    f.truncate(size)
+                self._maps = None
+
+    def _append_lines(self, name: str, lines: Sequence[str]) -> int:
+        data = "".join(lines).encode("utf-8")
+        if data:
+            with open(self.dir / name, "ab") as f:
+                f.write(data)
+        return len(data)
+
+    # ---------- batch ----------
+    def lemmatize(self, texts: Sequence[str], nlp, batch_size: int = 64, n_process: int = 1,
+                  disable: Sequence[str] = (), max_chars: Optional[int] = None,
+                  flush_docs: Optional[int] = None, flush_tokens: Optional[int] = None) -> List[DocLemmas]:
+        """
+        DocLemmas for every text (input order). Only texts missing from the store are
+        parsed, once each, through nlp.pipe; they are persisted as parsing goes, every
+        flush_docs documents or flush_tokens tokens (defaults FLUSH_DOCS / FLUSH_TOKENS).
+        Texts longer than max_chars (env CONATIVE_MAX_CHARS) are parsed in chunks.
+        """
+        flush_docs = FLUSH_DOCS if flush_docs is None else flush_docs
+        flush_tokens = FLUSH_TOKENS if flush_tokens is None else flush_tokens
+        from features.nlp_chunks import pipe_chunks
+        keys = [text_hash(t) for t in texts]
+        missing: Dict[str, str] = {}
+        for k, t in zip(keys, texts):
+            if k not in self.index and k not in missing:
+                missing[k] = t
+        if missing:
+            self._refresh()
+            missing = {k: t for k, t in missing.items() if k not in self.index}
+        if missing:
+            with nlp.select_pipes(disable=list(disable)):
+                parts = pipe_chunks(nlp, list(missing.values()), max_chars, batch_size, n_process)
+                for k, p in zip(missing.keys(), parts):
+                    self.put_chunks(k, p)
+                    if len(self._pending) >= flush_docs or self._pending_tokens >= flush_tokens:
+                        self.flush()
+            self.flush()
+        return [self.get(k) for k in keys]
+
+
+def open_lemma_store(nlp, root: Optional[str | Path] = None) -> Optional[LemmaStore]:
+    """Store for `nlp` under `root` (or env LEMMA_STORE_DIR); None when not configured."""
+    root = root or os.environ.get("LEMMA_STORE_DIR")
+    if not root:
+        return None
+    return LemmaStore.for_nlp(root, nlp)
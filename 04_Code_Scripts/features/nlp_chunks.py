@@ -0,0 +1,108 @@
+# 04_Code_Scripts/features/nlp_chunks.py
+"""
+Découpage des textes longs avant spaCy.
+
+Un Congressional Record d'une journée dépasse souvent nlp.max_length
+(1 000 000 caractères) : nlp(text) lève une erreur. Relever la limite ferait
+exploser la mémoire du pipeline. Ici, un texte plus long que `max_chars`
+(par défaut nlp.max_length : seuls les textes que spaCy refuserait) est
+coupé en tranches exactes du texte d'origine (aucun caractère perdu ni
+ajouté), de préférence sur une fin de paragraphe, sinon de phrase, sinon un
+blanc ; les tranches passent dans le même flux nlp.pipe que les autres textes.
+
+Les lemmes d'un texte = concaténation des lemmes de ses tranches ; les offsets
+des tokens sont ceux du texte complet (offset de tranche + tok.idx). Aux points
+de coupe, le tagger / lemmatiseur perd le contexte de la tranche voisine : les
+lemmes peuvent y différer d'une passe unique (hypothétique), d'où un défaut qui
+ne découpe que ce qui échouerait sinon.
+
+ENV (optionnel)
+---------------
+CONATIVE_MAX_CHARS : taille max d'une tranche (défaut 0 = nlp.max_length ; borné par nlp.max_length)
+"""
+from __future__ import annotations
+import os
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+MAX_CHARS = int(os.environ.get("CONATIVE_MAX_CHARS", "0"))
+
+_SENT_ENDS = (". ", "! ", "? ", ".\n", "!\n", "?\n", "… ", ".\t")
+_SPACES = (" ", "\n", "\t", "\r", "\f", "\u00a0")
+
+
+def effective_max_chars(nlp=None, max_chars: Optional[int] = None) -> int:
+    mc = MAX_CHARS if max_chars is None else int(max_chars)
+    limit = getattr(nlp, "max_length", None)
+    if limit:
+        mc = min(mc, int(limit)) if mc > 0 else int(limit)
+    return mc
+
+
+def _cut(window: str) -> int:
+    # position de coupe (après le séparateur) : paragraphe > phrase > blanc > coupe franche
+    min_keep = len(window) // 4  # évite des tranches minuscules
+    p = window.rfind("\n\n")
+    if p >= min_keep:
+        return p + 2
+    p = max(window.rfind(s) for s in _SENT_ENDS)
+    if p >= min_keep:
+        return p + 2
+    p = max(window.rfind(s) for s in _SPACES)
+    if p >= min_keep:
+        return p + 1
+    return len(window)
+
+
+def chunk_spans(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """Tranches (début, fin) couvrant exactement `text`, chacune ≤ max_chars (max_chars ≤ 0 : une seule)."""
+    n = len(text)
+    if max_chars <= 0 or n <= max_chars:
+        return [(0, n)]
+    spans: List[Tuple[int, int]] = []
+    start = 0
+    while n - start > max_chars:
+        end = start + _cut(text[start:start + max_chars])
+        spans.append((start, end))
+        start = end
+    spans.append((start, n))
+    return spans
+
+
+def pipe_chunks(nlp, texts: Sequence[str], max_chars: Optional[int] = None, batch_size: int = 64,
+                n_process: int = 1) -> Iterator[List[Tuple[int, object]]]:
+    """
+    Pour chaque texte (ordre d'entrée) : liste [(offset, Doc)] de ses tranches.
+    Un seul flux nlp.pipe pour toutes les tranches ; la mémoire reste bornée par
+    le lot et par la taille d'une tranche.
+    """
+    mc = effective_max_chars(nlp, max_chars)
+    plan = [chunk_spans(t, mc) for t in texts]
+
+    def _slices() -> Iterable[str]:
+        for t, spans in zip(texts, plan):
+            for a, b in spans:
+                yield t[a:b]
+
+    docs = nlp.pipe(_slices(), batch_size=batch_size, n_process=n_process)
+    for spans in plan:
+        yield [(a, next(docs)) for a, _ in spans]
+
+
+def chunk_lemmas(parts: List[Tuple[int, object]]) -> List[str]:
+    """Lemmes (minuscules) du texte complet à partir de ses tranches."""
+    return [tok.lemma_.lower() for _, doc in parts for tok in doc]
+
+
+def chunk_offsets(parts: List[Tuple[int, object]]) -> Tuple[List[int], List[int]]:
+    """(débuts, fins) des tokens en caractères du texte complet, alignés sur chunk_lemmas."""
+    starts = [off + tok.idx for off, doc in parts for tok in doc]
+    ends = [off + tok.idx + len(tok.text) for off, doc in parts for tok in doc]
+    return starts, ends
+
+
+def n_chunks(text: str, nlp=None, max_chars: Optional[int] = None) -> int:
+    """Nb de tranches de `text` (1 sans découpage, sans parcourir le texte) ; pipe_chunks donne len(parts)."""
+    mc = effective_max_chars(nlp, max_chars)
+    if mc <= 0 or len(text) <= mc:
+        return 1
+    return len(chunk_spans(text, mc))
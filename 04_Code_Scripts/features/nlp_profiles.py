@@ -0,0 +1,164 @@
+# 04_Code_Scripts/features/nlp_profiles.py
+"""
+Named spaCy pipeline profiles.
+
+The conative features only need lemmas. Loading the full `_lg` pipelines
+(parser, NER, ...) costs seconds of startup and a lot of RSS per language.
+
+Profiles
+--------
+full            : fr_core_news_lg / en_core_web_lg, every component (historical behaviour)
+lemma-accurate  : same `_lg` models, only the components lemmas depend on. Lemmas are
+                  identical to `full`; static vectors are kept because the `_lg`
+                  tok2vec reads them.
+lemma-fast      : `_sm` models (no static vectors), lemma components only. Faster and
+                  lighter; lemmas can differ slightly from the `_lg` models.
+
+A stripped copy of each (profile, lang) can be written once with `build_profile`
+(nlp.to_disk). `load_profile` loads that copy when it exists, so only the kept
+components are read from disk.
+
+ENV (optionnels)
+----------------
+SPACY_PROFILE      : default profile (lemma-accurate)
+SPACY_PROFILE_DIR  : root of the stripped copies (default artifacts/spacy_profiles)
+
+Usage
+-----
+python -m features.nlp_profiles build [lemma-fast|lemma-accurate|full] [FR EN]
+"""
+from __future__ import annotations
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+# Components lemmas depend on (tokenizer is not a pipe)
+LEMMA_PIPES = {"tok2vec", "tagger", "morphologizer", "attribute_ruler", "lemmatizer", "trainable_lemmatizer"}
+
+PROFILES: Dict[str, Dict] = {
+    "full": {
+        "models": {"FR": "fr_core_news_lg", "EN": "en_core_web_lg"},
+        "lemma_only": False,
+        "vectors": True,
+    },
+    "lemma-accurate": {
+        "models": {"FR": "fr_core_news_lg", "EN": "en_core_web_lg"},
+        "lemma_only": True,
+        "vectors": True,
+    },
+    "lemma-fast": {
+        "models": {"FR": "fr_core_news_sm", "EN": "en_core_web_sm"},
+        "lemma_only": True,
+        "vectors": False,
+    },
+}
+
+DEFAULT_PROFILE = os.environ.get("SPACY_PROFILE", "lemma-accurate")
+_PROFILE_DIR = os.environ.get("SPACY_PROFILE_DIR", "artifacts/spacy_profiles")
+
+
+def resolve_profile(profile: Optional[str] = None) -> str:
+    name = (profile or DEFAULT_PROFILE).strip().lower()
+    if name not in PROFILES:
+        raise ValueError(f"[nlp_profiles] unknown profile {name!r} (expected one of {sorted(PROFILES)})")
+    return name
+
+
+def model_name(lang: str, profile: Optional[str] = None) -> str:
+    lang = str(lang).upper()
+    models = PROFILES[resolve_profile(profile)]["models"]
+    if lang not in models:
+        raise ValueError(f"[nlp_profiles] unknown language {lang!r} (expected FR or EN)")
+    return models[lang]
+
+
+def profile_path(lang: str, profile: Optional[str] = None, root: Optional[str | Path] = None) -> Path:
+    return Path(root or _PROFILE_DIR) / resolve_profile(profile) / str(lang).upper()
+
+
+def _excluded_pipes(model: str) -> list[str]:
+    # noms des composants du paquet installé, lus dans meta.json sans charger le modèle
+    from spacy.util import get_package_path, load_meta
+    try:
+        meta = load_meta(get_package_path(model) / "meta.json")
+    except Exception:
+        return []  # paquet absent : spacy.load échouera avec le message explicite
+    return [p for p in (meta.get("components") or meta.get("pipeline") or []) if p not in LEMMA_PIPES]
+
+
+def model_meta(lang: str, profile: Optional[str] = None, root: Optional[str | Path] = None) -> Dict:
+    """
+    meta.json du pipeline que load_profile chargerait (copie allégée, sinon paquet
+    installé), lu sans charger le modèle. RuntimeError si le paquet manque.
+    """
+    from spacy.util import get_package_path, load_meta
+    name = resolve_profile(profile)
+    local = profile_path(lang, name, root)
+    if (local / "config.cfg").exists():
+        return load_meta(local / "meta.json")
+    model = model_name(lang, name)
+    try:
+        return load_meta(get_package_path(model) / "meta.json")
+    except Exception as e:
+        raise RuntimeError(
+            f"[nlp_profiles] spaCy model '{model}' (profile {name}) not available. "
+            f"Install it, e.g.:\n  python -m spacy download {model}\nOriginal error: {e}"
+        ) from e
+
+
+def _load_installed(lang: str, name: str):
+    import spacy
+    cfg = PROFILES[name]
+    model = model_name(lang, name)
+    try:
+        nlp = spacy.load(model, exclude=_excluded_pipes(model) if cfg["lemma_only"] else [])
+    except Exception as e:
+        raise RuntimeError(
+            f"[nlp_profiles] spaCy model '{model}' (profile {name}) not available. "
+            f"Install it, e.g.:\n  python -m spacy download {model}\nOriginal error: {e}"
+        ) from e
+    if not cfg["vectors"] and nlp.vocab.vectors.shape[0]:
+        from spacy.vectors import Vectors
+        nlp.vocab.vectors = Vectors(shape=(0, 0))
+    return nlp
+
+
+def load_profile(lang: str, profile: Optional[str] = None, root: Optional[str | Path] = None):
+    """
+    Pipeline spaCy pour `lang` (FR/EN) selon le profil. Utilise la copie allégée
+    sous SPACY_PROFILE_DIR si elle existe, sinon le paquet installé (composants
+    hors profil exclus au chargement). Échec immédiat si le modèle manque.
+    """
+    name = resolve_profile(profile)
+    local = profile_path(lang, name, root)
+    if (local / "config.cfg").exists():
+        import spacy
+        return spacy.load(local)
+    return _load_installed(lang, name)
+
+
+def build_profile(lang: str, profile: Optional[str] = None, root: Optional[str | Path] = None) -> Path:
+    """Sérialise une fois la version allégée du pipeline (nlp.to_disk)."""
+    name = resolve_profile(profile)
+    out = profile_path(lang, name, root)
+    if (out / "config.cfg").exists():
+        return out
+    nlp = _load_installed(lang, name)
+    out.mkdir(parents=True, exist_ok=True)
+    nlp.to_disk(out)
+    return out
+
+
+def main(argv: list[str]) -> None:
+    if not argv or argv[0] != "build":
+        print("Usage: python -m features.nlp_profiles build [profile] [FR EN]", file=sys.stderr)
+        sys.exit(2)
+    profile = argv[1] if len(argv) > 1 else None
+    langs = argv[2:] or ["FR", "EN"]
+    for lang in langs:
+        print(f"OK: {build_profile(lang, profile)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
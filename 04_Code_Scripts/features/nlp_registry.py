@@ -0,0 +1,160 @@
+# 04_Code_Scripts/features/nlp_registry.py
+"""
+Registre process-wide des pipelines spaCy.
+
+Chaque (langue, profil) est chargé une seule fois par processus et partagé
+(precheck, v2, v3, verify_env). `preload` avant un fork (multiprocessing
+"fork", nlp.pipe n_process>1 sous Linux) : les enfants héritent des pages du
+modèle en copy-on-write ; gc.freeze() évite que le GC n'y écrive.
+
+Budget mémoire (NLP_RSS_BUDGET_MB, 0 = illimité), compté sur la taille des
+pipelines résidents (hausse du RSS mesurée à leur chargement) et non sur le RSS
+courant : avant de charger un pipeline, les moins récemment utilisés sont
+libérés tant que résidents + taille attendue (la sienne, ou la plus grosse déjà
+vue) dépassent le budget ; `scoped` / `trim` libèrent ensuite les autres au-delà
+du budget, jamais celui du groupe qui vient de tourner. Un run FR/EN ne garde
+alors qu'un `_lg` résident (~0.5-1 GB chacun).
+
+Limite : libérer un pipeline rend rarement la mémoire à l'OS (arènes glibc,
+vocab / StringStore encore référencés) ; le RSS du processus ne baisse donc pas
+forcément, mais la place est réutilisée par le pipeline suivant. Budgéter sur le
+RSS courant viderait le registre à chaque groupe et rechargerait un `_lg` par
+lot.
+
+    from features.nlp_registry import get_nlp, scoped
+    nlp = get_nlp("FR")              # profil SPACY_PROFILE (défaut lemma-accurate)
+    nlp = get_nlp("EN", "full")
+    with scoped("EN") as nlp:        # les autres libérés en sortie au-delà du budget
+        ...
+"""
+from __future__ import annotations
+import gc
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from features.nlp_profiles import load_profile, resolve_profile
+
+_MODELS: Dict[Tuple[str, str], object] = {}
+_TIMINGS: Dict[Tuple[str, str], float] = {}
+_SIZES: Dict[Tuple[str, str], float] = {}      # RSS (MB) pris au chargement (max observé)
+_LAST_USE: Dict[Tuple[str, str], float] = {}
+_LOCK = threading.Lock()
+_RSS_BUDGET_MB = float(os.environ.get("NLP_RSS_BUDGET_MB", "0") or 0)
+
+
+def rss_mb() -> float:
+    """RSS courant du processus (MB) ; NaN si indisponible."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for ln in f:
+                if ln.startswith("VmRSS:"):
+                    return int(ln.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return float("nan")
+
+
+def _key(lang: str, profile: Optional[str]) -> Tuple[str, str]:
+    return str(lang).upper(), resolve_profile(profile)
+
+
+def get_nlp(lang: str, profile: Optional[str] = None):
+    """Instance partagée du pipeline (chargée au premier appel, sous NLP_RSS_BUDGET_MB)."""
+    key = _key(lang, profile)
+    _LAST_USE[key] = time.monotonic()
+    nlp = _MODELS.get(key)
+    if nlp is not None:
+        return nlp
+    if _RSS_BUDGET_MB > 0:
+        need = _SIZES.get(key) or max(_SIZES.values(), default=0.0)
+        trim(_RSS_BUDGET_MB - need, keep=[key])
+    with _LOCK:
+        if key not in _MODELS:
+            t0, rss0 = time.perf_counter(), rss_mb()
+            _MODELS[key] = load_profile(*key)
+            _TIMINGS[key] = time.perf_counter() - t0
+            grown = rss_mb() - rss0
+            # rechargé dans une place libérée : le RSS monte peu, on garde la taille déjà vue
+            _SIZES[key] = max(_SIZES.get(key, 0.0), grown if grown == grown else 0.0)
+            print(f"[NLP] loaded {key[0]} ({key[1]}) in {_TIMINGS[key]:.2f}s rss={rss_mb():.0f}MB", flush=True)
+        return _MODELS[key]
+
+
+def preload(langs: Iterable[str] = ("FR", "EN"), profile: Optional[str] = None, freeze: bool = False) -> Dict[str, object]:
+    """
+    Charge les pipelines demandés (fail-fast). freeze=True : gc.freeze() juste
+    avant un fork, pour garder les pages du modèle partagées avec les enfants.
+    """
+    out = {str(lang).upper(): get_nlp(lang, profile) for lang in langs}
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return out
+
+
+def release(lang: Optional[str] = None, profile: Optional[str] = None) -> int:
+    """Oublie les pipelines (tous, ou une langue / un profil) ; renvoie le nombre libéré."""
+    with _LOCK:
+        keys = [k for k in _MODELS
+                if (lang is None or k[0] == str(lang).upper())
+                and (profile is None or k[1] == resolve_profile(profile))]
+        for k in keys:
+            del _MODELS[k]
+    if keys:
+        gc.collect()
+    return len(keys)
+
+
+def resident_mb() -> float:
+    """Taille comptée (MB) des pipelines résidents : somme des hausses de RSS à leur chargement."""
+    return sum(_SIZES.get(k, 0.0) for k in _MODELS)
+
+
+def trim(budget_mb: Optional[float] = None, keep: Iterable[Tuple[str, str]] = ()) -> int:
+    """
+    Libère les pipelines les moins récemment utilisés (hors `keep`) tant que leur
+    taille comptée (resident_mb) dépasse budget_mb (défaut NLP_RSS_BUDGET_MB ; <= 0
+    sans budget : rien).
+    """
+    budget = _RSS_BUDGET_MB if budget_mb is None else float(budget_mb)
+    if budget_mb is None and budget <= 0:
+        return 0
+    keep = set(keep)
+    n = 0
+    for key in sorted((k for k in _MODELS if k not in keep), key=lambda k: _LAST_USE.get(k, 0.0)):
+        used = resident_mb()
+        if not used > budget:
+            break
+        n += release(*key)
+        print(f"[NLP] released {key[0]} ({key[1]}) resident={used:.0f}->{resident_mb():.0f}MB "
+              f"budget={budget:.0f}MB rss={rss_mb():.0f}MB", flush=True)
+    return n
+
+
+@contextmanager
+def scoped(lang: str, profile: Optional[str] = None, budget_mb: Optional[float] = None) -> Iterator[object]:
+    """
+    Pipeline d'un groupe de langue ; en sortie, les autres pipelines sont libérés
+    au-delà du budget (défaut NLP_RSS_BUDGET_MB), celui-ci reste pour le lot suivant
+    (budget_mb=0 : tout est libéré, celui-ci compris).
+    """
+    try:
+        yield get_nlp(lang, profile)
+    finally:
+        trim(budget_mb, keep=() if budget_mb == 0 else [_key(lang, profile)])
+
+
+def loaded() -> List[Tuple[str, str]]:
+    return sorted(_MODELS)
+
+
+def load_timings() -> Dict[str, float]:
+    """Temps de chargement (s) par 'LANG/profil', pour les logs / benchs."""
+    return {f"{lang}/{prof}": round(t, 3) for (lang, prof), t in sorted(_TIMINGS.items())}
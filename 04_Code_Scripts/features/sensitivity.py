@@ -0,0 +1,223 @@
+# 04_Code_Scripts/features/sensitivity.py
+"""
+Sensibilité à λ et à la source d'alignement, en une passe vectorisée.
+
+Le préregistrement fixe λ = 0.5 (fc_fi_v3._LAMBDA) ; le rapport de robustesse veut
+Fc / Fi / β et les AUC aval sur une grille de λ × sources d'alignement. Fc et Fi
+sont linéaires en push / inhibit / a, λ : pas besoin de repasser le pipeline,
+
+  Fc[s, d, l] = p_d·a_sd + λ_l·h_d·(1 - a_sd)      (conative_hits.fc_fi_beta, broadcast)
+
+soit un résultat compact (sources × docs × λ, float32). Les fenêtres ne sont
+construites qu'une fois (features.windows.window_membership) : les moyennes de
+toutes les colonnes de la grille sont un seul produit creux W @ X. Les
+hypothèses (H1 ΔAUC + IC95 bootstrap, H3 LRT) suivent run_hypotheses : AUC par
+rangs (Mann-Whitney, ex aequo = demi-rang) pour toutes les colonnes à la fois,
+chaque tirage bootstrap ne reclasse les scores qu'une fois pour toute la grille.
+
+    sw = lambda_sweep(df["push"], df["inhibit"], {"neutral": 0.5, "cos": a}, [0, 0.25, 0.5, 0.75, 1])
+    res = run_sweep(df, lambdas=[0, 0.5, 1])   # une ligne par (source, λ)
+"""
+from __future__ import annotations
+import warnings
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from features.conative_hits import fc_fi_beta
+from features.windows import window_means, window_membership
+
+DEFAULT_LAMBDAS = (0.0, 0.25, 0.5, 0.75, 1.0)
+
+
+class Sweep(NamedTuple):
+    fc: np.ndarray          # sources × docs × λ (float32)
+    fi: np.ndarray
+    beta: np.ndarray
+    sources: List[str]
+    lambdas: np.ndarray
+
+
+def alignment_sources(df: pd.DataFrame, names: Optional[Sequence[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Sources d'alignement a(d,T) ∈ [0,1] : "neutral" (0.5), un nombre (constante) ou
+    une colonne de df ; NaN -> 0.5 comme fc_fi_v3. Défaut : neutral (+ 'alignment' si présente).
+    """
+    if names is None:
+        names = ["neutral"] + (["alignment"] if "alignment" in df.columns else [])
+    out: Dict[str, np.ndarray] = {}
+    for name in names:
+        name = str(name).strip()
+        if name == "neutral":
+            a = np.full(len(df), 0.5)
+        elif name in df.columns:
+            a = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        else:
+            try:
+                a = np.full(len(df), float(name))
+            except ValueError:
+                raise ValueError(f"[sensitivity] alignment source '{name}' is neither 'neutral', a number nor a column") from None
+        out[name] = np.where(np.isnan(a), 0.5, np.clip(a, 0.0, 1.0))
+    return out
+
+
+def lambda_sweep(push, inhibit, alignments, lambdas: Sequence[float] = DEFAULT_LAMBDAS) -> Sweep:
+    """
+    Fc, Fi, β pour toutes les (source, λ) par broadcasting : sources × docs × λ.
+    alignments : dict nom -> tableau (un par document) ou scalaire, ou un seul tableau.
+    """
+    p = np.asarray(push, dtype=np.float32)
+    h = np.asarray(inhibit, dtype=np.float32)
+    if not isinstance(alignments, dict):
+        alignments = {"alignment": alignments}
+    lam = np.asarray(lambdas, dtype=np.float32)
+    if lam.ndim != 1 or not len(lam) or (lam < 0).any() or (lam > 1).any():
+        raise ValueError(f"[sensitivity] lambdas must be a non-empty list in [0,1], got {list(lambdas)}")
+    A = np.stack([np.broadcast_to(np.asarray(a, dtype=np.float32), p.shape) for a in alignments.values()])
+    fc, fi, beta = fc_fi_beta(p[None, :, None], h[None, :, None], A[:, :, None], lam[None, None, :])
+    return Sweep(fc, fi, beta, list(alignments), lam.astype(float))
+
+
+def sweep_table(sw: Sweep) -> pd.DataFrame:
+    """Vue longue (source, λ) des moyennes documents : utile pour un coup d'œil / le rapport."""
+    S, L = len(sw.sources), len(sw.lambdas)
+    return pd.DataFrame({
+        "align_source": np.repeat(sw.sources, L),
+        "lambda": np.tile(sw.lambdas, S),
+        "fc_doc_mean": sw.fc.mean(axis=1).ravel(),
+        "fi_doc_mean": sw.fi.mean(axis=1).ravel(),
+        "beta_doc_mean": sw.beta.mean(axis=1).ravel(),
+    })
+
+
+# ---------- AUC / hypothèses ----------
+def auc_matrix(Y: np.ndarray, scores: np.ndarray) -> np.ndarray:
+    """
+    ROC AUC de chaque colonne de Y (n × G, 0/1) contre scores (n,) ou (n × G) ;
+    NaN si une colonne n'a qu'une classe (comme run_hypotheses._safe_auc).
+    """
+    from scipy.stats import rankdata
+    Y = np.asarray(Y, dtype=float)
+    s = np.asarray(scores, dtype=float)
+    R = rankdata(s, axis=0)
+    n1 = Y.sum(axis=0)
+    n0 = len(Y) - n1
+    r1 = R @ Y if s.ndim == 1 else (R * Y).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        auc = (r1 - n1 * (n1 + 1) / 2.0) / (n1 * n0)
+    return np.where((n1 > 0) & (n0 > 0), auc, np.nan)
+
+
+def _lrt(y: np.ndarray, s_style: np.ndarray, s_tel: np.ndarray) -> Tuple[float, float]:
+    """H3 de run_hypotheses : logit style vs style + telotopic ; NaN si séparation / échec."""
+    import statsmodels.api as sm
+    from scipy.stats import chi2
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")  # séparations fréquentes aux λ extrêmes, une alerte par point sinon
+            X1 = sm.add_constant(pd.DataFrame({"style": s_style}))
+            X2 = sm.add_constant(pd.DataFrame({"style": s_style, "tel": s_tel}))
+            m1 = sm.GLM(y, X1, family=sm.families.Binomial()).fit(maxiter=100, disp=0)
+            m2 = sm.GLM(y, X2, family=sm.families.Binomial()).fit(maxiter=100, disp=0)
+            stat = 2.0 * (float(m2.llf) - float(m1.llf))
+        return stat, float(chi2.sf(stat, df=1))
+    except Exception:
+        return float("nan"), float("nan")
+
+
+def hypotheses_sweep(stance: np.ndarray, s_tel: np.ndarray, s_style: np.ndarray,
+                     n_boot: int = 400, seed: int = 42, lrt: bool = True) -> pd.DataFrame:
+    """
+    H1 / H3 pour G grilles d'un coup. stance : fenêtres × G (0/1) ; s_tel : (n,) ou (n × G) ;
+    s_style : (n,). Une ligne par colonne de la grille.
+    """
+    Y = np.asarray(stance, dtype=float)
+    n, G = Y.shape
+    auc_tel = auc_matrix(Y, s_tel)
+    auc_style = auc_matrix(Y, s_style)
+    out = pd.DataFrame({"AUC_tel": auc_tel, "AUC_style": auc_style,
+                        "H1_delta_auc_telotopic_minus_style": auc_tel - auc_style})
+    if n_boot:
+        rng = np.random.default_rng(seed)
+        idx = np.arange(n)
+        deltas = np.empty((n_boot, G))
+        for b in range(n_boot):
+            bs = rng.choice(idx, size=n, replace=True)
+            deltas[b] = auc_matrix(Y[bs], s_tel[bs]) - auc_matrix(Y[bs], s_style[bs])
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # colonne toute NaN -> IC NaN
+            lo, hi = np.nanpercentile(deltas, [2.5, 97.5], axis=0)
+        out["H1_ci95_lo"], out["H1_ci95_hi"] = lo, hi
+    if lrt:
+        stats = [_lrt(Y[:, g].astype(int), s_style, s_tel if s_tel.ndim == 1 else s_tel[:, g]) for g in range(G)]
+        out["H3_lrt_stat"] = [s[0] for s in stats]
+        out["H3_lrt_p"] = [s[1] for s in stats]
+    return out
+
+
+# ---------- passe complète ----------
+def run_sweep(df: pd.DataFrame,
+              lambdas: Sequence[float] = DEFAULT_LAMBDAS,
+              alignments: Optional[Sequence[str] | Dict[str, np.ndarray]] = None,
+              window_days: int = 30,
+              step_days: int = 7,
+              tel_score: str = "n_tel",
+              n_boot: int = 400,
+              seed: int = 42,
+              lrt: bool = True,
+              return_sweep: bool = False):
+    """
+    Documents (push, inhibit, actor_id, domain_id, date ; n_tel, len_tokens optionnels)
+    -> une ligne par (align_source, lambda) : moyennes documents, n_windows, stance_rate,
+    H1 / H3. Fenêtres et étiquettes stance comme run_windows / run_hypotheses.
+
+    tel_score : "n_tel" (n_tel_mean, défaut de run_hypotheses ; fc-fi si absent),
+    "beta" (β balayé, moyenne par fenêtre) ou "fc-fi".
+    """
+    for c in ("push", "inhibit"):
+        if c not in df.columns:
+            raise ValueError(f"[sensitivity] column '{c}' is missing (rerun features with fc_fi_v3)")
+    if tel_score not in ("n_tel", "beta", "fc-fi"):
+        raise ValueError(f"[sensitivity] tel_score must be 'n_tel', 'beta' or 'fc-fi', got {tel_score!r}")
+    if not isinstance(alignments, dict):
+        alignments = alignment_sources(df, alignments)
+    sw = lambda_sweep(df["push"].fillna(0.0), df["inhibit"].fillna(0.0), alignments, lambdas)
+    S, D, L = sw.fc.shape
+
+    W, win = window_membership(df, window_days, step_days)
+    # docs × (S·L) -> fenêtres × (S·L) : une seule multiplication creuse par grandeur
+    as_cols = lambda X: X.transpose(1, 0, 2).reshape(D, S * L)
+    fc_w = window_means(W, as_cols(sw.fc))
+    fi_w = window_means(W, as_cols(sw.fi))
+    stance = np.nan_to_num(fc_w, nan=-1.0) >= np.nan_to_num(fi_w, nan=0.0)  # NaN >= NaN -> 0 (run_hypotheses)
+
+    if tel_score == "beta":
+        s_tel = np.nan_to_num(window_means(W, as_cols(sw.beta)))
+    elif tel_score == "n_tel" and "n_tel" in df.columns:
+        s_tel = np.nan_to_num(window_means(W, pd.to_numeric(df["n_tel"], errors="coerce").to_numpy(dtype=float)))
+    else:
+        s_tel = np.nan_to_num(fc_w - fi_w)
+    if "len_tokens" in df.columns:
+        lt = window_means(W, pd.to_numeric(df["len_tokens"], errors="coerce").to_numpy(dtype=float))
+        lt = np.where(np.isnan(lt), np.nanmedian(lt) if (~np.isnan(lt)).any() else 0.0, lt)
+        s_style = (lt - lt.min()) / (lt.max() - lt.min() + 1e-9) if len(lt) else lt
+    else:
+        s_style = np.zeros(W.shape[0])
+
+    res = sweep_table(sw)
+    res["n_windows"] = W.shape[0]
+    res["stance_rate"] = stance.mean(axis=0) if W.shape[0] else np.nan
+    if W.shape[0]:
+        hyp = hypotheses_sweep(stance, s_tel, s_style, n_boot=n_boot, seed=seed, lrt=lrt)
+        res = pd.concat([res, hyp], axis=1)
+    if return_sweep:
+        return res, sw
+    return res
+
+
+def save_sweep(sw: Sweep, path, doc_ids: Optional[Sequence] = None) -> None:
+    """Résultat compact docs × λ (npz) : fc, fi, beta (sources × docs × λ), sources, lambdas, doc_id."""
+    extra = {} if doc_ids is None else {"doc_id": np.asarray([str(d) for d in doc_ids])}
+    np.savez_compressed(path, fc=sw.fc, fi=sw.fi, beta=sw.beta, sources=np.asarray(sw.sources),
+                        lambdas=sw.lambdas, **extra)
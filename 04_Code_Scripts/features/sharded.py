@@ -0,0 +1,196 @@
+# 04_Code_Scripts/features/sharded.py
+"""
+Extraction des features doc-level (v1 / v2 / v3) sur plusieurs cœurs.
+
+Les coûts sont très inégaux (un Congressional Record ≈ 100× un extrait GOV.UK) :
+un découpage naïf en N blocs laisse des workers inactifs. Ici :
+
+- coût estimé par document : colonne `tokens` de la collecte (sinon longueur
+  du texte / 6) ;
+- documents triés du plus long au plus court, puis regroupés en shards dont
+  le budget de coût décroît avec le travail restant (coût restant / 2 workers) ;
+  un document plus long que le budget forme un shard à lui seul ;
+- shards soumis dans cet ordre à un ProcessPoolExecutor : chaque worker libre
+  prend le shard suivant (les gros d'abord, les petits comblent la fin) ;
+- chaque worker charge une fois ses pipelines spaCy (nlp_registry.preload) et
+  le lexique, dans l'initializer ;
+- sorties remises dans l'ordre des lignes d'entrée (index d'origine), quel que
+  soit l'ordre de fin des shards : résultat identique à l'exécution séquentielle.
+
+v2 : seuls les lemmes sont calculés en parallèle ; l'IDF par domaine et le
+score creux sont faits ensuite sur tout le lot (un IDF par shard changerait
+les scores).
+
+    with ShardedExecutor(workers=16, langs={"EN"}) as ex:
+        out = ex.run(df, "v3", lang_col="language")
+"""
+from __future__ import annotations
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+SHARDS_PER_WORKER = int(os.environ.get("FEATURES_SHARDS_PER_WORKER", "8"))
+MAX_SHARD_ROWS = int(os.environ.get("FEATURES_MAX_SHARD_ROWS", "2000"))
+STAGES = ("v1", "v2", "v3")
+# v2 : arguments transmis aux workers (v2_lemmas) ; text_col / lang_col servent aux deux côtés
+_V2_LEMMA_KW = ("text_col", "lang_col", "lemma_store_dir", "spacy_profile")
+_V2_LEMMA_ONLY = ("lemma_store_dir", "spacy_profile", "text_col")
+
+
+def estimate_cost(df: pd.DataFrame, text_col: str = "text", tokens_col: str = "tokens") -> np.ndarray:
+    """Coût relatif par document (≥ 1) : tokens de la collecte, sinon nb de caractères / 6."""
+    chars = df[text_col].fillna("").astype(str).str.len().to_numpy() / 6.0
+    if tokens_col in df.columns:
+        tok = pd.to_numeric(df[tokens_col], errors="coerce").to_numpy(dtype=float)
+        chars = np.where(np.isfinite(tok) & (tok > 0), tok, chars)
+    return np.maximum(chars, 1.0)
+
+
+def plan_shards(cost: np.ndarray, workers: int, shards_per_worker: int = SHARDS_PER_WORKER,
+                max_rows: int = MAX_SHARD_ROWS) -> List[np.ndarray]:
+    """
+    Positions de lignes par shard, shards du plus coûteux au moins coûteux.
+    Tri décroissant stable, puis remplissage glouton : budget d'un shard = coût
+    restant / (2 × workers) (ordonnancement "guided" : les shards rapetissent vers
+    la fin), plancher total / (workers × shards_per_worker × 4).
+    """
+    if len(cost) == 0:
+        return []
+    workers = max(1, workers)
+    remaining = float(cost.sum())
+    floor = remaining / (workers * shards_per_worker * 4)
+    budget = max(floor, remaining / (2 * workers))
+    order = np.argsort(-cost, kind="stable")
+    shards: List[np.ndarray] = []
+    start, acc = 0, 0.0
+    for k, pos in enumerate(order):
+        if k > start and (acc + cost[pos] > budget or k - start >= max_rows):
+            shards.append(np.sort(order[start:k]))
+            remaining -= acc
+            budget = max(floor, remaining / (2 * workers))
+            start, acc = k, 0.0
+        acc += cost[pos]
+    shards.append(np.sort(order[start:]))
+    return shards
+
+
+# ---------- côté worker ----------
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(paths: List[str], langs: List[str], profile: Optional[str], lexicon_path: Optional[str]) -> None:
+    # spawn (Windows) : le worker repart d'un interpréteur neuf
+    for p in reversed(paths):
+        if p not in sys.path:
+            sys.path.insert(0, p)
+    t0 = time.perf_counter()
+    if langs:
+        from features.nlp_registry import preload
+        preload(langs, profile)
+    if lexicon_path:
+        from features.conative import load_conative_lexicon
+        load_conative_lexicon(lexicon_path)
+    _WORKER["ready_s"] = time.perf_counter() - t0
+
+
+def _run_shard(stage: str, shard: pd.DataFrame, kwargs: Dict):
+    if stage == "v1":
+        from features.fc_fi import apply_fc_fi_v1
+        return apply_fc_fi_v1(shard, **kwargs)
+    if stage == "v2":
+        from features.fc_fi import v2_lemmas
+        return v2_lemmas(shard, **kwargs)
+    if stage == "v3":
+        from features.fc_fi_v3 import apply_fc_fi_v3
+        return apply_fc_fi_v3(shard, **kwargs)
+    raise ValueError(f"[sharded] unknown stage {stage!r} (expected one of {STAGES})")
+
+
+# ---------- côté parent ----------
+class ShardedExecutor:
+    """Pool de workers réutilisé d'un lot à l'autre (modèles chargés une seule fois par worker)."""
+
+    def __init__(self, workers: Optional[int] = None, langs: Iterable[str] = (), profile: Optional[str] = None,
+                 lexicon_path: Optional[str] = None) -> None:
+        self.workers = int(workers or os.cpu_count() or 1)
+        self.langs = sorted({str(l).upper() for l in langs})
+        self.profile = profile
+        self.lexicon_path = lexicon_path
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def __enter__(self) -> "ShardedExecutor":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker,
+                initargs=(list(sys.path), self.langs, self.profile, self.lexicon_path))
+        return self._pool
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def run(self, df: pd.DataFrame, stage: str = "v3", lexicon=None, text_col: str = "text",
+            tokens_col: str = "tokens", **kwargs) -> pd.DataFrame:
+        """
+        Applique l'étape `stage` à df sur le pool ; sortie dans l'ordre de df.
+        kwargs : arguments de apply_fc_fi_v1 / apply_fc_fi_v2 / apply_fc_fi_v3
+        (`lexicon` pour v1 et v2).
+        """
+        if stage not in STAGES:
+            raise ValueError(f"[sharded] unknown stage {stage!r} (expected one of {STAGES})")
+        kw = dict(kwargs, text_col=text_col)
+        if stage == "v1":
+            kw["lexicon"] = lexicon
+        elif stage == "v2":
+            # workers : arguments de v2_lemmas seulement ; le reste va à apply_fc_fi_v2 (parent)
+            v2_kw = {k: v for k, v in kw.items() if k not in _V2_LEMMA_ONLY}
+            kw = {k: v for k, v in kw.items() if k in _V2_LEMMA_KW}
+        else:
+            kw["n_process"] = 1  # pas de nlp.pipe multi-processus dans un worker
+
+        shards = plan_shards(estimate_cost(df, text_col, tokens_col), self.workers)
+        t0 = time.perf_counter()
+        results: Dict[int, object] = {}
+        if self.workers <= 1 or len(shards) <= 1:
+            for s, pos in enumerate(shards):
+                results[s] = _run_shard(stage, df.iloc[pos], kw)
+        else:
+            pool = self._get_pool()
+            futs = {pool.submit(_run_shard, stage, df.iloc[pos], kw): s for s, pos in enumerate(shards)}
+            for fut in as_completed(futs):
+                results[futs[fut]] = fut.result()
+        print(f"[SHARDED] {stage} docs={len(df)} shards={len(shards)} workers={self.workers} "
+              f"in {time.perf_counter() - t0:.1f}s", flush=True)
+
+        positions = np.concatenate(shards) if shards else np.zeros(0, dtype=np.int64)
+        if stage == "v2":
+            from features.fc_fi import apply_fc_fi_v2
+            lemmas: List[Optional[List[str]]] = [None] * len(df)
+            for s, pos in enumerate(shards):
+                for p, lem in zip(pos.tolist(), results[s]):
+                    lemmas[p] = lem
+            return apply_fc_fi_v2(df, lexicon, text_col=text_col, lemmas=lemmas, **v2_kw)
+        if not shards:
+            return _run_shard(stage, df, kw)
+        out = pd.concat([results[s] for s in range(len(shards))])
+        return out.iloc[np.argsort(positions, kind="stable")]
+
+
+def run_sharded(df: pd.DataFrame, stage: str = "v3", workers: Optional[int] = None, **kwargs) -> pd.DataFrame:
+    """Appel ponctuel (pool créé puis fermé) ; préférer ShardedExecutor pour plusieurs lots."""
+    langs = kwargs.pop("langs", ())
+    profile = kwargs.get("spacy_profile")
+    with ShardedExecutor(workers, langs=langs, profile=profile, lexicon_path=kwargs.get("lexicon_path")) as ex:
+        return ex.run(df, stage, **kwargs)
@@ -1,8 +1,13 @@
 # 04_Code_Scripts/features/theta.py
 from __future__ import annotations
+import os
+from typing import Dict, List, Optional, Tuple
+
 import numpy as np
 import pandas as pd
 
+from utils.tokens import TOKEN_RE
+
 def _remap_01(x: pd.Series | np.ndarray) -> pd.Series:
     # remap from [-1,1] -> [0,1]
     return (x + 1.0) / 2.0
@@ -33,3 +38,88 @@ def add_theta_features(df: pd.DataFrame,
     # Safety: clip
     out[align_col] = out[align_col].astype(float).clip(0.0, 1.0)
     return out
+
+
+# =============== cos_theta lexical (teloi.json) ===============
+
+def telos_matrix(teloi: Dict[str, Dict[str, object]]) -> Tuple[pd.MultiIndex, pd.Index, "sparse.csr_matrix"]:
+    """
+    Teloi -> matrice creuse (acteur, domaine) × mots-clés, lignes L2-normalisées.
+    Un telos est une liste de mots-clés ou un texte ; tokens \\w+ en minuscules.
+    """
+    from scipy import sparse
+    keys: List[Tuple[str, str]] = []
+    rows: List[int] = []
+    words: List[str] = []
+    for actor, domains in teloi.items():
+        if not isinstance(domains, dict):
+            raise ValueError(f"[theta] teloi[{actor!r}] must map domain_id -> keywords, got {type(domains).__name__}")
+        for dom, kws in domains.items():
+            text = " ".join(map(str, kws)) if isinstance(kws, (list, tuple)) else str(kws or "")
+            toks = [t.lower() for t in TOKEN_RE.findall(text)]
+            if not toks:
+                continue
+            rows.extend([len(keys)] * len(toks))
+            words.extend(toks)
+            keys.append((str(actor), str(dom)))
+    codes, vocab = pd.factorize(pd.Series(words, dtype=object))
+    T = sparse.csr_matrix((np.ones(len(codes)), (rows, codes)), shape=(len(keys), len(vocab)))
+    norms = np.sqrt(np.asarray(T.multiply(T).sum(axis=1)).ravel())
+    T = sparse.diags(1.0 / np.where(norms == 0, 1.0, norms)) @ T
+    index = pd.MultiIndex.from_tuples(keys, names=["actor_id", "domain_id"]) if keys else \
+        pd.MultiIndex.from_arrays([[], []], names=["actor_id", "domain_id"])
+    return index, pd.Index(vocab, dtype=object), T.tocsr()
+
+
+def apply_theta(df: pd.DataFrame,
+                teloi: Dict[str, Dict[str, object]],
+                text_col: str = "text",
+                actor_col: str = "actor_id",
+                domain_col: str = "domain_id",
+                fc_col: str = "fc_mean",
+                fi_col: str = "fi_mean",
+                chunk_size: Optional[int] = None) -> pd.DataFrame:
+    """
+    cos_theta ∈ [-1, 1] : cosinus entre le sac de mots du document et le telos de
+    son (acteur, domaine), sans boucle par document :
+    - telos_matrix : une ligne creuse normalisée par (acteur, domaine) ;
+    - par bloc de chunk_size documents (env THETA_CHUNK, défaut 100000), une matrice
+      documents × tokens (fc_fi.corpus_dtm), dont on garde les colonnes des mots-clés ;
+    - cos = somme ligne à ligne de X_telos ∘ T[telos du document] / ‖x‖ (un seul
+      produit élément par élément creux pour tout le bloc).
+    Orientation : si fc_col / fi_col sont présents, un document inhibiteur
+    (Fi > Fc) s'éloigne du telos qu'il évoque -> cosinus négatif.
+    NaN si le couple (acteur, domaine) n'a pas de telos.
+    """
+    from scipy import sparse
+    from features.fc_fi import corpus_dtm
+
+    out = df.copy()
+    index, vocab, T = telos_matrix(teloi)
+    pairs = pd.MultiIndex.from_arrays([out[actor_col].astype(str).to_numpy(),
+                                       out[domain_col].astype(str).to_numpy()])
+    tel = index.get_indexer(pairs) if len(index) else np.full(len(out), -1)
+    texts = out[text_col].fillna("").astype(str)
+
+    cs = int(os.environ.get("THETA_CHUNK", "100000")) if chunk_size is None else int(chunk_size)
+    cs = cs if cs > 0 else max(1, len(out))
+    cos = np.full(len(out), np.nan)
+    for a in range(0, len(out), cs):
+        b = min(a + cs, len(out))
+        X, _, doc_vocab = corpus_dtm(texts.iloc[a:b])
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        col = doc_vocab.get_indexer(vocab)  # mot-clé -> colonne du bloc (-1 si absent)
+        present = col >= 0
+        Xt = X[:, col[present]] if present.any() else sparse.csr_matrix((b - a, 0))
+        ok = tel[a:b] >= 0
+        rows = np.flatnonzero(ok)
+        dots = np.asarray(Xt[rows].multiply(T[tel[a:b][rows]][:, np.flatnonzero(present)]).sum(axis=1)).ravel()
+        blk = np.full(b - a, np.nan)
+        blk[rows] = np.divide(dots, norms[rows], out=np.zeros_like(dots), where=norms[rows] > 0)
+        cos[a:b] = blk
+
+    if fc_col in out.columns and fi_col in out.columns:
+        inhib = out[fi_col].to_numpy(dtype=float) > out[fc_col].to_numpy(dtype=float)
+        cos = np.where(inhib, -cos, cos)
+    out["cos_theta"] = np.clip(cos, -1.0, 1.0)
+    return out
@@ -1,8 +1,11 @@
 # 04_Code_Scripts/features/windows.py
 from __future__ import annotations
+from typing import Sequence, Tuple
 import pandas as pd
 import numpy as np
 
+_DAY_NS = 86_400 * 10**9
+
 def _pick_timestamp_column(df: pd.DataFrame) -> str:
     """
     Choisit la colonne temporelle à utiliser.
@@ -16,80 +19,120 @@ def _pick_timestamp_column(df: pd.DataFrame) -> str:
         "'published_at', 'date', 'created_at', 'timestamp'."
     )
 
-def sliding_windows(df: pd.DataFrame, window_days: int = 30, step_days: int = 7) -> pd.DataFrame:
+def window_membership(df: pd.DataFrame, window_days: int = 30, step_days: int = 7
+                      ) -> Tuple["sparse.csr_matrix", pd.DataFrame]:
     """
-    Agrège par fenêtres glissantes (par actor_id, domain_id).
-    Colonnes attendues au minimum :
-      - actor_id, domain_id
-      - une colonne temporelle parmi: published_at/date/created_at/timestamp
-    Colonnes optionnelles :
-      - fc, fi, n_tel, ambivalence_flag
-    Sort :
-      - fc_mean, fi_mean, n_tel_mean, ambiv_rate, n_docs, win_start, win_end
-    """
-    if df.empty:
-        return pd.DataFrame()
+    Fenêtres glissantes par (actor_id, domain_id) et matrice d'appartenance creuse.
 
-    out = df.copy()
+    W[w, d] = 1 si le document d (position dans df) tombe dans [win_start, win_end)
+    de la fenêtre w. Fenêtres : de tmin (normalisé au jour) à tmax par pas de
+    step_days, y compris les fenêtres vides — celles de sliding_windows.
+    Une moyenne par fenêtre de n'importe quelle colonne (ou de K colonnes d'un
+    coup : docs × K) est alors W @ X / n_docs.
 
-    # Déterminer la colonne date
-    ts_col = _pick_timestamp_column(out)
-    out["__ts__"] = pd.to_datetime(out[ts_col], errors="coerce")
-
-    # Colonnes optionnelles -> créées si absentes
-    for col in ["fc", "fi", "n_tel"]:
-        if col not in out.columns:
-            out[col] = np.nan
-    if "ambivalence_flag" not in out.columns:
-        out["ambivalence_flag"] = np.nan
-
-    # Sanity sur clés de groupby
+    Retourne (W CSR windows × docs, meta : actor_id, domain_id, win_start, win_end),
+    meta triée par (actor_id, domain_id, win_start).
+    """
+    from scipy import sparse
     for key in ["actor_id", "domain_id"]:
-        if key not in out.columns:
+        if key not in df.columns:
             raise SystemExit(f"Missing required column '{key}' in features_doc.parquet")
+    ts_col = _pick_timestamp_column(df)
+    ts = pd.to_datetime(df[ts_col], errors="coerce")
+    if getattr(ts.dt, "tz", None) is not None:
+        ts = ts.dt.tz_localize(None)
+    valid = ts.notna().to_numpy()
+    cols = ["actor_id", "domain_id", "win_start", "win_end"]
+    if not valid.any():
+        return sparse.csr_matrix((0, len(df))), pd.DataFrame(columns=cols)
 
-    records = []
-    for (actor, domain), grp in out.groupby(["actor_id", "domain_id"], dropna=False):
-        g = grp.sort_values("__ts__").reset_index(drop=True)
-        if g.empty or g["__ts__"].isna().all():
-            continue
+    gid = df.groupby(["actor_id", "domain_id"], dropna=False, sort=True).ngroup().to_numpy()
+    keys = df[["actor_id", "domain_id"]].copy()
+    keys["__g__"] = gid
+    keys = keys.drop_duplicates("__g__").sort_values("__g__")
 
-        tmin = g["__ts__"].min().normalize()
-        tmax = g["__ts__"].max().normalize()
+    t = np.where(valid, ts.to_numpy(dtype="datetime64[ns]").astype(np.int64), 0)
+    n_groups = int(gid.max()) + 1
+    tmin = np.full(n_groups, np.iinfo(np.int64).max)
+    tmax = np.full(n_groups, np.iinfo(np.int64).min)
+    np.minimum.at(tmin, gid[valid], t[valid])
+    np.maximum.at(tmax, gid[valid], t[valid])
+    has = tmin <= tmax
+    tmin = np.where(has, (tmin // _DAY_NS) * _DAY_NS, 0)     # normalize() : minuit
+    tmax = np.where(has, (tmax // _DAY_NS) * _DAY_NS, 0)
+    step, length = int(step_days) * _DAY_NS, int(window_days) * _DAY_NS
+    n_win = np.where(has, (tmax - tmin) // step + 1, 0)
+    first = np.r_[0, np.cumsum(n_win)[:-1]]
 
-        win_len = pd.Timedelta(days=window_days)
-        step = pd.Timedelta(days=step_days)
-        cur = tmin
+    # fenêtres k du document : start_k <= t < start_k + length, 0 <= k < n_win
+    d = np.flatnonzero(valid)
+    g = gid[d]
+    off = t[d] - tmin[g]
+    k_hi = np.minimum(off // step, n_win[g] - 1)
+    k_lo = np.maximum((off - length) // step + 1, 0)
+    cnt = np.maximum(k_hi - k_lo + 1, 0)
+    rows_doc = np.repeat(d, cnt)
+    k = np.repeat(k_lo, cnt) + (np.arange(cnt.sum()) - np.repeat(np.cumsum(cnt) - cnt, cnt))
+    rows_win = np.repeat(first[g], cnt) + k
+    W = sparse.csr_matrix((np.ones(len(rows_doc)), (rows_win, rows_doc)), shape=(int(n_win.sum()), len(df)))
 
-        while cur <= tmax:
-            win_start = cur
-            win_end = cur + win_len
-            mask = (g["__ts__"] >= win_start) & (g["__ts__"] < win_end)
-            win = g.loc[mask]
-            n_docs = int(mask.sum())
+    wg = np.repeat(np.arange(n_groups), n_win)
+    wk = np.arange(len(wg)) - first[wg]
+    start = tmin[wg] + wk * step
+    meta = pd.DataFrame({
+        "actor_id": keys["actor_id"].to_numpy()[wg],
+        "domain_id": keys["domain_id"].to_numpy()[wg],
+        "win_start": pd.to_datetime(start),
+        "win_end": pd.to_datetime(start + length),
+    })
+    return W, meta
 
-            if n_docs > 0:
-                fc_mean    = float(win["fc"].mean())
-                fi_mean    = float(win["fi"].mean())
-                n_tel_mean = float(win["n_tel"].mean())
-                ambiv_rate = float(win["ambivalence_flag"].mean())
-            else:
-                fc_mean = fi_mean = n_tel_mean = ambiv_rate = np.nan
+def window_means(W, X: np.ndarray) -> np.ndarray:
+    """Moyennes par fenêtre des colonnes de X (docs × K) en ignorant les NaN ; NaN si aucune valeur."""
+    X = np.asarray(X, dtype=float)
+    flat = X.reshape(len(X), -1)
+    ok = ~np.isnan(flat)
+    s = np.asarray(W @ np.where(ok, flat, 0.0))
+    n = np.asarray(W @ ok.astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        m = np.where(n > 0, s / np.where(n > 0, n, 1.0), np.nan)
+    return m.reshape((W.shape[0],) + X.shape[1:])
 
-            records.append({
-                "actor_id": actor,
-                "domain_id": domain,
-                "win_start": win_start,
-                "win_end":   win_end,
-                "n_docs":    n_docs,
-                "fc_mean":   fc_mean,
-                "fi_mean":   fi_mean,
-                "n_tel_mean": n_tel_mean,
-                "ambiv_rate": ambiv_rate,
-            })
-            cur = cur + step
+def sliding_windows(df: pd.DataFrame, window_days: int = 30, step_days: int = 7,
+                    extra_cols: Sequence[str] = ()) -> pd.DataFrame:
+    """
+    Agrège par fenêtres glissantes (par actor_id, domain_id).
+    Colonnes attendues au minimum :
+      - actor_id, domain_id
+      - une colonne temporelle parmi: published_at/date/created_at/timestamp
+    Colonnes optionnelles :
+      - fc, fi, n_tel, ambivalence_flag ; extra_cols -> <col>_mean
+    Sort :
+      - fc_mean, fi_mean, n_tel_mean, ambivalence_rate (alias ambiv_rate),
+        Delta_n_tel (variation de n_tel_mean vs la fenêtre précédente du couple),
+        n_docs, win_start, win_end
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    # Colonnes optionnelles -> NaN si absentes
+    cols = ["fc", "fi", "n_tel", "ambivalence_flag", *extra_cols]
+    X = np.column_stack([
+        pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float) if c in df.columns else np.full(len(df), np.nan)
+        for c in cols
+    ])
+    W, win_df = window_membership(df, window_days, step_days)
+    if win_df.empty:
+        return pd.DataFrame()
 
-    win_df = pd.DataFrame.from_records(records)
-    if not win_df.empty:
-        win_df = win_df.sort_values(["actor_id","domain_id","win_start"]).reset_index(drop=True)
-    return win_df
+    means = window_means(W, X)
+    win_df["n_docs"] = np.asarray(W.sum(axis=1)).ravel().astype(int)
+    win_df["fc_mean"] = means[:, 0]
+    win_df["fi_mean"] = means[:, 1]
+    win_df["n_tel_mean"] = means[:, 2]
+    win_df["ambivalence_rate"] = means[:, 3]
+    win_df["ambiv_rate"] = means[:, 3]
+    for j, c in enumerate(extra_cols, start=4):
+        win_df[f"{c}_mean"] = means[:, j]
+    win_df["Delta_n_tel"] = win_df.groupby(["actor_id", "domain_id"], dropna=False)["n_tel_mean"].diff()
+    return win_df.sort_values(["actor_id", "domain_id", "win_start"]).reset_index(drop=True)
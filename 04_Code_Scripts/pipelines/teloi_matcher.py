@@ -1 +1,266 @@
-﻿# teloi_matcher: compute theta/N_tel from endogenous telos
+# 04_Code_Scripts/pipelines/teloi_matcher.py
+"""
+teloi_matcher : cos_theta = cosinus entre un document et le telos endogène de
+son acteur / domaine (teloi.json), via sentence-transformers sur CPU.
+
+- teloi.json : {actor_id: {domain_id: [mots] | "texte canonique"}} ; une liste
+  de mots est jointe par des espaces.
+- Encodage par lots regroupés par longueur (textes triés, taille de lot bornée
+  en nombre de textes et en caractères paddés), vecteurs L2-normalisés :
+  cosinus = produit scalaire.
+- Cache persistant des embeddings par (modèle, text_hash) : un texte déjà vu
+  n'est jamais ré-encodé (corpus relancé, teloi partagés entre acteurs).
+- L'encodeur ne lit que max_seq_length tokens : les textes sont coupés avant
+  tokenisation (max_seq_length × 16 caractères) pour ne pas tokeniser des
+  mégaoctets de Congressional Record.
+
+Sortie : colonne `cos_theta` ∈ [-1, 1] ; NaN si l'acteur / domaine n'a pas de
+telos (features.theta retombe alors sur l'alignement neutre).
+
+ENV (optionnels)
+----------------
+TELOI_MODEL          : modèle sentence-transformers (défaut paraphrase-multilingual-MiniLM-L12-v2)
+TELOI_ONNX_DIR       : export ONNX (utils.onnx_encoder) à utiliser à la place de PyTorch
+TELOI_BATCH_SIZE     : textes max par lot (défaut 64)
+TELOI_BATCH_CHARS    : caractères paddés max par lot (défaut 64 × 1024)
+EMBEDDING_CACHE_DIR  : racine du cache (défaut artifacts/cache/embeddings ; "0" = désactivé)
+EMBEDDING_STORE_DIR  : si défini, vecteurs des documents ajoutés au store memmap
+                       (features.embedding_store, clé doc_id) pour les analyses suivantes
+
+Usage
+-----
+python -m pipelines.teloi_matcher data/mock/docs.parquet data/mock/teloi.json artifacts/mock/theta_doc.parquet
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.hashing import text_hash
+
+DEFAULT_MODEL = os.environ.get("TELOI_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+_BATCH_SIZE = int(os.environ.get("TELOI_BATCH_SIZE", "64"))
+_BATCH_CHARS = int(os.environ.get("TELOI_BATCH_CHARS", str(64 * 1024)))
+_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", "artifacts/cache/embeddings")
+_CHARS_PER_TOKEN = 16
+
+
+def load_model(name: Optional[str] = None, device: str = "cpu"):
+    """
+    SentenceTransformer (CPU par défaut), ou export ONNX int8 si TELOI_ONNX_DIR est
+    défini (utils.onnx_encoder). Échec immédiat si le paquet / modèle manque.
+    """
+    onnx_dir = os.environ.get("TELOI_ONNX_DIR")
+    if onnx_dir:
+        from utils.onnx_encoder import OnnxEncoder
+        return OnnxEncoder(onnx_dir)
+    name = name or DEFAULT_MODEL
+    try:
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(name, device=device)
+    except Exception as e:
+        raise RuntimeError(
+            f"[teloi_matcher] sentence-transformers model '{name}' not available "
+            f"(pip install -r 06_Environnement/requirements.txt). Original error: {e}"
+        ) from e
+
+
+def model_id(model) -> str:
+    """Nom stable du modèle pour les clés de cache."""
+    for attr in ("model_id", "name_or_path"):
+        if getattr(model, attr, None):
+            return str(getattr(model, attr))
+    card = getattr(model, "model_card_data", None)
+    if getattr(card, "base_model", None):
+        return str(card.base_model)
+    try:
+        return str(model[0].auto_model.config._name_or_path)
+    except Exception:
+        return type(model).__name__
+
+
+def load_teloi(path: str | Path) -> Dict[Tuple[str, str], str]:
+    """(actor_id, domain_id) -> texte du telos."""
+    with open(path, "r", encoding="utf-8-sig") as f:
+        raw = json.load(f)
+    out: Dict[Tuple[str, str], str] = {}
+    for actor, domains in raw.items():
+        if not isinstance(domains, dict):
+            raise ValueError(f"[teloi_matcher] {path}: expected {{actor: {{domain: telos}}}}, got {type(domains).__name__} for {actor!r}")
+        for dom, telos in domains.items():
+            text = " ".join(map(str, telos)) if isinstance(telos, (list, tuple)) else str(telos)
+            if text.strip():
+                out[(str(actor), str(dom))] = text
+    return out
+
+
+# ---------- cache ----------
+class EmbeddingCache:
+    """
+    Cache text_hash -> vecteur (float32) pour un modèle. Parts .npz append-only
+    sous <root>/<modèle>/ ; tout est relu à l'ouverture.
+    """
+
+    def __init__(self, root: str | Path, model_name: str) -> None:
+        self.dir = Path(root) / re.sub(r"[^\w.\-]+", "_", model_name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._vec: Dict[str, np.ndarray] = {}
+        self._new: Dict[str, np.ndarray] = {}
+        for p in sorted(self.dir.glob("part-*.npz")):
+            with np.load(p, allow_pickle=False) as z:
+                for k, v in zip(z["keys"].tolist(), z["vectors"]):
+                    self._vec[k] = v
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._vec
+
+    def __len__(self) -> int:
+        return len(self._vec)
+
+    def __getitem__(self, key: str) -> np.ndarray:
+        return self._vec[key]
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        for k, v in zip(keys, np.asarray(vectors, dtype=np.float32)):
+            self._vec[k] = v
+            self._new[k] = v
+
+    def flush(self) -> None:
+        if not self._new:
+            return
+        keys = list(self._new)
+        path = self.dir / f"part-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{len(list(self.dir.glob('part-*.npz'))):05d}.npz"
+        tmp = path.with_name(path.stem + ".tmp.npz")
+        np.savez(tmp, keys=np.array(keys), vectors=np.stack([self._new[k] for k in keys]))
+        os.replace(tmp, path)
+        self._new.clear()
+
+
+def open_cache(model, root: Optional[str | Path] = None) -> Optional[EmbeddingCache]:
+    root = root or _CACHE_DIR
+    if not root or str(root).strip() == "0":
+        return None
+    return EmbeddingCache(root, model_id(model))
+
+
+# ---------- encodage ----------
+def length_batches(lengths: np.ndarray, batch_size: int = _BATCH_SIZE,
+                   max_chars: int = _BATCH_CHARS) -> List[np.ndarray]:
+    """
+    Lots d'indices de longueurs voisines (tri décroissant) ; un lot s'arrête à
+    batch_size textes ou quand (longueur max du lot × nb de textes) dépasse max_chars.
+    """
+    order = np.argsort(-np.asarray(lengths), kind="stable")
+    batches: List[np.ndarray] = []
+    start = 0
+    for k in range(1, len(order) + 1):
+        if k == len(order):
+            batches.append(order[start:k])
+            break
+        longest = lengths[order[start]]
+        if k - start >= batch_size or longest * (k - start + 1) > max_chars:
+            batches.append(order[start:k])
+            start = k
+    return batches
+
+
+def encode(texts: Sequence[str], model, cache: Optional[EmbeddingCache] = None,
+           batch_size: int = _BATCH_SIZE, max_chars: int = _BATCH_CHARS) -> np.ndarray:
+    """
+    Embeddings L2-normalisés (n × dim, float32) ; textes identiques encodés une
+    fois, textes déjà en cache jamais ré-encodés.
+    """
+    keys = [text_hash(t) for t in texts]
+    uniq: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k not in uniq and (cache is None or k not in cache):
+            uniq[k] = t or ""
+    fresh: Dict[str, np.ndarray] = {}
+    if uniq:
+        todo_keys = list(uniq)
+        limit = int(getattr(model, "max_seq_length", 0) or 512) * _CHARS_PER_TOKEN
+        todo = [uniq[k][:limit] for k in todo_keys]
+        lengths = np.fromiter((len(t) for t in todo), dtype=np.int64, count=len(todo))
+        for idx in length_batches(lengths, batch_size, max_chars):
+            vecs = model.encode([todo[i] for i in idx], batch_size=len(idx), convert_to_numpy=True,
+                                normalize_embeddings=True, show_progress_bar=False)
+            for i, v in zip(idx.tolist(), np.asarray(vecs, dtype=np.float32)):
+                fresh[todo_keys[i]] = v
+        if cache is not None:
+            cache.put_many(list(fresh), np.stack(list(fresh.values())))
+            cache.flush()
+    if not keys:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([fresh[k] if k in fresh else cache[k] for k in keys])
+
+
+def match_teloi(docs: pd.DataFrame,
+                teloi: Dict[Tuple[str, str], str] | str | Path,
+                model=None,
+                text_col: str = "text",
+                actor_col: str = "actor_id",
+                domain_col: str = "domain_id",
+                cache_dir: Optional[str | Path] = None,
+                batch_size: int = _BATCH_SIZE,
+                id_col: str = "doc_id",
+                embedding_store=None) -> pd.DataFrame:
+    """
+    docs + colonne cos_theta (document · telos de son (acteur, domaine)).
+    embedding_store (EmbeddingStore, ou env EMBEDDING_STORE_DIR) : reçoit les
+    vecteurs des documents sous docs[id_col].
+    """
+    for c in (text_col, actor_col, domain_col):
+        if c not in docs.columns:
+            raise ValueError(f"[teloi_matcher] column '{c}' is missing in docs")
+    if not isinstance(teloi, dict):
+        teloi = load_teloi(teloi)
+    model = model if model is not None else load_model()
+    cache = open_cache(model, cache_dir)
+
+    t0 = time.perf_counter()
+    texts = [t if isinstance(t, str) else "" for t in docs[text_col]]
+    pairs = list(zip(docs[actor_col].astype(str), docs[domain_col].astype(str)))
+    tel_keys = sorted({p for p in pairs if p in teloi})
+    doc_vecs = encode(texts, model, cache, batch_size)
+    tel_vecs = encode([teloi[p] for p in tel_keys], model, cache, batch_size)
+    tel_row = {p: i for i, p in enumerate(tel_keys)}
+
+    cos = np.full(len(docs), np.nan)
+    has = np.fromiter((p in tel_row for p in pairs), dtype=bool, count=len(pairs))
+    if has.any():
+        rows = np.array([tel_row[p] for p, h in zip(pairs, has) if h])
+        cos[has] = np.einsum("ij,ij->i", doc_vecs[has], tel_vecs[rows])
+    if embedding_store is None and id_col in docs.columns and len(doc_vecs):
+        from features.embedding_store import open_embedding_store
+        embedding_store = open_embedding_store(model_id(model), doc_vecs.shape[1])
+    if embedding_store is not None:
+        added = embedding_store.append(docs[id_col].tolist(), doc_vecs)
+        print(f"[INFO] embedding store {embedding_store.dir}: +{added} ({len(embedding_store)} docs)", flush=True)
+    out = docs.copy()
+    out["cos_theta"] = np.clip(cos, -1.0, 1.0)
+    dt = time.perf_counter() - t0
+    print(f"[THETA] docs={len(docs)} teloi={len(tel_keys)} missing_telos={int((~has).sum())} "
+          f"in {dt:.1f}s ({len(docs) / max(dt, 1e-9):.0f} docs/s)", flush=True)
+    return out
+
+
+def main(argv: List[str]) -> None:
+    if len(argv) != 3:
+        print("Usage: python -m pipelines.teloi_matcher <docs_parquet> <teloi_json> <out_parquet>", file=sys.stderr)
+        sys.exit(2)
+    docs = pd.read_parquet(argv[0])
+    out = match_teloi(docs, argv[1])
+    Path(argv[2]).parent.mkdir(parents=True, exist_ok=True)
+    out.to_parquet(argv[2], index=False)
+    print(f"OK: {argv[2]} ({len(out)} docs)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -6,12 +6,17 @@ run_baselines.py — robust & idempotent
 Lit artifacts/mock/features_win.parquet, fabrique une étiquette binaire
 "stance" (fc_mean >= fi_mean), calcule 3 AUC baselines et écrit
 artifacts/mock/scores_baselines.json.
+
+BASELINES_BERT=1 : ajoute AUC_bert (baselines.bert_stance_model, fine-tuné sur
+features_doc.parquet, probabilités moyennées par fenêtre ; cache par document).
 """
 
 from __future__ import annotations
 from pathlib import Path
 import json
+import os
 import sys
+import time
 import numpy as np
 import pandas as pd
 
@@ -69,6 +74,22 @@ def _safe_auc(y_true, y_score):
         return float("nan")
 
 
+def _bert_window_scores(win: pd.DataFrame) -> np.ndarray:
+    from baselines.bert_stance_model import score_docs, window_mean
+    doc_path = Path("artifacts/mock/features_doc.parquet")
+    if not doc_path.exists():
+        raise SystemExit("BASELINES_BERT=1 needs artifacts/mock/features_doc.parquet — run features first.")
+    docs = pd.read_parquet(doc_path)
+    missing = [c for c in ["text", "date", "actor_id", "domain_id", "fc_mean", "fi_mean"] if c not in docs.columns]
+    if missing:
+        raise SystemExit(f"Missing columns {missing} in features_doc.parquet (needed by AUC_bert).")
+    t0 = time.perf_counter()
+    p = score_docs(docs, (docs["fc_mean"] >= docs["fi_mean"]).astype(int).to_numpy())
+    print(f"[BERT] {len(docs)} docs scored in {time.perf_counter() - t0:.1f}s")
+    score = window_mean(win, docs, p)
+    return np.where(np.isnan(score), 0.5, score)
+
+
 def main():
     win_path = Path("artifacts/mock/features_win.parquet")
     if not win_path.exists():
@@ -114,6 +135,10 @@ def main():
         "AUC_party_line": _safe_auc(y, party_line_score),
     }
 
+    # 4) BERT stance (optionnel, coûteux au premier passage puis en cache)
+    if os.environ.get("BASELINES_BERT", "0") == "1":
+        out["AUC_bert"] = _safe_auc(y, _bert_window_scores(df))
+
     out_dir = Path("artifacts/mock")
     out_dir.mkdir(parents=True, exist_ok=True)
     out_path = out_dir / "scores_baselines.json"
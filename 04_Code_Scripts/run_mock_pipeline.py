@@ -5,6 +5,7 @@ from pathlib import Path
 import pandas as pd
 
 from features.fc_fi_v3 import apply_fc_fi_v3, _precheck_or_fail
+from utils.tokens import ensure_len_tokens
 
 def main():
     _precheck_or_fail()
@@ -20,21 +21,45 @@ def main():
     # If you have an alignment feature already computed elsewhere, put its column name here
     alignment_col = "alignment" if "alignment" in df.columns else None
 
-    out = apply_fc_fi_v3(
-        df,
+    lexicon_path = os.environ.get("CONATIVE_LEXICON_PATH") or "01_Protocoles/lexicon_conative_v1.csv"
+    out_path = Path("artifacts/mock/features_doc.parquet")
+    # FCFI_EVIDENCE=1 : passages matchés (features.conative_evidence) à côté de features_doc
+    evidence_path = (str(out_path.with_suffix(".evidence"))
+                     if os.environ.get("FCFI_EVIDENCE", "0") not in {"", "0"} else None)
+    compute = lambda d: apply_fc_fi_v3(
+        d,
         text_col=text_col,
         lang_col=lang_col,
         alignment_col=alignment_col,
-        lexicon_path=os.environ.get("CONATIVE_LEXICON_PATH") or "01_Protocoles/lexicon_conative_v1.csv",
+        lexicon_path=lexicon_path,
+        evidence_path=evidence_path,
     )
+    hits_path = os.environ.get("FCFI_HITS_PATH")
+    from features.conative_hits import clear_parts
+    for p in (evidence_path, hits_path):
+        if p:
+            clear_parts(p)  # run complet : les parts d'un run précédent ne se mélangent pas à celui-ci
+    store_dir = os.environ.get("FEATURE_STORE_DIR")
+    if store_dir and (evidence_path or hits_path):
+        # preuves / hits couvrent tout le corpus : le store ne recalculerait que les nouveaux documents
+        print("[INFO] FCFI_EVIDENCE / FCFI_HITS_PATH set: feature store bypassed for this run", flush=True)
+        store_dir = None
+    if store_dir:
+        # store par contenu : seuls les documents nouveaux / modifiés sont recalculés
+        from features.fc_fi_v3 import feature_config
+        from features.feature_store import FeatureStore, compute_incremental, content_keys
+        key_cols = [c for c in (text_col, lang_col, alignment_col) if c]
+        langs = ("FR", "EN") if lang_col else ("FR",)
+        store = FeatureStore(store_dir, feature_config(lexicon_path, langs=langs, key_cols=key_cols))
+        out = compute_incremental(df, content_keys(df, key_cols), compute, store)
+    else:
+        out = compute(df)
 
     # For compatibility with downstream windows/baselines, keep a simple n_tel placeholder
     # (you can later plug the full N_tel formula if needed)
-    if "len_tokens" not in out.columns:
-        out["len_tokens"] = out[text_col].fillna("").str.split().map(len)
+    out = ensure_len_tokens(out, text_col)
     out["n_tel"] = out["beta"]  # simple stand-in so windows can aggregate
 
-    out_path = Path("artifacts/mock/features_doc.parquet")
     out_path.parent.mkdir(parents=True, exist_ok=True)
     out.to_parquet(out_path, index=False)
     print(f"OK: {out_path} (mode=v2+v3)")
@@ -1,18 +1,159 @@
 # 04_Code_Scripts/run_real_features.py
-import sys
+import argparse
+import json
+import os
 import pandas as pd
 from features.fc_fi_v3 import apply_fc_fi_v3
+from utils.tokens import ensure_len_tokens
 
-def main(inp: str, outp: str):
-    df = pd.read_parquet(inp)
+
+def v3_features(df: pd.DataFrame, executor=None) -> pd.DataFrame:
     # IMPORTANT : apply_fc_fi_v3 ne supporte pas actor_col/domain_col/etc. dans ta version.
     # Utilise simplement les noms par défaut attendus par la fonction : 'text', 'language', 'date'.
-    out = apply_fc_fi_v3(df)  # pas de kwargs non prévus
+    if executor is not None:
+        return executor.run(df, "v3")  # shards longest-first sur le pool de workers
+    return apply_fc_fi_v3(df)  # pas de kwargs non prévus
+
+
+def v2_features(df: pd.DataFrame, lexicon, executor=None, idf_store=None, update_idf: bool = True) -> pd.DataFrame:
+    # IDF du DocFreqStore (mis à jour avec le lot, ou figé) ; sans store : IDF recalculé sur le lot
+    kw = {"idf_store": idf_store, "update_idf": update_idf} if idf_store is not None else {}
+    if executor is not None:
+        return executor.run(df, "v2", lexicon=lexicon, **kw)  # lemmes sur les workers, IDF côté parent
+    from features.fc_fi import apply_fc_fi_v2
+    return apply_fc_fi_v2(df, lexicon, **kw)
+
+
+def _snapshot_idf(store) -> None:
+    # après chaque lot : une reprise (run_streaming) ne saute que des lots déjà comptés
+    if store.dirty:
+        version = store.snapshot()
+        n = sum(st["n_docs"] for st in store.stats().values())
+        print(f"[IDF] {store.root}: {version} ({n} docs)", flush=True)
+
+
+def _side_outputs():
+    # sorties par document (parts par lot / shard) lues par apply_fc_fi_v3 dans l'env
+    return [p for p in (os.environ.get("FCFI_HITS_PATH"), os.environ.get("FCFI_EVIDENCE_PATH")) if p]
+
+
+def make_batch_fn(executor=None, feature_store: str = "", v2_lexicon=None, idf_store=None, update_idf: bool = True):
+    if v2_lexicon is not None:
+        # v2 : pas de store de features (clé de config v3) ; IDF incrémental via idf_store
+        def compute_v2(df):
+            out = v2_features(df, v2_lexicon, executor, idf_store, update_idf)
+            if idf_store is not None and update_idf:
+                _snapshot_idf(idf_store)
+            return out
+        if feature_store:
+            print("[INFO] --stage v2: feature store not used (v3 features only)", flush=True)
+        return lambda df: ensure_len_tokens(compute_v2(df))
+    compute = lambda df: v3_features(df, executor)
+    if feature_store and _side_outputs():
+        # hits / preuves doivent couvrir tout le corpus, pas les seuls documents recalculés
+        print("[INFO] FCFI_HITS_PATH / FCFI_EVIDENCE_PATH set: feature store bypassed for this run", flush=True)
+        feature_store = ""
+    if feature_store:
+        # seuls les documents absents du store (contenu + config v3) sont calculés
+        from features.fc_fi_v3 import feature_config
+        from features.feature_store import FeatureStore, compute_incremental, content_keys
+        # appel historique sans lang_col / alignment_col : FR, a = 0.5 -> clé = texte seul
+        store = FeatureStore(feature_store, feature_config(langs=("FR",), lang_col=None, alignment_col=None))
+        inner = compute
+        compute = lambda df: compute_incremental(df, content_keys(df, ["text"]), inner, store)
+    # réutilise `tokens` de la collecte (même tokenisation)
+    return lambda df: ensure_len_tokens(compute(df))
+
+
+def _lexicon_path() -> str:
+    return os.environ.get("CONATIVE_LEXICON_PATH") or "01_Protocoles/lexicon_conative_v1.csv"
+
+
+def _v2_setup(v2_lexicon: str, idf_store: str):
+    if not v2_lexicon:
+        raise ValueError("[run_real_features] --stage v2 needs --v2-lexicon "
+                         "(JSON {telos: {\"pro\": [...], \"anti\": [...]}}, env FCFI_V2_LEXICON)")
+    with open(v2_lexicon, "r", encoding="utf-8") as f:
+        lexicon = json.load(f)
+    store = None
+    if idf_store:
+        from features.idf_store import DocFreqStore
+        store = DocFreqStore.load(idf_store)  # dernière version (ou vide)
+        print(f"[IDF] {idf_store}: {store.version or 'empty'} {store.stats()}", flush=True)
+    return lexicon, store
+
+
+def _v2_tag(v2_lexicon: str, idf_store: str, update_idf: bool) -> str:
+    from utils.hashing import file_hash
+    idf = f"{'update' if update_idf else 'frozen'}:{os.path.abspath(idf_store)}" if idf_store else "batch"
+    return f"v2:{file_hash(v2_lexicon)}:{os.environ.get('SPACY_PROFILE', '')}:{idf}"
+
+
+def main(inp: str, outp: str, batch_rows: int = 0, resume: bool = True, workers: int = 1,
+         feature_store: str = "", stage: str = "v3", v2_lexicon: str = "", idf_store: str = "",
+         freeze_idf: bool = False):
+    if stage == "v2":
+        lexicon, store = _v2_setup(v2_lexicon, idf_store)
+        update = not freeze_idf
+        tag = _v2_tag(v2_lexicon, idf_store, update)
+        if workers > 1:
+            from features.sharded import ShardedExecutor
+            with ShardedExecutor(workers, langs={"FR", "EN"}, profile=os.environ.get("SPACY_PROFILE") or None) as ex:
+                return _main(inp, outp, batch_rows, resume, make_batch_fn(ex, feature_store, lexicon, store, update), tag)
+        return _main(inp, outp, batch_rows, resume, make_batch_fn(None, feature_store, lexicon, store, update), tag)
+    if workers > 1:
+        from features.sharded import ShardedExecutor
+        # modèles + lexique chargés dans l'initializer des workers ; appel v3 historique
+        # sans lang_col -> FR pour toutes les lignes
+        with ShardedExecutor(workers, langs={"FR"}, profile=os.environ.get("SPACY_PROFILE") or None,
+                             lexicon_path=_lexicon_path()) as ex:
+            return _main(inp, outp, batch_rows, resume, make_batch_fn(ex, feature_store))
+    return _main(inp, outp, batch_rows, resume, make_batch_fn(None, feature_store))
+
+
+def _main(inp: str, outp: str, batch_rows: int, resume: bool, fn, tag: str = ""):
+    if not (batch_rows > 0 and resume):
+        # run complet : repart sans les parts d'un run précédent (une reprise garde celles des lots faits)
+        from features.conative_hits import clear_parts
+        for p in _side_outputs():
+            clear_parts(p)
+    if batch_rows > 0:
+        # flux par lots : mémoire bornée par le lot, reprise sur les lots déjà écrits
+        from utils.parquet_stream import run_streaming
+        if not tag:
+            from features.conative import load_conative_lexicon
+            tag = f"v3:{load_conative_lexicon(_lexicon_path()).fingerprint}:{os.environ.get('SPACY_PROFILE', '')}"
+        summary = run_streaming(inp, outp, fn, batch_rows=batch_rows, tag=tag, resume=resume)
+        print(f"OK: {outp} ({summary['rows']} docs, {summary['batches']} batches, {summary['skipped']} resumed)")
+        return
+    df = pd.read_parquet(inp)
+    out = fn(df)
     out.to_parquet(outp, index=False)
     print(f"OK: {outp} ({len(out)} docs)")
 
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python 04_Code_Scripts/run_real_features.py <in_parquet> <out_parquet>", file=sys.stderr)
-        sys.exit(2)
-    main(sys.argv[1], sys.argv[2])
+    ap = argparse.ArgumentParser(description="Features doc-level (v3) sur corpus réel")
+    ap.add_argument("inp", help="corpus Parquet")
+    ap.add_argument("outp", help="features Parquet")
+    ap.add_argument("--batch-rows", type=int, default=int(os.environ.get("FEATURES_BATCH_ROWS", "0")),
+                    help="lignes par lot (flux + reprise) ; 0 = tout en mémoire (env FEATURES_BATCH_ROWS)")
+    ap.add_argument("--no-resume", action="store_true", help="ignore les lots déjà écrits")
+    ap.add_argument("--workers", type=int, default=int(os.environ.get("FEATURES_WORKERS", "1")),
+                    help="processus workers (features.sharded) ; 1 = séquentiel (env FEATURES_WORKERS)")
+    ap.add_argument("--feature-store", default=os.environ.get("FEATURE_STORE_DIR", ""),
+                    help="store de features par contenu : seuls les nouveaux documents sont calculés "
+                         "(env FEATURE_STORE_DIR)")
+    ap.add_argument("--stage", default=os.environ.get("FEATURES_STAGE", "v3"), choices=["v2", "v3"],
+                    help="v3 (conatif, défaut) ou v2 (lemmes spaCy + TF-IDF par domaine) (env FEATURES_STAGE)")
+    ap.add_argument("--v2-lexicon", default=os.environ.get("FCFI_V2_LEXICON", ""),
+                    help="v2 : lexique JSON {telos: {pro: [...], anti: [...]}} (env FCFI_V2_LEXICON)")
+    ap.add_argument("--idf-store", default=os.environ.get("IDF_STORE_DIR", ""),
+                    help="v2 : fréquences documentaires par domaine (features.idf_store) mises à jour "
+                         "avec chaque lot, nouvelle version après chaque lot (env IDF_STORE_DIR)")
+    ap.add_argument("--freeze-idf", action="store_true",
+                    help="v2 : score contre la dernière version du store sans l'ajouter")
+    args = ap.parse_args()
+    main(args.inp, args.outp, args.batch_rows, resume=not args.no_resume, workers=args.workers,
+         feature_store=args.feature_store, stage=args.stage, v2_lexicon=args.v2_lexicon,
+         idf_store=args.idf_store, freeze_idf=args.freeze_idf)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+run_sensitivity.py — robustesse à λ et à la source d'alignement, en une passe.
+
+Lit artifacts/mock/features_doc.parquet (push / inhibit de fc_fi_v3 ; à défaut la
+matrice de hits de FCFI_HITS_PATH), balaye la grille λ × alignement par
+broadcasting (features.sensitivity), agrège les fenêtres et refait H1 / H3 pour
+chaque point sans relancer le pipeline.
+
+Écrit artifacts/mock/sensitivity.parquet (une ligne par (align_source, lambda))
+et artifacts/mock/sensitivity_doc.npz (fc / fi / beta : sources × docs × λ).
+
+ENV (optionnels)
+----------------
+SENS_LAMBDAS     : grille λ (défaut "0,0.25,0.5,0.75,1")
+SENS_ALIGNMENTS  : sources d'alignement : "neutral", constantes, colonnes (défaut neutral[,alignment])
+SENS_TEL_SCORE   : n_tel | beta | fc-fi (défaut n_tel, comme run_hypotheses)
+SENS_N_BOOT      : tirages bootstrap de l'IC95 H1 (défaut 400 ; 0 = sans IC)
+FCFI_HITS_PATH   : matrice de hits (features.conative_hits) si push / inhibit manquent
+"""
+
+from __future__ import annotations
+from pathlib import Path
+import os
+import sys
+import time
+import pandas as pd
+
+from features.sensitivity import run_sweep, save_sweep
+
+
+def _push_inhibit_from_hits(df: pd.DataFrame, path: str) -> pd.DataFrame:
+    from features import conative_hits
+    hm = conative_hits.load(path)
+    # parts écrites par lot / shard : lignes réalignées sur features_doc (doc_id, sinon empreinte du texte)
+    try:
+        if "doc_id" in hm.docs.columns and "doc_id" in df.columns:
+            hm = conative_hits.select(hm, df["doc_id"].astype(str), by="doc_id")
+        elif "text" in df.columns:
+            from utils.hashing import text_hash
+            hm = conative_hits.select(hm, [text_hash(str(t) if pd.notna(t) else "") for t in df["text"]], by="key")
+        elif hm.H.shape[0] != len(df):
+            raise SystemExit(f"Hit matrix {path} has {hm.H.shape[0]} docs, features_doc has {len(df)}.")
+    except KeyError as e:
+        raise SystemExit(f"Hit matrix {path} does not cover features_doc: {e}") from None
+    push, inh = conative_hits.push_inhibit(hm)
+    return df.assign(push=push, inhibit=inh)
+
+
+def main() -> None:
+    in_path = Path("artifacts/mock/features_doc.parquet")
+    if not in_path.exists():
+        raise SystemExit("Need artifacts/mock/features_doc.parquet — run features first.")
+    df = pd.read_parquet(in_path)
+    if not {"push", "inhibit"} <= set(df.columns):
+        hits = os.environ.get("FCFI_HITS_PATH")
+        if not hits:
+            raise SystemExit("features_doc.parquet has no push/inhibit columns: rerun .\\tasks.ps1 features:doc:v2 "
+                             "(fc_fi_v3) or set FCFI_HITS_PATH.")
+        df = _push_inhibit_from_hits(df, hits)
+
+    lambdas = [float(x) for x in os.environ.get("SENS_LAMBDAS", "0,0.25,0.5,0.75,1").split(",") if x.strip()]
+    aligns = os.environ.get("SENS_ALIGNMENTS")
+    aligns = [a for a in aligns.split(",") if a.strip()] if aligns else None
+
+    t0 = time.perf_counter()
+    res, sw = run_sweep(df, lambdas=lambdas, alignments=aligns,
+                        tel_score=os.environ.get("SENS_TEL_SCORE", "n_tel"),
+                        n_boot=int(os.environ.get("SENS_N_BOOT", "400")), return_sweep=True)
+    dt = time.perf_counter() - t0
+    print(f"[BENCH] sensitivity docs={len(df)} grid={len(sw.sources)}x{len(sw.lambdas)} "
+          f"windows={int(res['n_windows'].iloc[0])} in {dt:.2f}s", flush=True)
+
+    out_dir = Path("artifacts/mock")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    res.to_parquet(out_dir / "sensitivity.parquet", index=False)
+    save_sweep(sw, out_dir / "sensitivity_doc.npz", df["doc_id"] if "doc_id" in df.columns else None)
+    with pd.option_context("display.width", 160, "display.max_columns", 20):
+        print(res.round(4).to_string(index=False))
+    print(f"OK: {(out_dir / 'sensitivity.parquet').as_posix()}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except SystemExit as e:
+        print(str(e), file=sys.stderr)
+        sys.exit(1)
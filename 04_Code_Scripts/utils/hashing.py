@@ -0,0 +1,19 @@
+# hashing.py — empreintes de contenu (clés de cache / stores)
+from __future__ import annotations
+import hashlib
+from typing import Iterable, List
+
+def text_hash(text: str) -> str:
+    """Empreinte stable d'un texte (blake2b 128 bits, hex). '' pour None."""
+    return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
+
+def text_hashes(texts: Iterable[str]) -> List[str]:
+    return [text_hash(t) for t in texts]
+
+def file_hash(path, chunk: int = 1 << 20) -> str:
+    """Empreinte du contenu d'un fichier (même algorithme que text_hash)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk), b""):
+            h.update(block)
+    return h.hexdigest()
@@ -0,0 +1,343 @@
+# 04_Code_Scripts/utils/onnx_encoder.py
+"""
+Encodeurs transformers sur CPU via ONNX Runtime (export + quantification int8).
+
+L'inférence PyTorch eager sur CPU (torch +cpu, requirements.txt) est l'étape
+la plus lente de theta (sentence-transformers) et du baseline BERT. Chemin :
+
+  1. export_onnx(model, out_dir)  : graphe ONNX (axes batch / séquence dynamiques)
+     + tokenizer + meta.json (tâche, pooling, normalisation, max_seq_length) ;
+  2. quantification dynamique int8 des poids (onnxruntime.quantization) ->
+     model.int8.onnx à côté de model.onnx ;
+  3. OnnxEncoder(out_dir) : session CPU (threads intra-op contrôlés), même
+     interface encode() que SentenceTransformer -> utilisable tel quel par
+     pipelines.teloi_matcher ; logits() pour un classifieur ;
+  4. drift_report / check_drift : écart des sorties int8 vs PyTorch (cosinus
+     minimal, écart absolu max) avant d'adopter le modèle quantifié ; compare()
+     prend comme référence SentenceTransformer.encode (feature-extraction) ou les
+     logits de AutoModelForSequenceClassification (classifieur, p. ex. le
+     baseline BERT), avec en plus l'accord des classes prédites.
+
+Dépendances optionnelles : onnx, onnxruntime (épinglées dans
+06_Environnement/requirements-onnx.txt) ; l'export utilise torch + transformers
+(+ sentence-transformers pour un modèle ST).
+
+ENV (optionnels)
+----------------
+ONNX_THREADS : threads intra-op de la session (défaut : nb de cœurs)
+
+Usage
+-----
+python -m utils.onnx_encoder export sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 artifacts/onnx/minilm
+python -m utils.onnx_encoder check  sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2 artifacts/onnx/minilm texts.txt
+python -m utils.onnx_encoder check  artifacts/cache/bert_stance/models/<fp>/fold0 artifacts/cache/bert_stance/models/<fp>/fold0/onnx texts.txt
+"""
+from __future__ import annotations
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+TASKS = ("feature-extraction", "sequence-classification")
+
+
+def _require(mod: str):
+    import importlib
+    try:
+        return importlib.import_module(mod)
+    except ImportError as e:
+        raise RuntimeError(f"[onnx_encoder] '{mod}' is required for this step (pip install {mod.split('.')[0]}). "
+                           f"Original error: {e}") from e
+
+
+# ---------- pooling (numpy, partagé avec la référence PyTorch) ----------
+def pool(hidden: np.ndarray, mask: np.ndarray, mode: str = "mean") -> np.ndarray:
+    """(batch × seq × dim, batch × seq) -> batch × dim ; mode 'mean' (tokens non paddés) ou 'cls'."""
+    if mode == "cls":
+        return hidden[:, 0].astype(np.float32)
+    if mode != "mean":
+        raise ValueError(f"[onnx_encoder] unknown pooling mode {mode!r}")
+    m = mask[..., None].astype(np.float32)
+    return (hidden * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+
+
+def l2_normalize(x: np.ndarray) -> np.ndarray:
+    n = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(n == 0, 1.0, n)
+
+
+# ---------- export ----------
+def _sentence_transformer_parts(model):
+    """(auto_model, tokenizer, pooling, normalize, max_seq_length) d'un SentenceTransformer."""
+    pooling, normalize = "mean", False
+    for mod in model:
+        name = type(mod).__name__
+        if name == "Pooling":
+            pooling = "cls" if getattr(mod, "pooling_mode_cls_token", False) else "mean"
+        elif name == "Normalize":
+            normalize = True
+    return model[0].auto_model, model.tokenizer, pooling, normalize, int(model.max_seq_length)
+
+
+def export_onnx(model_name: str, out_dir: str | Path, task: str = "feature-extraction",
+                quantize: bool = True, opset: int = 17, max_seq_length: Optional[int] = None) -> Path:
+    """
+    Exporte `model_name` (SentenceTransformer ou modèle HF) vers out_dir/model.onnx
+    (+ model.int8.onnx si quantize). Retourne out_dir.
+    """
+    if task not in TASKS:
+        raise ValueError(f"[onnx_encoder] task must be one of {TASKS}, got {task!r}")
+    torch = _require("torch")
+    transformers = _require("transformers")
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    pooling, normalize = "mean", False
+    if task == "feature-extraction":
+        try:
+            from sentence_transformers import SentenceTransformer
+            st = SentenceTransformer(model_name, device="cpu")
+            hf, tok, pooling, normalize, msl = _sentence_transformer_parts(st)
+        except ImportError:
+            hf = transformers.AutoModel.from_pretrained(model_name)
+            tok = transformers.AutoTokenizer.from_pretrained(model_name)
+            msl = int(getattr(tok, "model_max_length", 512) or 512)
+    else:
+        hf = transformers.AutoModelForSequenceClassification.from_pretrained(model_name)
+        tok = transformers.AutoTokenizer.from_pretrained(model_name)
+        msl = int(getattr(tok, "model_max_length", 512) or 512)
+    msl = min(msl, int(max_seq_length or msl), int(getattr(hf.config, "max_position_embeddings", msl)))
+    hf.eval()
+
+    sample = tok(["export sample", "a second, longer export sample"], padding=True, return_tensors="pt")
+    inputs = [k for k in ("input_ids", "attention_mask", "token_type_ids") if k in sample]
+    output = "last_hidden_state" if task == "feature-extraction" else "logits"
+    dyn = {k: {0: "batch", 1: "seq"} for k in inputs}
+    dyn[output] = {0: "batch", 1: "seq"} if task == "feature-extraction" else {0: "batch"}
+
+    class _Wrapped(torch.nn.Module):
+        def __init__(self, m):
+            super().__init__()
+            self.m = m
+
+        def forward(self, *args):
+            res = self.m(**dict(zip(inputs, args)))
+            return res.last_hidden_state if task == "feature-extraction" else res.logits
+
+    fp32 = out / "model.onnx"
+    with torch.no_grad():
+        torch.onnx.export(_Wrapped(hf), tuple(sample[k] for k in inputs), str(fp32), input_names=inputs,
+                          output_names=[output], dynamic_axes=dyn, opset_version=opset, do_constant_folding=True)
+    tok.save_pretrained(out)
+    files = {"fp32": fp32.name}
+    if quantize:
+        qz = _require("onnxruntime.quantization")
+        int8 = out / "model.int8.onnx"
+        qz.quantize_dynamic(str(fp32), str(int8), weight_type=qz.QuantType.QInt8)
+        files["int8"] = int8.name
+    labels = getattr(hf.config, "id2label", None) if task == "sequence-classification" else None
+    meta = {"source": model_name, "task": task, "pooling": pooling, "normalize": normalize,
+            "max_seq_length": msl, "opset": opset, "inputs": inputs, "output": output,
+            "files": files, "labels": labels}
+    (out / "meta.json").write_text(json.dumps(meta, indent=1, default=str), encoding="utf-8")
+    print(f"OK: {out} ({', '.join(files.values())}, max_seq_length={msl})")
+    return out
+
+
+# ---------- inférence ----------
+class OnnxEncoder:
+    """
+    Session ONNX Runtime CPU sur un export de export_onnx. Interface encode()
+    compatible SentenceTransformer (batch_size, normalize_embeddings, ...).
+    """
+
+    def __init__(self, path: str | Path, int8: bool = True, threads: Optional[int] = None) -> None:
+        ort = _require("onnxruntime")
+        transformers = _require("transformers")
+        self.dir = Path(path)
+        meta_path = self.dir / "meta.json"
+        if not meta_path.exists():
+            raise FileNotFoundError(f"[onnx_encoder] {meta_path} not found (run export_onnx first)")
+        self.meta: Dict[str, object] = json.loads(meta_path.read_text(encoding="utf-8"))
+        files = self.meta["files"]
+        kind = "int8" if int8 and "int8" in files else "fp32"
+        self.variant = kind
+        self.max_seq_length = int(self.meta["max_seq_length"])
+        self.model_id = f"{self.meta['source']}@onnx-{kind}"
+
+        so = ort.SessionOptions()
+        n = threads or int(os.environ.get("ONNX_THREADS", "0")) or (os.cpu_count() or 1)
+        so.intra_op_num_threads = n
+        so.inter_op_num_threads = 1
+        so.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(str(self.dir / files[kind]), sess_options=so,
+                                            providers=["CPUExecutionProvider"])
+        self.threads = n
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(self.dir)
+        self._inputs = [i.name for i in self.session.get_inputs()]
+
+    def _run(self, texts: Sequence[str]):
+        enc = self.tokenizer(list(texts), padding=True, truncation=True, max_length=self.max_seq_length,
+                             return_tensors="np")
+        return self.run_ids(enc["input_ids"], enc["attention_mask"], enc.get("token_type_ids")), enc["attention_mask"]
+
+    def run_ids(self, input_ids: np.ndarray, attention_mask: np.ndarray,
+                token_type_ids: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sortie brute du graphe pour des ids déjà tokenisés (batch × seq, paddés)."""
+        arrays = {"input_ids": input_ids, "attention_mask": attention_mask,
+                  "token_type_ids": np.zeros_like(input_ids) if token_type_ids is None else token_type_ids}
+        feed = {k: np.asarray(arrays[k], dtype=np.int64) for k in self._inputs}
+        return self.session.run(None, feed)[0]
+
+    def encode(self, texts: Sequence[str], batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, show_progress_bar: bool = False) -> np.ndarray:
+        if self.meta["task"] != "feature-extraction":
+            raise RuntimeError(f"[onnx_encoder] {self.dir} is a {self.meta['task']} export; use logits()")
+        parts: List[np.ndarray] = []
+        for a in range(0, len(texts), batch_size):
+            hidden, mask = self._run(texts[a:a + batch_size])
+            parts.append(pool(hidden, mask, str(self.meta["pooling"])))
+        out = np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+        if normalize_embeddings or self.meta.get("normalize"):
+            out = l2_normalize(out)
+        return out.astype(np.float32)
+
+    def logits(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        if self.meta["task"] != "sequence-classification":
+            raise RuntimeError(f"[onnx_encoder] {self.dir} is a {self.meta['task']} export; use encode()")
+        parts = [self._run(texts[a:a + batch_size])[0] for a in range(0, len(texts), batch_size)]
+        return np.vstack(parts).astype(np.float32) if parts else np.zeros((0, 0), dtype=np.float32)
+
+
+# ---------- dérive / benchmark ----------
+def drift_report(reference: np.ndarray, candidate: np.ndarray, labels: bool = False) -> Dict[str, float]:
+    """
+    Écart entre sorties de référence (PyTorch) et candidates (ONNX), ligne à ligne ;
+    labels=True (logits d'un classifieur) : + label_agree, part d'argmax identiques.
+    """
+    r = np.asarray(reference, dtype=np.float64)
+    c = np.asarray(candidate, dtype=np.float64)
+    if r.shape != c.shape:
+        raise ValueError(f"[onnx_encoder] shape mismatch {r.shape} vs {c.shape}")
+    cos = (l2_normalize(r) * l2_normalize(c)).sum(axis=1)
+    rep = {"n": int(len(r)), "min_cos": float(cos.min()) if len(r) else 1.0,
+           "mean_cos": float(cos.mean()) if len(r) else 1.0,
+           "max_abs": float(np.abs(r - c).max()) if r.size else 0.0}
+    if labels:
+        rep["label_agree"] = float((r.argmax(axis=1) == c.argmax(axis=1)).mean()) if len(r) else 1.0
+    return rep
+
+
+def check_drift(reference: np.ndarray, candidate: np.ndarray, min_cos: float = 0.99) -> Dict[str, float]:
+    """drift_report, RuntimeError si un cosinus descend sous min_cos."""
+    rep = drift_report(reference, candidate)
+    if rep["min_cos"] < min_cos:
+        raise RuntimeError(f"[onnx_encoder] output drift too large: min cosine {rep['min_cos']:.4f} < {min_cos}")
+    return rep
+
+
+def _throughput(fn, texts: Sequence[str], repeat: int = 1) -> float:
+    fn(texts[: min(8, len(texts))])  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn(texts)
+    return repeat * len(texts) / max(time.perf_counter() - t0, 1e-9)
+
+
+class _TorchClassifier:
+    """Référence PyTorch d'un export sequence-classification : logits() comme OnnxEncoder."""
+
+    def __init__(self, model_name: str, max_seq_length: int) -> None:
+        self.torch = _require("torch")
+        transformers = _require("transformers")
+        self.tok = transformers.AutoTokenizer.from_pretrained(model_name)
+        self.model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        self.max_seq_length = max_seq_length
+
+    def logits(self, texts: Sequence[str], batch_size: int = 32) -> np.ndarray:
+        parts: List[np.ndarray] = []
+        with self.torch.no_grad():
+            for a in range(0, len(texts), batch_size):
+                enc = self.tok(list(texts[a:a + batch_size]), padding=True, truncation=True,
+                               max_length=self.max_seq_length, return_tensors="pt")
+                parts.append(self.model(**enc).logits.float().numpy())
+        return np.vstack(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+
+
+def compare(model_name: str, onnx_dir: str | Path, texts: Sequence[str], batch_size: int = 32,
+            threads: Optional[int] = None) -> Dict[str, object]:
+    """
+    Dérive + débit (docs/s) PyTorch vs ONNX fp32 vs ONNX int8 sur `texts`. La tâche
+    vient de meta.json : embeddings normalisés (feature-extraction) ou logits
+    (sequence-classification, + label_agree = part de classes prédites identiques).
+    """
+    torch = _require("torch")
+    if threads:
+        torch.set_num_threads(threads)
+    meta_path = Path(onnx_dir) / "meta.json"
+    if not meta_path.exists():
+        raise FileNotFoundError(f"[onnx_encoder] {meta_path} not found (run export_onnx first)")
+    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+    if meta["task"] == "sequence-classification":
+        ref_model = _TorchClassifier(model_name, int(meta["max_seq_length"]))
+        run = lambda m: (lambda xs: m.logits(list(xs), batch_size=batch_size))
+    else:
+        ref_model = _require("sentence_transformers").SentenceTransformer(model_name, device="cpu")
+        run = lambda m: (lambda xs: m.encode(list(xs), batch_size=batch_size, normalize_embeddings=True,
+                                             show_progress_bar=False, convert_to_numpy=True))
+    ref = run(ref_model)(texts)
+    report: Dict[str, object] = {"n_texts": len(texts), "task": meta["task"],
+                                 "torch_docs_s": _throughput(run(ref_model), texts)}
+    for kind, int8 in (("fp32", False), ("int8", True)):
+        onnx = OnnxEncoder(onnx_dir, int8=int8, threads=threads)
+        if onnx.variant != kind:
+            continue
+        report[f"{kind}_docs_s"] = _throughput(run(onnx), texts)
+        report[f"{kind}_drift"] = drift_report(ref, run(onnx)(texts),
+                                               labels=meta["task"] == "sequence-classification")
+    return report
+
+
+def main(argv: List[str]) -> None:
+    import argparse
+    ap = argparse.ArgumentParser(description="Export / contrôle ONNX int8 des encodeurs")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ex = sub.add_parser("export")
+    ex.add_argument("model")
+    ex.add_argument("out_dir")
+    ex.add_argument("--task", default="feature-extraction", choices=TASKS)
+    ex.add_argument("--no-quantize", action="store_true")
+    ex.add_argument("--max-seq-length", type=int, default=None)
+    ck = sub.add_parser("check")
+    ck.add_argument("model")
+    ck.add_argument("onnx_dir")
+    ck.add_argument("texts", help="fichier texte, un document par ligne")
+    ck.add_argument("--threads", type=int, default=None)
+    ck.add_argument("--min-cos", type=float, default=0.99)
+    ck.add_argument("--min-label-agree", type=float, default=0.99, help="classifieur : accord des classes prédites")
+    args = ap.parse_args(argv)
+    if args.cmd == "export":
+        export_onnx(args.model, args.out_dir, task=args.task, quantize=not args.no_quantize,
+                    max_seq_length=args.max_seq_length)
+        return
+    with open(args.texts, "r", encoding="utf-8") as f:
+        texts = [ln.strip() for ln in f if ln.strip()]
+    report = compare(args.model, args.onnx_dir, texts, threads=args.threads)
+    print(json.dumps(report, indent=1))
+    drift = report.get("int8_drift") or report.get("fp32_drift")
+    if drift and drift["min_cos"] < args.min_cos:
+        print(f"[ERROR] min cosine {drift['min_cos']:.4f} < {args.min_cos}: do not use this export", file=sys.stderr)
+        sys.exit(1)
+    if drift and drift.get("label_agree", 1.0) < args.min_label_agree:
+        print(f"[ERROR] predicted labels agree on {drift['label_agree']:.4f} < {args.min_label_agree} "
+              f"of texts: do not use this export", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+# parquet_stream.py — traitement d'un Parquet par lots (mémoire bornée, reprise)
+"""
+Runner de features en flux : le corpus n'est jamais chargé en entier.
+
+- lecture par lots de `batch_rows` lignes (ParquetFile.iter_batches) ;
+- `fn(df_lot) -> df_sortie` appliquée à chaque lot ;
+- chaque lot terminé est écrit dans `<out>.parts/part-NNNNN.parquet` (écriture
+  atomique), puis consigné dans `<out>.parts/manifest.json` ;
+- relancé après un arrêt, le runner saute les lots déjà consignés (même entrée,
+  même taille de lot, même `tag`) ; sinon il repart de zéro ;
+- à la fin, les parts sont concaténées dans `<out>` avec un ParquetWriter, une
+  part à la fois (schémas unifiés), puis supprimées.
+
+Pic mémoire ~ un lot en entrée + sa sortie, quelle que soit la taille du corpus.
+"""
+from __future__ import annotations
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import pandas as pd
+
+MANIFEST_FORMAT = 1
+
+
+def input_fingerprint(path: str | Path) -> Dict[str, int]:
+    """Identité de l'entrée (taille, mtime, lignes, row groups) : une reprise n'a lieu que si elle est inchangée."""
+    import pyarrow.parquet as pq
+    st = Path(path).stat()
+    meta = pq.ParquetFile(path).metadata
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+            "num_rows": meta.num_rows, "num_row_groups": meta.num_row_groups}
+
+
+def _write_json_atomic(path: Path, payload: Dict) -> None:
+    tmp = path.with_suffix(f".tmp{os.getpid()}")
+    tmp.write_text(json.dumps(payload, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _merge_parts(parts: List[Path], outp: Path) -> int:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.unify_schemas([pq.read_schema(p) for p in parts], promote_options="permissive")
+    schema = schema.remove_metadata()
+    tmp = outp.with_name(outp.name + f".tmp{os.getpid()}")
+    n = 0
+    with pq.ParquetWriter(tmp, schema) as writer:
+        for p in parts:
+            tbl = pq.read_table(p)
+            tbl = tbl.select(schema.names).cast(schema) if tbl.schema != schema else tbl
+            writer.write_table(tbl)
+            n += tbl.num_rows
+    os.replace(tmp, outp)
+    return n
+
+
+def run_streaming(inp: str | Path,
+                  outp: str | Path,
+                  fn: Callable[[pd.DataFrame], pd.DataFrame],
+                  batch_rows: int = 50_000,
+                  columns: Optional[Sequence[str]] = None,
+                  tag: str = "",
+                  resume: bool = True,
+                  keep_parts: bool = False) -> Dict[str, int]:
+    """
+    Applique `fn` lot par lot à `inp` et écrit le résultat dans `outp`.
+    `tag` : identifie la configuration (version de features, lexique...) ; un tag
+    différent invalide les lots déjà faits. Renvoie un résumé (lots, lignes).
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if batch_rows <= 0:
+        raise ValueError(f"[parquet_stream] batch_rows must be > 0, got {batch_rows}")
+    inp, outp = Path(inp), Path(outp)
+    if not inp.exists():
+        raise FileNotFoundError(f"[parquet_stream] input not found: {inp}")
+    parts_dir = outp.with_name(outp.name + ".parts")
+    manifest_path = parts_dir / "manifest.json"
+
+    state = {"format": MANIFEST_FORMAT, "input": str(inp), "fingerprint": input_fingerprint(inp),
+             "batch_rows": int(batch_rows), "tag": tag, "done": {}}
+    if resume and manifest_path.exists():
+        prev = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if all(prev.get(k) == state[k] for k in ("format", "fingerprint", "batch_rows", "tag")):
+            state["done"] = {k: v for k, v in prev.get("done", {}).items() if (parts_dir / v["file"]).exists()}
+        else:
+            print(f"[STREAM] {manifest_path} does not match this run (input/batch/tag changed): restarting", flush=True)
+    if not state["done"] and parts_dir.exists():
+        shutil.rmtree(parts_dir)
+    parts_dir.mkdir(parents=True, exist_ok=True)
+    if state["done"]:
+        print(f"[STREAM] resuming: {len(state['done'])} batch(es) already committed", flush=True)
+
+    pf = pq.ParquetFile(inp)
+    n_batches = skipped = 0
+    for i, rb in enumerate(pf.iter_batches(batch_size=batch_rows, columns=list(columns) if columns else None)):
+        n_batches += 1
+        if str(i) in state["done"]:
+            skipped += 1
+            continue
+        t0 = time.perf_counter()
+        out = fn(rb.to_pandas())
+        name = f"part-{i:05d}.parquet"
+        tmp = parts_dir / f"{name}.tmp{os.getpid()}"
+        pq.write_table(pa.Table.from_pandas(out, preserve_index=False), tmp)
+        os.replace(tmp, parts_dir / name)
+        state["done"][str(i)] = {"file": name, "rows_in": rb.num_rows, "rows_out": len(out)}
+        _write_json_atomic(manifest_path, state)  # lot consigné seulement une fois sa part écrite
+        print(f"[STREAM] batch {i} rows={rb.num_rows} -> {len(out)} in {time.perf_counter() - t0:.1f}s", flush=True)
+
+    if n_batches == 0:  # entrée vide : la sortie garde les colonnes produites par fn
+        empty = fn(pf.schema_arrow.empty_table().to_pandas())
+        pq.write_table(pa.Table.from_pandas(empty, preserve_index=False), parts_dir / "part-00000.parquet")
+        state["done"]["0"] = {"file": "part-00000.parquet", "rows_in": 0, "rows_out": len(empty)}
+
+    parts = [parts_dir / state["done"][k]["file"] for k in sorted(state["done"], key=int)]
+    rows = _merge_parts(parts, outp)
+    if not keep_parts:
+        shutil.rmtree(parts_dir)
+    return {"batches": n_batches, "skipped": skipped, "rows": rows}
@@ -0,0 +1,65 @@
+# tokens.py — tokenisation \w+ unique (collecteurs, features, pipelines)
+# Une seule définition de "token" pour les colonnes `tokens` (collecte) et `len_tokens` (features).
+from __future__ import annotations
+import re
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+TOKEN_RE = re.compile(r"\w+", flags=re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokens bruts (casse conservée)."""
+    return TOKEN_RE.findall(text or "")
+
+
+def token_spans(text: str) -> Tuple[np.ndarray, np.ndarray]:
+    """(starts, ends) des tokens en un seul passage ; len(starts) = nb tokens."""
+    spans = [m.span() for m in TOKEN_RE.finditer(text or "")]
+    if not spans:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    arr = np.asarray(spans, dtype=np.int64)
+    return arr[:, 0], arr[:, 1]
+
+
+def count_tokens(text: str) -> int:
+    """Nb de tokens \\w+ (sans liste intermédiaire)."""
+    if not text:
+        return 0
+    return sum(1 for _ in TOKEN_RE.finditer(text))
+
+
+def count_tokens_batch(texts: Union[pd.Series, "pa.Array", "pa.ChunkedArray", Iterable[str]]) -> np.ndarray:
+    """
+    Compte vectorisé sur une colonne pandas / Arrow (ou itérable de str).
+    Les textes identiques ne sont comptés qu'une fois (factorize) : pas de mémo par
+    appel, dont la clé (empreinte du texte) coûterait autant que le comptage.
+    """
+    if hasattr(texts, "to_pandas"):  # pyarrow Array / ChunkedArray
+        texts = texts.to_pandas()
+    s = pd.Series(texts, copy=False) if not isinstance(texts, pd.Series) else texts
+    s = s.fillna("").astype(str)
+    codes, uniques = pd.factorize(s, sort=False)
+    counts = np.fromiter((count_tokens(u) for u in uniques), dtype=np.int64, count=len(uniques))
+    return counts[codes] if len(codes) else np.zeros(0, dtype=np.int64)
+
+
+def ensure_len_tokens(df: pd.DataFrame, text_col: str = "text") -> pd.DataFrame:
+    """
+    Garantit `len_tokens` sans recompter inutilement :
+    colonne existante > colonne `tokens` de la collecte > comptage batch.
+    """
+    if "len_tokens" in df.columns:
+        return df
+    if "tokens" not in df.columns:
+        df["len_tokens"] = count_tokens_batch(df[text_col])
+        return df
+    n = pd.to_numeric(df["tokens"], errors="coerce")
+    missing = (n.isna() | n.le(0)).to_numpy()  # merge_corpus remplit les absents par 0
+    if missing.any():
+        n = n.copy()
+        n[missing] = count_tokens_batch(df.loc[missing, text_col])
+    df["len_tokens"] = n.fillna(0).astype(int)
+    return df
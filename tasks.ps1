@@ -34,11 +34,14 @@ switch ($Task) {
     Write-Host "  features:doc:v2                 -> artifacts/mock/features_doc.parquet (Fc/Fi v2+v3 spaCy)"
     Write-Host "  features:win                    -> artifacts/mock/features_win.parquet (+shocks lags 0/7/14)"
     Write-Host "  baselines                       -> artifacts/mock/scores_baselines.json"
+    Write-Host "  baselines:bert                  -> idem + AUC_bert (BERT stance fine-tuné, CPU, cache par document)"
     Write-Host "  hypotheses                      -> artifacts/mock/hypotheses.json"
+    Write-Host "  sensitivity                     -> artifacts/mock/sensitivity.parquet (grille λ × alignement, H1/H3)"
     Write-Host "  report                          -> artifacts/mock/report_poc.md"
     Write-Host "  all                             -> mock → features v1 → win → baselines → hypotheses → report"
     Write-Host "  all:v2                          -> mock → features v2 → win → baselines → hypotheses → report"
     Write-Host "  test                            -> pytest (short suite)"
+    Write-Host "  nlp:profiles                    -> copies spaCy allégées (lemma-accurate, lemma-fast) → artifacts/spacy_profiles"
     Write-Host ""
     Write-Host "  real:collect:govuk:homeoffice:T1 -> GOV.UK Home Office (2021-01-01..2022-12-31)"
     Write-Host "  real:collect:govuk:homeoffice:T2 -> GOV.UK Home Office (2023-01-01..2024-06-30)"
@@ -49,6 +52,7 @@ switch ($Task) {
     Write-Host "  real:collect:congress:reps:T1    -> US House Republicans (Congress.gov) T1"
     Write-Host "  real:collect:congress:reps:T2    -> US House Republicans (Congress.gov) T2"
     Write-Host "  real:corpus:merge                -> data/raw/*.csv → artifacts/real/corpus_final.parquet"
+    Write-Host "  real:corpus:clean                -> retire le boilerplate → artifacts/real/corpus_clean.parquet"
     Write-Host "  real:features:doc:v2             -> features v2+v3 sur corpus réel"
     Write-Host "  real:all                         -> enchaîne collecte → merge → features"
     break
@@ -86,11 +90,23 @@ switch ($Task) {
     break
   }
 
+  "baselines:bert" {
+    $env:BASELINES_BERT = "1"
+    try { Invoke-Step "04_Code_Scripts/run_baselines.py (AUC_bert)" { python 04_Code_Scripts/run_baselines.py } }
+    finally { Remove-Item Env:BASELINES_BERT -ErrorAction SilentlyContinue }
+    break
+  }
+
   "hypotheses" {
     Invoke-Step "04_Code_Scripts/run_hypotheses.py" { python 04_Code_Scripts/run_hypotheses.py }
     break
   }
 
+  "sensitivity" {
+    Invoke-Step "04_Code_Scripts/run_sensitivity.py" { python 04_Code_Scripts/run_sensitivity.py }
+    break
+  }
+
   "report" {
     if (Test-Path "04_Code_Scripts/report_poc.py") {
       Invoke-Step "04_Code_Scripts/report_poc.py" { python 04_Code_Scripts/report_poc.py }
@@ -129,6 +145,13 @@ switch ($Task) {
     break
   }
 
+  # Profils spaCy lemmes seuls, sérialisés une fois (chargement rapide ; SPACY_PROFILE pour choisir)
+  "nlp:profiles" {
+    Invoke-Step "features.nlp_profiles build lemma-accurate" { python -m features.nlp_profiles build lemma-accurate }
+    Invoke-Step "features.nlp_profiles build lemma-fast" { python -m features.nlp_profiles build lemma-fast }
+    break
+  }
+
   # =======================
   # REAL / COLLECTE
   # =======================
@@ -208,6 +231,18 @@ switch ($Task) {
     break
   }
 
+  # Suppression boilerplate (en-têtes courants, VerDate, cookies…) avant NLP
+  "real:corpus:clean" {
+    if (-not (Test-Path "artifacts/real/corpus_final.parquet")) {
+      Write-Host "Need artifacts/real/corpus_final.parquet — run: real:corpus:merge"
+      break
+    }
+    Invoke-Step "04_Code_Scripts/etl/boilerplate.py" {
+      python -m etl.boilerplate artifacts/real/corpus_final.parquet artifacts/real/corpus_clean.parquet
+    }
+    break
+  }
+
   # Features v2+v3 sur corpus réel
   "real:features:doc:v2" {
     if (-not (Test-Path "artifacts/real/corpus_final.parquet")) {
@@ -217,8 +252,10 @@ switch ($Task) {
     if (-not $env:CONATIVE_LEXICON_PATH) {
       Write-Warning 'CONATIVE_LEXICON_PATH non défini. Exemple : $env:CONATIVE_LEXICON_PATH = "07_Config\lexicons\lexicon_conative_v1.clean.csv"'
     }
+    $corpus = "artifacts/real/corpus_final.parquet"
+    if (Test-Path "artifacts/real/corpus_clean.parquet") { $corpus = "artifacts/real/corpus_clean.parquet" }
     Invoke-Step "04_Code_Scripts/run_real_features.py" {
-      python 04_Code_Scripts/run_real_features.py artifacts/real/corpus_final.parquet artifacts/real/features_doc.parquet
+      python 04_Code_Scripts/run_real_features.py $corpus artifacts/real/features_doc.parquet --batch-rows 20000
     }
     break
   }
@@ -234,6 +271,7 @@ switch ($Task) {
     .\tasks.ps1 real:collect:congress:reps:T1
     .\tasks.ps1 real:collect:congress:reps:T2
     .\tasks.ps1 real:corpus:merge
+    .\tasks.ps1 real:corpus:clean
     .\tasks.ps1 real:features:doc:v2
     break
   }
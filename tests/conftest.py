@@ -0,0 +1,21 @@
+import os, sys, pathlib
+import pytest
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+
+# caches disque sur CWD par défaut (artifacts/cache/...) : redirigés vers tmp_path
+# pour que la suite n'écrive rien dans l'arbre de travail
+_CACHES = (
+    ("CONATIVE_LEXICON_CACHE", "features.conative", "_LEXICON_CACHE_DIR", "lexicon"),
+    ("EMBEDDING_CACHE_DIR", "pipelines.teloi_matcher", "_CACHE_DIR", "embeddings"),
+    ("BERT_CACHE_DIR", "baselines.bert_stance_model", "CACHE_DIR", "bert_stance"),
+)
+
+
+@pytest.fixture(autouse=True)
+def _isolated_caches(tmp_path, monkeypatch):
+    root = tmp_path / "_cache"
+    for env, mod_name, attr, sub in _CACHES:
+        monkeypatch.setenv(env, str(root / sub))
+        mod = sys.modules.get(mod_name)  # déjà importé : la valeur d'env a été lue à l'import
+        if mod is not None:
+            monkeypatch.setattr(mod, attr, str(root / sub))
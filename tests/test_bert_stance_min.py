@@ -0,0 +1,57 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from baselines.bert_stance_model import doc_windows, fold_of, onnx_export, token_batches, window_mean
+
+
+def test_doc_windows_cover_and_cap():
+    assert doc_windows(10, 20) == [(0, 10)]
+    w = doc_windows(100, 30, stride=10, max_windows=0)
+    assert w[0] == (0, 30) and w[-1] == (70, 100)
+    assert all(b - a == 30 for a, b in w)
+    assert all(w[i + 1][0] - w[i][1] <= 0 for i in range(len(w) - 1))  # recouvrement, pas de trou
+    capped = doc_windows(10_000, 30, stride=10, max_windows=4)
+    assert len(capped) == 4 and capped[0] == (0, 30) and capped[-1] == (9970, 10_000)
+
+
+def test_fold_and_batches():
+    keys = ["00000000aa", "00000001bb", "00000002cc", "ffffffff00"]
+    assert fold_of(keys, 2).tolist() == [0, 1, 0, 1]
+    lengths = np.array([10, 200, 30, 190, 12])
+    batches = token_batches(lengths, budget=400)
+    assert sorted(np.concatenate(batches).tolist()) == list(range(5))
+    assert all(len(b) == 1 or lengths[b].max() * len(b) <= 400 for b in batches)
+
+
+def test_window_mean():
+    docs = pd.DataFrame({"actor_id": ["A", "A", "A", "B"], "domain_id": ["c"] * 4,
+                         "date": ["2024-01-01", "2024-01-05", "2024-02-01", "2024-01-02"]})
+    win = pd.DataFrame({"actor_id": ["A", "A", "B"], "domain_id": ["c"] * 3,
+                        "win_start": pd.to_datetime(["2024-01-01", "2024-03-01", "2024-01-01"]),
+                        "win_end": pd.to_datetime(["2024-01-31", "2024-03-31", "2024-01-31"])})
+    got = window_mean(win, docs, np.array([0.2, 0.6, 0.9, 1.0]))
+    assert np.allclose(got[[0, 2]], [0.4, 1.0]) and np.isnan(got[1])
+
+
+def test_onnx_export_is_tied_to_its_fold_model(tmp_path):
+    model_dir = tmp_path / "models" / "fp1" / "fold0"
+    (model_dir / "onnx").mkdir(parents=True)
+    meta = {"source": str(model_dir), "task": "sequence-classification",
+            "files": {"fp32": "model.onnx", "int8": "model.int8.onnx"}}
+    (model_dir / "onnx" / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+    (model_dir / "onnx" / "model.int8.onnx").write_bytes(b"x" * 10)
+    onnx_dir, ident = onnx_export(model_dir, export=False)
+    assert onnx_dir == model_dir / "onnx" and ident.startswith("onnx-int8-")
+    (model_dir / "onnx" / "model.int8.onnx").write_bytes(b"x" * 11)  # ré-export -> autre cache de probabilités
+    assert onnx_export(model_dir, export=False)[1] != ident
+    # export copié depuis le modèle d'un autre entraînement : refusé
+    other = tmp_path / "models" / "fp2" / "fold0"
+    other.mkdir(parents=True)
+    (model_dir / "onnx").rename(other / "onnx")
+    with pytest.raises(RuntimeError):
+        onnx_export(other, export=False)
+    with pytest.raises(FileNotFoundError):
+        onnx_export(model_dir, export=False)
@@ -0,0 +1,46 @@
+import sys, pathlib, pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from etl.boilerplate import strip_boilerplate, strip_page_furniture
+
+def test_page_furniture_removed():
+    pages = [f"CONGRESSIONAL RECORD — HOUSE\nBody line {w} on the floor.\nH{100+i}"
+             for i, w in enumerate(["alpha", "beta", "gamma", "delta"])]
+    txt = strip_page_furniture("\f".join(pages))
+    assert "CONGRESSIONAL RECORD" not in txt
+    assert "H101" not in txt
+    assert "Body line gamma on the floor." in txt
+
+def test_corpus_boilerplate_per_source():
+    words = "alpha beta gamma delta epsilon zeta".split()
+    banner = "We use some essential cookies to make this website work."
+    docs = pd.DataFrame({
+        "actor_id": ["UK"] * len(words) + ["US"],
+        "text": [f"{banner} The {w} policy is about border security." for w in words]
+                + [f"{banner} The House met."],
+        "tokens": 0,
+    })
+    out = strip_boilerplate(docs, min_docs=3)
+    assert not out.loc[out["actor_id"] == "UK", "text"].str.contains("cookies").any()
+    # source US : une seule occurrence -> conservée
+    assert out.loc[out["actor_id"] == "US", "text"].str.contains("cookies").all()
+    assert (out["tokens_removed"] > 0).sum() == len(words)
+    assert (out["tokens"] > 0).all()
+
+def test_page_furniture_keeps_short_and_body_repeats():
+    body = ["Mr. SMITH. I ask unanimous consent.", "The SPEAKER pro tempore.", "There was no objection.",
+            "Amen.", "The bill was passed."]
+    pages = [f"CONGRESSIONAL RECORD — HOUSE\nDaily Digest running head\n{w} remarks.\n" + "\n".join(body)
+             + f"\nClosing {w} line.\nH{100+i}"
+             for i, w in enumerate(["alpha", "beta", "gamma", "delta"])]
+    txt = strip_page_furniture("\f".join(pages))
+    assert "Daily Digest running head" not in txt        # en-tête répété
+    assert txt.count("There was no objection.") == 4     # formule du corps de page
+    assert txt.count("Amen.") == 4
+
+def test_lone_numbers_kept_outside_page_edges():
+    body = "Mr. SMITH. The vote in\n2024\nwas close.\nYeas\n212\nNays\n201\nThe motion was agreed to."
+    assert strip_page_furniture(body) == body  # un seul bloc, sans \f : pas de n° de page
+    pages = [f"Page head\n{body}\n{i + 1}" for i in range(2)]
+    txt = strip_page_furniture("\f".join(pages))
+    assert txt.count("\n2024\n") == 2 and txt.count("\n212\n") == 2
+    assert not txt.endswith("\n2") and "was close." in txt
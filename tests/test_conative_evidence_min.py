@@ -0,0 +1,60 @@
+import sys, pathlib
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.fc_fi_v3 as v3
+from features.conative_evidence import Evidence
+from test_conative_hits_min import DF, LEX
+from test_fc_fi_v3_batch import _blank
+
+
+def _run(tmp_path, monkeypatch, df=DF, nlp=_blank, **kw):
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX, encoding="utf-8")
+    monkeypatch.setattr(v3, "_load_spacy_models", lambda langs, profile=None: {l: nlp(l.lower()) for l in langs})
+    return v3.apply_fc_fi_v3(df, lang_col="lang", alignment_col="alignment", lexicon_path=str(lex), **kw)
+
+
+def test_evidence_spans_and_highlight(tmp_path, monkeypatch):
+    ref = _run(tmp_path, monkeypatch)
+    out = _run(tmp_path, monkeypatch, evidence_path=str(tmp_path / "ev"))
+    pd.testing.assert_frame_equal(ref, out)  # opt-in : scores inchangés
+    ev = Evidence.load(tmp_path / "ev")
+    assert len(ev) == len(DF) and list(ev.docs["doc_id"]) == list(DF["doc_id"])
+
+    sp = ev.spans("d2")  # "we have to stop and need to urge"
+    text = DF.loc[1, "text"]
+    # "have" : entrée lemme et entrée pattern du même concept
+    assert [text[a:b] for a, b in zip(sp["start"], sp["end"])] == ["have", "have to", "stop", "need", "urge"]
+    assert list(sp["source"]) == ["lemma", "pattern", "lemma", "lemma", "lemma"]
+    assert list(sp["concept_id"])[1:4] == ["oblig", "block", "oblig"] and sp["weight"].iloc[1] == 0.85
+    assert ev.highlight("d2", text, labels=False) == "we [[have to]] [[stop]] and [[need]] to [[urge]]"
+    assert ev.highlight("d1", DF.loc[0, "text"]) == "We [[must|push:oblig 0.90]] [[block|inhibit:block 0.85]] it"
+    assert ev.spans("d4").empty and ev.spans("d6").empty
+
+
+def test_evidence_same_offsets_per_row_store_and_chunks(tmp_path, monkeypatch):
+    long = "Nothing. " * 40 + "We must block it. " * 3 + "and we have to"
+    df = pd.DataFrame({"doc_id": ["a", "b"], "text": [long, "we must"], "lang": ["EN", "EN"], "alignment": [0.5, 0.5]})
+    small = lambda lang: setattr(nlp := _blank(lang), "max_length", 120) or nlp  # texte long : par tranches
+    runs = [dict(batch_size=0), dict(batch_size=2), dict(batch_size=2, lemma_store_dir=str(tmp_path / "ls")),
+            dict(batch_size=0, lemma_store_dir=str(tmp_path / "ls"))]
+    seen = []
+    for i, kw in enumerate(runs):
+        _run(tmp_path, monkeypatch, df=df, nlp=small, evidence_path=str(tmp_path / f"ev{i}"), **kw)
+        sp = Evidence.load(tmp_path / f"ev{i}").spans("a")
+        seen.append(sp)
+        assert [long[a:b] for a, b in zip(sp["start"], sp["end"])] == ["must", "block"] * 3 + ["have", "have to"]
+    for sp in seen[1:]:
+        pd.testing.assert_frame_equal(seen[0], sp)
+
+
+def test_evidence_parts_per_batch(tmp_path, monkeypatch):
+    _run(tmp_path, monkeypatch, evidence_path=str(tmp_path / "ref"))
+    ref = Evidence.load(tmp_path / "ref")
+    for rows in ([3, 1], [2], [0, 4, 5]):  # un lot / shard par appel, même dossier
+        _run(tmp_path, monkeypatch, df=DF.iloc[rows], evidence_path=str(tmp_path / "ev"))
+    ev = Evidence.load(tmp_path / "ev")
+    assert len(ev) == len(DF) and ev.n_spans == ref.n_spans
+    for d in DF["doc_id"]:
+        pd.testing.assert_frame_equal(ev.spans(d), ref.spans(d))
@@ -0,0 +1,94 @@
+import sys, pathlib
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import features.fc_fi_v3 as v3
+from features import conative_hits
+from test_fc_fi_v3_batch import _blank
+
+LEX = """concept_id,lemma,language,type,pos,pattern_lemma_re,weight,notes
+oblig,must,EN,push,AUX,,0.90,
+oblig,have,EN,push,PHRASE,\\bhave\\s+to\\b,0.85,
+oblig,need,EN,push,VERB,,0.60,
+,urge,EN,push,VERB,,0.40,
+,press,EN,push,VERB,,0.30,
+block,block,EN,inhibit,VERB,,0.85,
+block,stop,EN,inhibit,VERB,,0.50,
+devoir,devoir,FR,push,VERB,,0.90,
+bloquer,bloquer,FR,inhibit,VERB,,0.85,
+"""
+
+DF = pd.DataFrame({
+    "doc_id": ["d1", "d2", "d3", "d4", "d5", "d6"],
+    "text": ["We must block it", "we have to stop and need to urge", "nous devons bloquer devoir",
+             "nothing here", "press urge need must stop", None],
+    "lang": ["EN", "EN", "FR", "EN", "EN", "EN"],
+    "alignment": [0.2, 0.7, None, 0.5, 0.9, 0.1],
+})
+
+
+def _run(tmp_path, monkeypatch, lex_text, df=DF, **kw):
+    lex = tmp_path / f"lex{abs(hash(lex_text))}.csv"
+    lex.write_text(lex_text, encoding="utf-8")
+    monkeypatch.setattr(v3, "_load_spacy_models", lambda langs, profile=None: {l: _blank(l.lower()) for l in langs})
+    return v3.apply_fc_fi_v3(df, lang_col="lang", alignment_col="alignment", lexicon_path=str(lex), **kw)
+
+
+def test_rescore_reproduces_v3(tmp_path, monkeypatch):
+    out, hm = _run(tmp_path, monkeypatch, LEX, return_hits=True, hits_path=str(tmp_path / "hits"))
+    assert hm.H.shape[0] == len(DF)
+    for h in (hm, conative_hits.load(tmp_path / "hits")):
+        res = conative_hits.rescore(h)
+        for c in ("fc", "fi", "beta"):
+            assert np.allclose(res[c], out[c], atol=1e-12)
+    assert list(conative_hits.load(tmp_path / "hits").docs["doc_id"]) == list(DF["doc_id"])
+
+
+def test_rescore_new_weights_alignment_lambda(tmp_path, monkeypatch):
+    _, hm = _run(tmp_path, monkeypatch, LEX, return_hits=True)
+    # poids par concept == relancer v3 avec le lexique modifié
+    lex2 = LEX.replace("0.90,\noblig,have", "0.30,\noblig,have").replace("0.85,\noblig,need", "0.30,\noblig,need") \
+              .replace("0.60,", "0.30,")
+    ref = _run(tmp_path, monkeypatch, lex2)
+    res = conative_hits.rescore(hm, weights={"oblig": 0.3})
+    assert np.allclose(res["fc"], ref["fc"], atol=1e-12) and np.allclose(res["beta"], ref["beta"], atol=1e-12)
+
+    from features.conative import parse_conative_lexicon
+    p2 = tmp_path / "lex2.csv"
+    p2.write_text(lex2, encoding="utf-8")
+    res2 = conative_hits.rescore(hm, lexicon=parse_conative_lexicon(p2))
+    assert np.allclose(res2["fc"], ref["fc"], atol=1e-12)
+
+    a = np.linspace(0, 1, len(DF))
+    ref_a = _run(tmp_path, monkeypatch, LEX, df=DF.assign(alignment=a))
+    assert np.allclose(conative_hits.rescore(hm, alignment=a)["fi"], ref_a["fi"], atol=1e-12)
+
+    r = conative_hits.rescore(hm, lam=0.0, alignment=0.0)
+    assert np.allclose(r["fc"], 0.0) and np.allclose(r["fi"], 0.0)
+
+
+def test_concept_signals_split_lemma_pattern(tmp_path, monkeypatch):
+    _, hm = _run(tmp_path, monkeypatch, LEX, return_hits=True)
+    M, cols = conative_hits.concept_signals(hm)
+    row = pd.Series(M.toarray()[1], index=pd.MultiIndex.from_frame(cols.fillna("-")))
+    assert row[("push", "oblig", "lemma")] == 0.85  # "have" (0.85) > "need" (0.60)
+    assert row[("push", "oblig", "pattern")] == 0.85
+    assert row[("inhibit", "block", "lemma")] == 0.5
+    assert row[("push", "-", "lemma")] == 0.4   # sans concept : un seul groupe, max
+
+
+def test_batches_append_parts_and_realign(tmp_path, monkeypatch):
+    import run_sensitivity
+    full = _run(tmp_path, monkeypatch, LEX)
+    path = str(tmp_path / "hits")
+    # lots du runner en flux / shards : une part chacun, dans le désordre, FR seul dans la 2e
+    for rows in ([4, 5, 0], [2], [1, 3]):
+        _run(tmp_path, monkeypatch, LEX, df=DF.iloc[rows], hits_path=path)
+    _run(tmp_path, monkeypatch, LEX, df=DF.iloc[[1]], hits_path=path)  # lot rejoué : la part récente gagne
+    hm = conative_hits.load(path)
+    assert sorted(hm.docs["doc_id"]) == sorted(DF["doc_id"]) and hm.H.shape[0] == len(DF)
+    res = conative_hits.rescore(conative_hits.select(hm, DF["doc_id"]))
+    assert np.allclose(res["fc"], full["fc"], atol=1e-12) and list(res["doc_id"]) == list(DF["doc_id"])
+    got = run_sensitivity._push_inhibit_from_hits(DF.drop(columns="doc_id"), path)  # par empreinte du texte
+    assert np.allclose(got["push"], full["push"]) and np.allclose(got["inhibit"], full["inhibit"])
+    assert conative_hits.clear_parts(path) == 4
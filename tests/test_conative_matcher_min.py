@@ -0,0 +1,41 @@
+import sys, pathlib, random
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from features.conative import load_conative_lexicon, conative_from_lemmas
+from utils.tokens import tokenize
+
+LEX = "07_Config/lexicons/lexicon_conative_v1.clean.csv"
+
+def _reference(lemmas, text, lang, lex):
+    # boucle historique : 2 lookups par token puis rx.search par pattern
+    out = []
+    for tp in ("push", "inhibit"):
+        table = lex.lemmas.get(lang, {}).get(tp, {})
+        acc = {}
+        for lem in lemmas:
+            if lem in table:
+                w, cid = table[lem]
+                acc[cid] = max(acc.get(cid, 0.0), w)
+        for rx, w, cid in lex.patterns.get(lang, {}).get(tp, []):
+            if rx.search(text.lower()):
+                acc[cid] = max(acc.get(cid, 0.0), w)
+        out.append(min(1.0, sum(acc.values())))
+    return tuple(out)
+
+def test_compiled_matcher_equals_reference():
+    lex = load_conative_lexicon(LEX)
+    rnd = random.Random(0)
+    vocab = ([k for lang in lex.lemmas.values() for tp in lang.values() for k in tp]
+             + "to for up not the il va faut ne pas we they must time is it".split()
+             + ["have to", "need to", "calls for", "it is time to", "il faut", "ne pas retarder"])
+    for lang in ("EN", "FR"):
+        for _ in range(200):
+            text = " ".join(rnd.choice(vocab) for _ in range(rnd.randint(0, 60)))
+            lemmas = [t.lower() for t in tokenize(text)]
+            push, inh, dbg = conative_from_lemmas(lemmas, text, lang, lex)
+            assert (push, inh) == _reference(lemmas, text, lang, lex)
+
+def test_required_literal_prefilter():
+    from features.conative_matcher import required_literal
+    assert required_literal(r"\bhave\s+to\b") == "have"
+    assert required_literal(r"\bhas\s+to\b") == "ha"  # 's' ~ 'ſ' sous IGNORECASE
+    assert required_literal(r"must|shall") is None
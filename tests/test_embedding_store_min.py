@@ -0,0 +1,64 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import numpy as np
+import pytest
+from features.embedding_store import EmbeddingStore
+
+
+def _vecs(n, dim=16, seed=0):
+    v = np.random.default_rng(seed).normal(size=(n, dim)).astype(np.float32)
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+
+@pytest.mark.parametrize("dtype,tol", [("float16", 2e-3), ("int8", 2e-2)])
+def test_append_reopen_and_dot(tmp_path, dtype, tol):
+    v = _vecs(10)
+    store = EmbeddingStore(tmp_path, "m/x", dim=16, dtype=dtype)
+    assert store.append([f"d{i}" for i in range(6)], v[:6]) == 6
+    assert store.append(["d5", "d6", "d7", "d7"], v[5:9]) == 2  # d5 déjà là, d7 répété
+
+    again = EmbeddingStore(tmp_path, "m/x")
+    assert len(again) == 8 and again.dtype == dtype and again.dim == 16
+    assert isinstance(again.matrix(), np.memmap)
+    assert np.abs(again.get(["d7", "d0"]) - v[[7, 0]]).max() < tol
+    assert again.rows(["d3", "nope"]).tolist() == [3, -1]
+
+    q = _vecs(3, seed=1)
+    assert np.abs(again.dot(q, block_rows=3) - v[:8] @ q.T).max() < tol
+    blocks = list(again.blocks(block_rows=5))
+    assert [a for a, _ in blocks] == [0, 5]
+    assert np.abs(np.vstack([b for _, b in blocks]) - v[:8]).max() < tol
+
+
+def test_errors(tmp_path):
+    with pytest.raises(ValueError):
+        EmbeddingStore(tmp_path, "m")  # dim requis à la création
+    store = EmbeddingStore(tmp_path, "m", dim=4)
+    with pytest.raises(ValueError):
+        store.append(["a"], np.zeros((1, 3)))
+    with pytest.raises(KeyError):
+        store.get(["a"])
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_append_after_interrupted_write(tmp_path, dtype):
+    v = _vecs(6)
+    store = EmbeddingStore(tmp_path, "m", dim=16, dtype=dtype)
+    store.append(["a", "b", "c"], v[:3])
+    # écriture interrompue : lignes (et scales) écrites, ids.tsv incomplet
+    d = store.dir
+    with open(d / store._fname, "ab") as f:
+        f.write(np.zeros((2, 16), dtype=store._np_dtype).tobytes())
+    if dtype == "int8":
+        with open(d / "scales.f32", "ab") as f:
+            f.write(np.ones(2, dtype=np.float32).tobytes())
+    with open(d / "ids.tsv", "ab") as f:
+        f.write(b"x\t3")  # ligne partielle
+
+    again = EmbeddingStore(tmp_path, "m")
+    assert len(again) == 3 and again.matrix().shape == (3, 16)
+    assert again.append(["d", "e", "f"], v[3:]) == 3
+    reopened = EmbeddingStore(tmp_path, "m")
+    assert reopened.rows(["d", "f"]).tolist() == [3, 5] and reopened.matrix().shape == (6, 16)
+    assert np.abs(reopened.get(["a", "d", "f"]) - v[[0, 3, 5]]).max() < 2e-2
+    assert "x" not in reopened
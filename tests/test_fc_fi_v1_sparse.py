@@ -0,0 +1,20 @@
+import sys, pathlib
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from features.fc_fi import apply_fc_fi_v1
+
+LEXICON = {"T1": {"pro": ["Secure", "border"], "anti": ["open"]},
+           "T2": {"pro": ["growth"], "anti": ["tax", "border"]}}
+
+def test_sparse_engine_equals_loop():
+    docs = pd.DataFrame({
+        "text": ["Secure the BORDER, secure growth!", "", None, "open open tax 42",
+                 "İstanbul border_open borders", "growth " * 50,
+                 "border—open\u00a0Tax l’énergie ½ x²", "fcfidocsep"],
+    }, index=[10, 11, 12, 13, 14, 15, 16, 17])
+    ref = apply_fc_fi_v1(docs, LEXICON, chunk_size=0)
+    for cs in (1, 4, 100):
+        pd.testing.assert_frame_equal(ref, apply_fc_fi_v1(docs, LEXICON, chunk_size=cs))
+    assert ref.loc[10, "fc_mean"] == 4 / 5 and ref.loc[10, "fi_mean"] == 1 / 5
+    assert ref.loc[14, "len_tokens"] == 3
+    assert ref.loc[16, "fi_mean"] == 3 / 7  # séparateurs non ASCII (—, NBSP, ’)
@@ -0,0 +1,52 @@
+import sys, math, pathlib
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.nlp_registry as registry
+from features.fc_fi import apply_fc_fi_v2
+from test_fc_fi_v3_batch import _blank
+
+LEXICON = {"T1": {"pro": ["Secure", "border"], "anti": ["open"]},
+           "T2": {"pro": ["growth", "border"], "anti": ["tax"]},
+           "T3": {"pro": [], "anti": []}}
+
+def _reference(lemmas, domains, lexicon):
+    # boucle historique (Counter + iterrows) réduite à l'essentiel
+    lex = {t: {s: {w.lower() for w in ws} for s, ws in sd.items()} for t, sd in lexicon.items()}
+    idf = {}
+    for dom in pd.Series(domains).dropna().unique():
+        sub = [l for l, d in zip(lemmas, domains) if d == dom]
+        dfreq = {}
+        for l in sub:
+            for w in set(l):
+                dfreq[w] = dfreq.get(w, 0) + 1
+        idf[dom] = {w: math.log((len(sub) + 1) / (n + 1)) + 1.0 for w, n in dfreq.items()}
+    fc, fi = [], []
+    for l, dom in zip(lemmas, domains):
+        wts = [idf.get(dom, {}).get(w, 0.0) for w in l]
+        tot = sum(wts) or 1.0
+        fc.append(min(1.0, sum(x for s in lex.values() for w, x in zip(l, wts) if w in s["pro"]) / tot))
+        fi.append(min(1.0, sum(x for s in lex.values() for w, x in zip(l, wts) if w in s["anti"]) / tot))
+    return fc, fi
+
+def test_sparse_v2_matches_reference(monkeypatch):
+    monkeypatch.setattr(registry, "get_nlp", lambda lang, profile=None: _blank(lang.lower()))
+    docs = pd.DataFrame({
+        "text": ["secure border growth", "open border tax tax", "", "growth growth plan",
+                 "border open", "the of and", "tax reform"],
+        "language": ["en", "en", "fr", "en", "fr", "en", "en"],
+        "domain_id": ["D1", "D1", "D1", "D2", "D2", None, "D2"],
+    }, index=[5, 3, 9, 1, 0, 7, 2])
+    out, tm = apply_fc_fi_v2(docs, LEXICON, return_telos_matrix=True)
+    nlp = _blank("en")
+    lemmas = [[t.lemma_.lower() for t in nlp(x) if t.is_alpha and not t.is_stop] for x in docs["text"]]
+    fc, fi = _reference(lemmas, docs["domain_id"].tolist(), LEXICON)
+    np.testing.assert_allclose(out["fc_mean"].to_numpy(), fc, rtol=1e-12, atol=1e-15)
+    np.testing.assert_allclose(out["fi_mean"].to_numpy(), fi, rtol=1e-12, atol=1e-15)
+    assert out["len_tokens"].tolist() == [len(l) for l in lemmas]
+    assert list(out.index) == list(docs.index)
+    assert tm.teloi == ["T1", "T2", "T3"] and tm.fc.shape == (7, 3)
+    # "border" compte pour T1 et T2 ; domaine manquant -> scores nuls
+    assert tm.fc[1, 0] == tm.fc[1, 1] > 0 and tm.fc[:, 2].nnz == 0
+    assert out.iloc[5]["fc_mean"] == 0.0
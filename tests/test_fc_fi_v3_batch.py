@@ -0,0 +1,44 @@
+import sys, pathlib
+import pandas as pd
+import spacy
+from spacy.language import Language
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import features.fc_fi_v3 as v3
+
+LEX_CSV = """concept_id,lemma,language,type,pos,pattern_lemma_re,weight,notes
+must,must,EN,push,AUX,,0.90,
+have_to,have,EN,push,PHRASE,\\bhave\\s+to\\b,0.85,
+block,block,EN,inhibit,VERB,,0.85,
+devoir,devoir,FR,push,VERB,,0.90,
+bloquer,bloquer,FR,inhibit,VERB,,0.85,
+"""
+
+@Language.component("_test_lower_lemma")
+def _lower_lemma(doc):
+    for t in doc:
+        t.lemma_ = t.text.lower()
+    return doc
+
+def _blank(lang):
+    nlp = spacy.blank(lang)
+    nlp.add_pipe("_test_lower_lemma", name="lemmatizer")
+    return nlp
+
+def test_batched_equals_per_row(tmp_path, monkeypatch):
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX_CSV, encoding="utf-8")
+    monkeypatch.setattr(v3, "_load_spacy_models",
+                        lambda langs, profile=None: {l: _blank(l.lower()) for l in langs})
+    df = pd.DataFrame({
+        "text": ["We must block it", "Il faut devoir bloquer", None, "we have to act",
+                 "nous devons", "Block block must"],
+        "lang": ["EN", "FR", "EN", "en", "fr", "EN"],
+        "alignment": [0.2, None, 0.5, 1.7, "x", 0.9],
+    })
+    ref = v3.apply_fc_fi_v3(df, lang_col="lang", alignment_col="alignment",
+                            lexicon_path=str(lex), batch_size=0)
+    out = v3.apply_fc_fi_v3(df, lang_col="lang", alignment_col="alignment",
+                            lexicon_path=str(lex), batch_size=2)
+    pd.testing.assert_frame_equal(ref, out)
+    assert out.loc[0, "fc"] > 0 and out.loc[0, "fi"] > 0
+    assert out.loc[3, "fc"] == 0.85 * 1.0 + 0.5 * 0.0  # alignment clipped to 1
@@ -0,0 +1,58 @@
+import sys, pathlib
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.fc_fi_v3 as v3
+from features.feature_store import FeatureStore, compute_incremental, content_keys
+from test_fc_fi_v3_batch import LEX_CSV, _blank
+
+def test_only_new_documents_are_computed(tmp_path, monkeypatch):
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX_CSV, encoding="utf-8")
+    calls = []
+
+    def compute(d):
+        calls.append(len(d))
+        return v3.apply_fc_fi_v3(d, lang_col="lang", lexicon_path=str(lex))
+
+    import features.nlp_profiles as profiles
+    monkeypatch.setattr(profiles, "model_meta", lambda lang, profile=None, root=None:
+                        {"lang": lang.lower(), "name": "core_news_lg", "version": "3.7.0"})
+    monkeypatch.setattr(v3, "get_nlp", lambda *a, **k: (_ for _ in ()).throw(AssertionError("model loaded")))
+    cfg = v3.feature_config(str(lex), langs=("FR", "EN"), key_cols=["text", "lang"])  # sans charger de modèle
+    assert cfg["models"] == {"EN": "en_core_news_lg-3.7.0", "FR": "fr_core_news_lg-3.7.0"}
+    assert cfg["max_chars"] == {"EN": 1_000_000, "FR": 1_000_000}
+    monkeypatch.setattr(v3, "_load_spacy_models", lambda langs, profile=None: {l: _blank(l.lower()) for l in langs})
+    store = FeatureStore(tmp_path / "fs", cfg)
+    df = pd.DataFrame({"text": ["We must block it", "nous devons", "We must block it", None],
+                       "lang": ["EN", "FR", "EN", "EN"]}, index=[4, 3, 2, 1])
+    ref = compute(df)
+    calls.clear()
+    out = compute_incremental(df, content_keys(df, ["text", "lang"]), compute, store)
+    pd.testing.assert_frame_equal(out, ref)
+    assert calls == [3]  # doublon calculé une fois
+
+    # ajout de 2 lignes (dont une déjà connue) + store rouvert : seule la nouvelle est calculée
+    more = pd.concat([df, pd.DataFrame({"text": ["il faut bloquer", "nous devons"], "lang": ["FR", "FR"]})],
+                     ignore_index=True)
+    store2 = FeatureStore(tmp_path / "fs", cfg)
+    out2 = compute_incremental(more, content_keys(more, ["text", "lang"]), compute, store2)
+    assert calls == [3, 1] and len(store2) == 4
+    pd.testing.assert_frame_equal(out2, compute(more))
+    # autre configuration (autre lexique) -> autre namespace, vide
+    assert len(FeatureStore(tmp_path / "fs", dict(cfg, lexicon="other"))) == 0
+
+def test_get_reads_indexed_rows_and_compacts(tmp_path, monkeypatch):
+    import features.feature_store as fs
+    monkeypatch.setattr(fs, "ROW_GROUP_ROWS", 4)  # plusieurs row groups par part
+    store = FeatureStore(tmp_path / "fs", {"stage": "t"}, compact_parts=3)
+    feats = pd.DataFrame({"key": [f"k{i:02d}" for i in range(30)], "x": [float(i) for i in range(30)]})
+    for a in range(0, 30, 10):  # 3 lots -> 3 parts, pas encore compactées
+        assert store.put(feats.iloc[a:a + 10]) == 10
+    assert len(store.parts()) == 3
+    got = store.get(["k27", "k03", "missing", "k14", "k03"])
+    assert got["x"].to_dict() == {"k27": 27.0, "k03": 3.0, "k14": 14.0}
+    store.put(pd.DataFrame({"key": ["k30", "k01"], "x": [30.0, -1.0]}))  # 4e part -> compaction
+    assert len(store.parts()) == 1 and len(store) == 31
+    reopened = FeatureStore(tmp_path / "fs", {"stage": "t"})
+    assert reopened.get(["k30", "k01", "k29"])["x"].to_dict() == {"k30": 30.0, "k01": 1.0, "k29": 29.0}
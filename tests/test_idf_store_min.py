@@ -0,0 +1,97 @@
+import sys, pathlib
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.nlp_registry as registry
+from features.fc_fi import apply_fc_fi_v2
+from features.idf_store import DocFreqStore
+from test_fc_fi_v2_sparse import LEXICON
+from test_fc_fi_v3_batch import _blank
+
+DOCS = pd.DataFrame({
+    "text": ["secure border growth", "open border tax tax", "growth growth plan",
+             "border open", "tax reform", "open growth"],
+    "language": ["en"] * 6,
+    "domain_id": ["D1", "D1", "D2", "D2", "D2", 3],
+})
+
+def test_store_matches_batch_and_freezes(tmp_path, monkeypatch):
+    monkeypatch.setattr(registry, "get_nlp", lambda lang, profile=None: _blank(lang.lower()))
+    ref = apply_fc_fi_v2(DOCS, LEXICON)
+    store = DocFreqStore(tmp_path / "idf")
+    out = apply_fc_fi_v2(DOCS, LEXICON, idf_store=store, update_idf=True)
+    np.testing.assert_allclose(out["fc_mean"], ref["fc_mean"], rtol=1e-12)
+    np.testing.assert_allclose(out["fi_mean"], ref["fi_mean"], rtol=1e-12)
+    assert store.n_docs == {"D1": 2, "D2": 3, "3": 1}
+
+    # lot partiel contre l'IDF figé = mêmes scores que dans le corpus complet
+    part = apply_fc_fi_v2(DOCS.iloc[[4, 1]], LEXICON, idf_store=store)
+    np.testing.assert_allclose(part["fc_mean"], ref["fc_mean"].iloc[[4, 1]], rtol=1e-12)
+    # ré-ajout du même lot : rien ne change
+    apply_fc_fi_v2(DOCS, LEXICON, idf_store=store, update_idf=True)
+    assert store.n_docs["D2"] == 3
+
+def test_remove_and_snapshots(tmp_path):
+    store = DocFreqStore(tmp_path)
+    store.add(["D1", "D1", None], ["a", "b", "c"], [["x", "y", "x"], ["y"], ["z"]])
+    assert store.df["D1"] == {"x": 1, "y": 2} and ("D1", "a") in store
+    assert store.snapshot() == "v0001"
+    assert store.remove(["D1", "D1"], ["a", "zz"], [["x", "y"], ["q"]]) == 1
+    assert store.df["D1"] == {"y": 1} and store.n_docs["D1"] == 1
+    assert store.snapshot() == "v0002"
+    assert DocFreqStore.load(tmp_path).df["D1"] == {"y": 1}
+    old = DocFreqStore.load(tmp_path, "v0001")
+    assert old.n_docs["D1"] == 2 and old.version == "v0001"
+    np.testing.assert_allclose(old.idf("D1", ["x", "y", "new"]),
+                               np.log(3 / np.array([2, 3, 1])) + 1)
+    with pytest.raises(FileExistsError):
+        store.snapshot("v0002")
+
+def test_snapshots_append_only_changed_ids(tmp_path):
+    from features.idf_store import DOCS_LOG
+    log = tmp_path / DOCS_LOG
+    store = DocFreqStore(tmp_path)
+    store.add(["D1", "D2"], ["a", "b"], [["x"], ["y"]])
+    store.snapshot()
+    assert log.stat().st_size == 2 * 17 and not store.dirty
+    store.add(["D1", "D1"], ["a", "c"], [["x"], ["z"]])  # "a" déjà compté
+    with open(log, "ab") as f:
+        f.write(b"+" + b"\0" * 10)  # fin orpheline d'un snapshot interrompu
+    store.snapshot()
+    assert log.stat().st_size == 3 * 17  # seul "c" ajouté, orphelin tronqué
+    assert ("D1", "c") in DocFreqStore.load(tmp_path) and ("D1", "c") not in DocFreqStore.load(tmp_path, "v0001")
+    # repartir d'une version ancienne : le journal reçoit la différence avec la dernière
+    old = DocFreqStore.load(tmp_path, "v0001")
+    old.remove(["D2"], ["b"], [["y"]])
+    old.snapshot()
+    last = DocFreqStore.load(tmp_path)
+    assert last.version == "v0003" and ("D1", "a") in last
+    assert ("D2", "b") not in last and ("D1", "c") not in last
+
+def test_real_features_v2_updates_idf_store(tmp_path, monkeypatch):
+    import json
+    import run_real_features as rrf
+    monkeypatch.setattr(registry, "get_nlp", lambda lang, profile=None: _blank(lang.lower()))
+    lex = tmp_path / "lex.json"
+    lex.write_text(json.dumps(LEXICON), encoding="utf-8")
+    docs = DOCS.astype({"domain_id": str})  # parquet : colonne homogène
+    docs.iloc[:4].to_parquet(tmp_path / "a.parquet")
+    docs.to_parquet(tmp_path / "b.parquet")
+    idf = tmp_path / "idf"
+    rrf.main(str(tmp_path / "a.parquet"), str(tmp_path / "a_out.parquet"), stage="v2",
+             v2_lexicon=str(lex), idf_store=str(idf))
+    assert DocFreqStore.load(idf).n_docs == {"D1": 2, "D2": 2}
+    # lots de 2 : une version par lot qui ajoute des documents (seul le dernier)
+    rrf.main(str(tmp_path / "b.parquet"), str(tmp_path / "b_out.parquet"), batch_rows=2, stage="v2",
+             v2_lexicon=str(lex), idf_store=str(idf))
+    store = DocFreqStore.load(idf)
+    assert store.versions() == ["v0001", "v0002"] and store.n_docs == {"D1": 2, "D2": 3, "3": 1}
+    # IDF figé : même score que dans le corpus complet
+    rrf.main(str(tmp_path / "b.parquet"), str(tmp_path / "c_out.parquet"), stage="v2",
+             v2_lexicon=str(lex), idf_store=str(idf), freeze_idf=True)
+    ref = apply_fc_fi_v2(DOCS, LEXICON)
+    out = pd.read_parquet(tmp_path / "c_out.parquet")
+    np.testing.assert_allclose(out["fc_mean"], ref["fc_mean"], rtol=1e-12)
+    assert store.versions() == ["v0001", "v0002"]
@@ -0,0 +1,76 @@
+import sys, pathlib
+import pandas as pd
+import spacy
+from spacy.language import Language
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import features.fc_fi_v3 as v3
+from features.lemma_store import LemmaStore, FLAG_ALPHA
+from test_fc_fi_v3_batch import LEX_CSV, _blank
+
+CALLS = {"n": 0}
+
+@Language.component("_test_count_docs")
+def _count_docs(doc):
+    CALLS["n"] += 1
+    return doc
+
+def test_store_roundtrip_and_reuse(tmp_path):
+    nlp = _blank("en")
+    nlp.add_pipe("_test_count_docs")
+    texts = ["We must act now", "Block it, 42 times", "We must act now"]
+    store = LemmaStore.for_nlp(tmp_path, nlp)
+    CALLS["n"] = 0
+    dls = store.lemmatize(texts, nlp)
+    assert CALLS["n"] == 2  # doublon parsé une seule fois
+    assert store.lemmas(dls[0]) == ["we", "must", "act", "now"]
+    assert int(dls[1].starts[-1]) == texts[1].index("times")
+    assert not (dls[1].flags[-2] & FLAG_ALPHA)  # "42"
+
+    reopened = LemmaStore.for_nlp(tmp_path, nlp)
+    assert len(reopened) == 2
+    assert reopened.lemmas(reopened.lemmatize(texts[1:2], nlp)[0]) == ["block", "it", ",", "42", "times"]
+    assert CALLS["n"] == 2
+
+def test_v3_with_store_matches(tmp_path, monkeypatch):
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX_CSV, encoding="utf-8")
+    monkeypatch.setattr(v3, "_load_spacy_models",
+                        lambda langs, profile=None: {l: _blank(l.lower()) for l in langs})
+    df = pd.DataFrame({"text": ["We must block it", "nous devons bloquer", "we have to act"],
+                       "lang": ["EN", "FR", "EN"]})
+    ref = v3.apply_fc_fi_v3(df, lang_col="lang", lexicon_path=str(lex))
+    for bs in (2, 2, 0):  # remplissage, relecture, chemin ligne à ligne
+        out = v3.apply_fc_fi_v3(df, lang_col="lang", lexicon_path=str(lex), batch_size=bs,
+                                lemma_store_dir=str(tmp_path / "store"))
+        pd.testing.assert_frame_equal(ref, out)
+
+def test_lemmatize_flushes_in_bounded_batches(tmp_path, monkeypatch):
+    nlp = _blank("en")
+    store = LemmaStore.for_nlp(tmp_path, nlp)
+    texts = [f"text number {i} must act" for i in range(7)]
+    pending = []
+    real_flush = store.flush
+    monkeypatch.setattr(store, "flush", lambda: (pending.append(len(store._pending)), real_flush()))
+    dls = store.lemmatize(texts, nlp, flush_docs=3)
+    assert pending == [3, 3, 1]  # jamais plus de 3 documents en RAM
+    assert [store.lemmas(d)[2] for d in dls] == [str(i) for i in range(7)]
+    store.lemmatize(["a b c d", "e f g h", "i"], nlp, flush_tokens=4)
+    assert pending[3:] == [1, 1, 1]
+    assert len(LemmaStore.for_nlp(tmp_path, nlp)) == 10
+
+def test_flush_after_interrupted_write(tmp_path):
+    from utils.hashing import text_hash
+    nlp = _blank("en")
+    LemmaStore.for_nlp(tmp_path, nlp).lemmatize(["We must act now"], nlp)
+    d = LemmaStore.for_nlp(tmp_path, nlp).dir
+    # crash simulé : lemma.u32 écrit, ni les autres tableaux ni index.tsv (+ ligne d'index partielle)
+    with open(d / "lemma.u32", "ab") as f:
+        f.write(b"\x07\x00\x00\x00" * 3)
+    with open(d / "index.tsv", "ab") as f:
+        f.write(b"deadbeef\t4")
+    LemmaStore.for_nlp(tmp_path, nlp).lemmatize(["Block it, 42 times"], nlp)
+    assert (d / "lemma.u32").stat().st_size == (d / "start.u32").stat().st_size == 4 * (4 + 5)
+    store = LemmaStore.for_nlp(tmp_path, nlp)
+    dl = store.get(text_hash("Block it, 42 times"))
+    assert len(store) == 2 and store.lemmas(dl) == ["block", "it", ",", "42", "times"]
+    assert int(dl.starts[-1]) == len("Block it, 42 ") and int(dl.ends[0]) == len("Block")
@@ -0,0 +1,29 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import features.conative as conative
+
+CSV = "concept_id,lemma,language,type,pos,pattern_lemma_re,weight,notes\n" \
+      "must,must,EN,push,AUX,,0.90,\nhave_to,have,EN,push,PHRASE,\\bhave\\s+to\\b,0.85,\n"
+
+def test_artifact_reused_then_rebuilt_on_change(tmp_path, monkeypatch):
+    csv = tmp_path / "lex.csv"
+    csv.write_bytes(b"\xef\xbb\xbf" + CSV.encode("utf-8"))
+    monkeypatch.setattr(conative, "_LEXICON_CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(conative, "_LEXICON_MEMO", {})
+
+    lex = conative.load_conative_lexicon(csv)
+    assert lex.fingerprint and len(list((tmp_path / "cache").glob("*.lexc"))) == 1
+
+    # nouveau processus simulé : mémo vidé, l'artefact suffit (aucun re-parse)
+    monkeypatch.setattr(conative, "_LEXICON_MEMO", {})
+    monkeypatch.setattr(conative, "parse_conative_lexicon", lambda p: (_ for _ in ()).throw(AssertionError))
+    again = conative.load_conative_lexicon(csv)
+    assert again.fingerprint == lex.fingerprint
+    assert conative.conative_from_lemmas(["we", "must"], "we have to", "EN", again)[0] == 1.0
+
+    monkeypatch.undo()
+    monkeypatch.setattr(conative, "_LEXICON_CACHE_DIR", str(tmp_path / "cache"))
+    csv.write_text(CSV.replace("0.90", "0.50"), encoding="utf-8")
+    changed = conative.load_conative_lexicon(csv)
+    assert changed.fingerprint != lex.fingerprint
+    assert changed.lemmas["EN"]["push"]["must"][0] == 0.50
@@ -0,0 +1,48 @@
+import sys, pathlib
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.fc_fi_v3 as v3
+from features.lemma_store import LemmaStore
+from features.nlp_chunks import chunk_spans, n_chunks, pipe_chunks
+from test_fc_fi_v3_batch import LEX_CSV, _blank
+
+LONG = ("We must act now. " * 30 + "\n\n" + "They block it, again and again " * 20 + "\n\n"
+        + "x" * 130 + " we have to decide. Done")
+
+def test_chunk_spans_cover_text_on_boundaries():
+    spans = chunk_spans(LONG, 120)
+    assert "".join(LONG[a:b] for a, b in spans) == LONG
+    assert all(b - a <= 120 for a, b in spans) and len(spans) > 5
+    assert LONG[spans[0][1] - 2:spans[0][1]] == ". "  # coupe en fin de phrase
+    assert chunk_spans("short", 0) == [(0, 5)]
+
+def test_long_texts_are_chunked_not_zeroed(tmp_path, monkeypatch):
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX_CSV, encoding="utf-8")
+    df = pd.DataFrame({"text": [LONG, "we must block", "nous devons bloquer"], "lang": ["EN", "EN", "FR"]})
+    monkeypatch.setattr(v3, "_load_spacy_models", lambda langs, profile=None: {l: _blank(l.lower()) for l in langs})
+    one_pass = v3.apply_fc_fi_v3(df, lang_col="lang", lexicon_path=str(lex)).iloc[0]
+    assert one_pass["fcfi_status"] == "ok"
+
+    small = lambda lang: setattr(nlp := _blank(lang), "max_length", 200) or nlp  # nlp(LONG) échouerait
+    monkeypatch.setattr(v3, "_load_spacy_models", lambda langs, profile=None: {l: small(l.lower()) for l in langs})
+    for bs in (0, 2):
+        out = v3.apply_fc_fi_v3(df, lang_col="lang", lexicon_path=str(lex), batch_size=bs)
+        assert out["fcfi_status"].tolist() == ["chunked", "ok", "ok"]
+        assert out.loc[0, "fc"] > 0 and out.loc[0, "fc"] == one_pass["fc"]
+    # lemmes stockés avec les offsets du texte complet
+    nlp = small("en")
+    store = LemmaStore(tmp_path / "ls", "en_test")
+    dl = store.lemmatize([LONG], nlp)[0]
+    parts = next(pipe_chunks(nlp, [LONG]))
+    assert len(parts) > 1 and store.lemmas(dl) == [t.lemma_.lower() for _, d in parts for t in d]
+    assert [LONG[a:b] for a, b in zip(dl.starts.tolist(), dl.ends.tolist())] == [t.text for _, d in parts for t in d]
+    assert [LONG[a:b] for a, b in zip(dl.starts[:3].tolist(), dl.ends[:3].tolist())] == ["We", "must", "act"]
+
+def test_default_only_chunks_what_spacy_would_reject():
+    nlp = _blank("en")  # max_length 1 000 000
+    big = "We must act now. " * 10000  # 170 000 caractères : une seule passe
+    assert n_chunks(big, nlp) == 1 and len(next(pipe_chunks(nlp, [big]))) == 1
+    nlp.max_length = 50000
+    assert n_chunks(big, nlp) == len(next(pipe_chunks(nlp, [big]))) == 4
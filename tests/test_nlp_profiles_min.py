@@ -0,0 +1,20 @@
+import sys, pathlib
+import pytest
+import spacy
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from features.nlp_profiles import load_profile, profile_path, model_name
+
+def test_profile_models():
+    assert model_name("fr", "lemma-fast") == "fr_core_news_sm"
+    assert model_name("EN", "lemma-accurate") == "en_core_web_lg"
+    with pytest.raises(ValueError):
+        model_name("EN", "turbo")
+
+def test_local_stripped_copy_is_loaded(tmp_path):
+    nlp = spacy.blank("en")
+    nlp.add_pipe("sentencizer")
+    out = profile_path("EN", "lemma-fast", root=tmp_path)
+    out.mkdir(parents=True)
+    nlp.to_disk(out)
+    loaded = load_profile("en", "lemma-fast", root=tmp_path)
+    assert loaded.pipe_names == ["sentencizer"]
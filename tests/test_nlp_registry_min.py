@@ -0,0 +1,56 @@
+import sys, pathlib
+import spacy
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import features.nlp_registry as reg
+
+def test_models_loaded_once_and_released(monkeypatch):
+    calls = []
+    monkeypatch.setattr(reg, "load_profile",
+                        lambda lang, prof: calls.append((lang, prof)) or spacy.blank(lang.lower()))
+    reg.release()
+    a = reg.get_nlp("fr", "lemma-fast")
+    assert reg.get_nlp("FR", "lemma-fast") is a
+    reg.preload(["FR", "EN"], "lemma-fast")
+    assert calls == [("FR", "lemma-fast"), ("EN", "lemma-fast")]
+    assert set(reg.load_timings()) >= {"FR/lemma-fast", "EN/lemma-fast"}
+    assert reg.release("EN") == 1
+    assert reg.loaded() == [("FR", "lemma-fast")]
+    reg.release()
+
+def test_rss_budget_keeps_one_model(monkeypatch):
+    # RSS simulé : +100 MB par chargement, jamais rendu à l'OS (arènes glibc)
+    loads = []
+    monkeypatch.setattr(reg, "load_profile", lambda lang, prof: loads.append(lang) or spacy.blank(lang.lower()))
+    monkeypatch.setattr(reg, "rss_mb", lambda: 100.0 * len(loads))
+    monkeypatch.setattr(reg, "_RSS_BUDGET_MB", 150.0)
+    reg.release()
+    reg._SIZES.clear()
+    reg.get_nlp("FR", "lemma-fast")
+    reg.get_nlp("EN", "lemma-fast")           # FR (LRU) libéré avant de charger EN
+    assert reg.loaded() == [("EN", "lemma-fast")] and reg.resident_mb() == 100.0
+    for _ in range(3):  # lots successifs du même groupe : pas de rechargement malgré RSS > budget
+        with reg.scoped("FR", "lemma-fast") as nlp:
+            assert nlp.lang == "fr" and reg.loaded() == [("FR", "lemma-fast")]
+    assert reg.loaded() == [("FR", "lemma-fast")] and loads == ["FR", "EN", "FR"]
+    with reg.scoped("FR", "lemma-fast", budget_mb=0):
+        pass
+    assert reg.loaded() == []
+    reg.release()
+
+
+def test_v3_loads_one_language_group_at_a_time(tmp_path, monkeypatch):
+    import pandas as pd
+    import features.fc_fi_v3 as v3
+    sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+    from test_fc_fi_v3_batch import LEX_CSV, _blank
+    lex = tmp_path / "lex.csv"
+    lex.write_text(LEX_CSV, encoding="utf-8")
+    calls = []
+    monkeypatch.setattr(v3, "_load_spacy_models",
+                        lambda langs, profile=None: calls.append(sorted(langs)) or {l: _blank(l.lower()) for l in langs})
+    df = pd.DataFrame({"text": ["We must block", "il faut devoir", "we have to", "bloquer"],
+                       "lang": ["EN", "FR", "EN", "FR"]})
+    out = v3.apply_fc_fi_v3(df, lang_col="lang", lexicon_path=str(lex), batch_size=2)
+    assert calls == [["EN"], ["FR"]]
+    assert out["fcfi_status"].tolist() == ["ok"] * 4
+    assert out.loc[0, "push"] == 0.9 and out.loc[0, "inhibit"] == 0.85
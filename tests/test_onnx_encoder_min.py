@@ -0,0 +1,30 @@
+import sys, pathlib
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import numpy as np
+import pytest
+from utils.onnx_encoder import check_drift, drift_report, pool
+
+
+def test_mean_pool_ignores_padding():
+    hidden = np.arange(2 * 3 * 2, dtype=np.float32).reshape(2, 3, 2)
+    mask = np.array([[1, 1, 0], [1, 1, 1]])
+    out = pool(hidden, mask, "mean")
+    assert np.allclose(out[0], hidden[0, :2].mean(axis=0))
+    assert np.allclose(out[1], hidden[1].mean(axis=0))
+    assert np.allclose(pool(hidden, mask, "cls"), hidden[:, 0])
+
+
+def test_drift_report_and_gate():
+    rng = np.random.default_rng(0)
+    ref = rng.normal(size=(20, 8))
+    rep = drift_report(ref, ref + 1e-4 * rng.normal(size=ref.shape))
+    assert rep["n"] == 20 and rep["min_cos"] > 0.999 and rep["max_abs"] < 1e-3
+    with pytest.raises(RuntimeError):
+        check_drift(ref, -ref)
+
+
+def test_drift_report_classifier_labels():
+    ref = np.array([[2.0, -1.0], [0.1, 0.0], [-3.0, 1.0]])
+    rep = drift_report(ref, ref + np.array([[0.0, 0.0], [0.0, 0.2], [0.0, 0.0]]), labels=True)
+    assert rep["label_agree"] == 2 / 3  # logits proches de la frontière : classe inversée
+    assert "label_agree" not in drift_report(ref, ref)
@@ -0,0 +1,40 @@
+import sys, pathlib
+import pandas as pd
+import pytest
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from utils.parquet_stream import run_streaming
+
+def _corpus(path, n=23):
+    df = pd.DataFrame({"text": [f"doc {i}" for i in range(n)], "tokens": list(range(n))})
+    df.to_parquet(path, index=False, row_group_size=7)
+    return df
+
+def test_streaming_resumes_after_crash(tmp_path):
+    src = _corpus(tmp_path / "in.parquet")
+    out = tmp_path / "out.parquet"
+    seen = []
+
+    def fn(df, fail_at=None):
+        if fail_at is not None and df["tokens"].iloc[0] >= fail_at:
+            raise RuntimeError("boom")
+        seen.append(len(df))
+        df["n2"] = df["tokens"] * 2
+        df["note"] = None if df["tokens"].iloc[0] == 0 else "x"  # colonne nulle dans le 1er lot
+        return df
+
+    with pytest.raises(RuntimeError):
+        run_streaming(tmp_path / "in.parquet", out, lambda d: fn(d, fail_at=10), batch_rows=5)
+    assert seen == [5, 5] and not out.exists()
+    summary = run_streaming(tmp_path / "in.parquet", out, fn, batch_rows=5)
+    assert summary == {"batches": 5, "skipped": 2, "rows": 23}
+    assert seen == [5, 5, 5, 5, 3]
+    res = pd.read_parquet(out)
+    assert res["text"].tolist() == src["text"].tolist()
+    assert res["n2"].tolist() == [2 * i for i in range(23)]
+    assert not (tmp_path / "out.parquet.parts").exists()
+
+    # autre tag (config différente) : tout est recalculé
+    seen.clear()
+    run_streaming(tmp_path / "in.parquet", out, fn, batch_rows=5, tag="other", keep_parts=True)
+    assert seen == [5, 5, 5, 5, 3]
+    assert (tmp_path / "out.parquet.parts" / "manifest.json").exists()
@@ -0,0 +1,77 @@
+import sys, pathlib
+import numpy as np
+import pandas as pd
+import pytest
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+
+from sklearn.metrics import roc_auc_score
+
+from features.fc_fi_v3 import _fc_fi_beta_from_scores
+from features.sensitivity import alignment_sources, auc_matrix, lambda_sweep, run_sweep
+from features.windows import sliding_windows
+from run_hypotheses import _bootstrap_ci_delta_auc
+
+
+def _docs(n=240, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "doc_id": [f"d{i}" for i in range(n)],
+        "actor_id": rng.choice(["A1", "A2", "A3"], n),
+        "domain_id": rng.choice(["climate", "security"], n),
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D"),
+        "push": rng.choice([0.0, 0.4, 0.9, 1.0], n),
+        "inhibit": rng.choice([0.0, 0.3, 0.8], n),
+        "alignment": rng.random(n),
+        "len_tokens": rng.integers(20, 400, n),
+    })
+
+
+def test_sweep_matches_v3_formula():
+    df = _docs()
+    al = alignment_sources(df, ["neutral", "alignment", "0.9"])
+    sw = lambda_sweep(df["push"], df["inhibit"], al, [0.0, 0.5, 1.0])
+    assert sw.fc.shape == (3, len(df), 3) and sw.fc.dtype == np.float32
+    ref = np.array([_fc_fi_beta_from_scores(p, h, a) for p, h, a in zip(df["push"], df["inhibit"], df["alignment"])])
+    np.testing.assert_allclose(sw.fc[1, :, 1], ref[:, 0], atol=1e-6)
+    np.testing.assert_allclose(sw.fi[1, :, 1], ref[:, 1], atol=1e-6)
+    np.testing.assert_allclose(sw.beta[1, :, 1], ref[:, 2], atol=1e-6)
+    assert np.allclose(sw.fc[2, :, 0], df["push"] * 0.9)   # λ=0 : pas de report croisé
+    with pytest.raises(ValueError):
+        lambda_sweep(df["push"], df["inhibit"], al, [1.5])
+
+
+def test_auc_matrix_matches_sklearn():
+    rng = np.random.default_rng(1)
+    s = rng.integers(0, 5, 80).astype(float)  # ex aequo
+    Y = rng.integers(0, 2, (80, 4))
+    Y[:, 3] = 1
+    got = auc_matrix(Y, s)
+    for g in range(3):
+        assert got[g] == pytest.approx(roc_auc_score(Y[:, g], s))
+    assert np.isnan(got[3])
+
+
+def test_run_sweep_matches_windows_and_hypotheses():
+    df = _docs()
+    res = run_sweep(df, lambdas=[0.25, 0.5], alignments=["alignment"], n_boot=50, tel_score="fc-fi")
+    assert len(res) == 2 and list(res["lambda"]) == [0.25, 0.5]
+
+    # point λ=0.5 : mêmes fenêtres / étiquettes / scores que run_windows + run_hypotheses
+    fc, fi, _ = lambda_sweep(df["push"], df["inhibit"], df["alignment"], [0.5])[:3]
+    win = sliding_windows(df.assign(fc=fc[0, :, 0], fi=fi[0, :, 0]), extra_cols=["len_tokens"])
+    assert res["n_windows"].iloc[1] == len(win)
+    y = (win["fc_mean"] >= win["fi_mean"]).astype(int).to_numpy()
+    s_tel = (win["fc_mean"] - win["fi_mean"]).fillna(0.0).to_numpy()
+    lt = win["len_tokens_mean"].fillna(win["len_tokens_mean"].median()).to_numpy()
+    s_style = (lt - lt.min()) / (lt.max() - lt.min() + 1e-9)
+    delta = roc_auc_score(y, s_tel) - roc_auc_score(y, s_style)
+    row = res.iloc[1]
+    assert row["H1_delta_auc_telotopic_minus_style"] == pytest.approx(delta, abs=1e-6)
+    lo, hi = _bootstrap_ci_delta_auc(y, s_tel, s_style, n_boot=50, seed=42)
+    assert (row["H1_ci95_lo"], row["H1_ci95_hi"]) == pytest.approx((lo, hi), abs=1e-6)
+    assert "H3_lrt_p" in res.columns
+
+
+def test_run_sweep_needs_push_inhibit():
+    with pytest.raises(ValueError):
+        run_sweep(_docs().drop(columns=["push"]))
@@ -0,0 +1,70 @@
+import sys, pathlib
+import numpy as np
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+sys.path.insert(0, str(pathlib.Path("tests").resolve()))
+import features.nlp_registry as registry
+from features.fc_fi import apply_fc_fi_v1, apply_fc_fi_v2
+from features.sharded import ShardedExecutor, plan_shards
+from test_fc_fi_v2_sparse import LEXICON
+from test_fc_fi_v3_batch import _blank
+
+def _docs(n=60):
+    rng = np.random.default_rng(0)
+    words = ["secure", "border", "growth", "open", "tax", "plan", "the", "reform"]
+    lens = rng.integers(1, 400, size=n)
+    texts = [" ".join(rng.choice(words, size=k)) for k in lens]
+    return pd.DataFrame({"text": texts, "tokens": lens, "language": "en",
+                         "domain_id": rng.choice(["D1", "D2"], size=n)},
+                        index=rng.permutation(n) + 100)
+
+def test_plan_longest_first_and_covering():
+    cost = np.array([1, 50, 2, 3, 40, 1, 1, 2], dtype=float)
+    shards = plan_shards(cost, workers=2, shards_per_worker=2)
+    assert shards[0].tolist() == [1] and shards[1].tolist() == [4]
+    assert sorted(np.concatenate(shards).tolist()) == list(range(8))
+
+def test_sharded_outputs_equal_sequential(monkeypatch):
+    docs = _docs()
+    with ShardedExecutor(workers=3) as ex:
+        pd.testing.assert_frame_equal(ex.run(docs, "v1", lexicon=LEXICON), apply_fc_fi_v1(docs, LEXICON))
+        # v2 : lemmes en parallèle, IDF sur tout le lot (séquentiel ici : registre patché)
+        monkeypatch.setattr(registry, "get_nlp", lambda lang, profile=None: _blank(lang.lower()))
+        ex.workers = 1
+        pd.testing.assert_frame_equal(ex.run(docs, "v2", lexicon=LEXICON), apply_fc_fi_v2(docs, LEXICON))
+
+def test_sharded_v2_splits_worker_and_scoring_kwargs(tmp_path, monkeypatch):
+    docs = _docs(20)
+    monkeypatch.setattr(registry, "get_nlp", lambda lang, profile=None: _blank(lang.lower()))
+    ref, ref_tm = apply_fc_fi_v2(docs, LEXICON, return_telos_matrix=True)
+    import inspect, features.sharded as sharded
+    from features.fc_fi import v2_lemmas
+    sent = []
+    real = sharded._run_shard
+    monkeypatch.setattr(sharded, "_run_shard", lambda stage, shard, kw: (sent.append(set(kw)), real(stage, shard, kw))[1])
+    with ShardedExecutor(workers=1) as ex:
+        # lemma_store_dir -> v2_lemmas (workers) ; return_telos_matrix -> apply_fc_fi_v2 (parent)
+        out, tm = ex.run(docs, "v2", lexicon=LEXICON, lang_col="language", return_telos_matrix=True,
+                         lemma_store_dir=str(tmp_path / "ls"))
+    pd.testing.assert_frame_equal(out, ref)
+    assert sent and all(k <= set(inspect.signature(v2_lemmas).parameters) for k in sent)
+    assert tm.teloi == ref_tm.teloi and np.allclose(tm.fc.toarray(), ref_tm.fc.toarray())
+
+def test_real_features_workers_preload(monkeypatch):
+    import run_real_features as rrf
+    import features.sharded as sharded
+    seen = {}
+    class _Ex:
+        def __init__(self, workers, **kw):
+            seen.update(kw, workers=workers)
+        def __enter__(self):
+            return self
+        def __exit__(self, *exc):
+            pass
+    monkeypatch.setattr(sharded, "ShardedExecutor", _Ex)
+    monkeypatch.setattr(rrf, "_main", lambda *a: None)
+    monkeypatch.setenv("SPACY_PROFILE", "lemma-fast")
+    monkeypatch.delenv("CONATIVE_LEXICON_PATH", raising=False)
+    rrf.main("in.parquet", "out.parquet", workers=4)
+    assert seen == {"workers": 4, "langs": {"FR"}, "profile": "lemma-fast",
+                    "lexicon_path": "01_Protocoles/lexicon_conative_v1.csv"}
@@ -0,0 +1,53 @@
+import sys, pathlib, json
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from collect.telemetry import CollectorMetrics
+
+def test_metrics_jsonl_and_prometheus(tmp_path):
+    m = CollectorMetrics("t", jsonl_path=str(tmp_path / "m.jsonl"), prom_path=str(tmp_path / "m.prom"))
+    m.observe_request("https://api.congress.gov/v3/x", "api", 200, 0.3, nbytes=100)
+    m.observe_request("https://api.congress.gov/v3/x", "api", 429, 0.02, retries=1)
+    with m.cpu_timer("pdfminer", doc="d1") as info:
+        info["chars"] = 10
+    m.close()
+
+    events = [json.loads(l) for l in (tmp_path / "m.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [e["event"] for e in events] == ["http", "http", "extract", "summary"]
+    lat = events[-1]["latency_s"][0]
+    assert lat["host"] == "api.congress.gov" and lat["count"] == 2
+    prom = (tmp_path / "m.prom").read_text(encoding="utf-8")
+    assert 'collector_retries_total{collector="t",host="api.congress.gov",phase="api"} 1' in prom
+    assert 'le="+Inf"} 2' in prom
+
+def test_metrics_context_manager_closes_on_early_exit(tmp_path):
+    m = CollectorMetrics("t", jsonl_path=str(tmp_path / "m.jsonl"))
+    try:
+        with m:
+            m.observe_request("https://www.govinfo.gov/x.pdf", "pdf", 200, 0.1)
+            raise SystemExit(2)
+    except SystemExit:
+        pass
+    m.close()  # idempotent : un seul summary
+    events = [json.loads(l)["event"] for l in (tmp_path / "m.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert events == ["http", "summary"]
+
+def test_close_is_not_interleaved_with_other_threads(tmp_path):
+    import threading
+    m = CollectorMetrics("t", jsonl_path=str(tmp_path / "m.jsonl"))
+    stop = threading.Event()
+
+    def work():
+        while not stop.is_set():
+            m.observe_request("https://www.congress.gov/x", "html", 200, 0.01)
+            with m.cpu_timer("html_parse", doc="https://www.congress.gov/x"):
+                pass
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for t in threads:
+        t.start()
+    m.close()
+    stop.set()
+    for t in threads:
+        t.join()
+    events = [json.loads(l) for l in (tmp_path / "m.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert events[-1]["event"] == "summary" and [e["event"] for e in events].count("summary") == 1
+    assert all(e["doc"] == "https://www.congress.gov/x" for e in events if e["event"] == "extract")
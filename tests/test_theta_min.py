@@ -0,0 +1,51 @@
+import sys, pathlib, math
+from collections import Counter
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+import numpy as np
+import pandas as pd
+from features.theta import apply_theta, telos_matrix
+from utils.tokens import TOKEN_RE
+
+TELOI = {"A1": {"climate": ["transition", "green", "green"], "security": "border safety"},
+         "B1": {"climate": ["coal", "jobs"]}}
+
+
+def _ref_cos(text, kws):
+    x = Counter(t.lower() for t in TOKEN_RE.findall(text))
+    t = Counter(w.lower() for w in TOKEN_RE.findall(" ".join(kws) if isinstance(kws, list) else kws))
+    nx = math.sqrt(sum(v * v for v in x.values()))
+    nt = math.sqrt(sum(v * v for v in t.values()))
+    return sum(x[w] * t[w] for w in t) / (nx * nt) if nx else 0.0
+
+
+def test_apply_theta_matches_loop():
+    df = pd.DataFrame({
+        "actor_id": ["A1", "A1", "B1", "B1", "C9", "A1"],
+        "domain_id": ["climate", "security", "climate", "security", "climate", "climate"],
+        "text": ["Green green transition now", "Border: safety, safety!", "coal JOBS coal", "coal",
+                 "green", ""],
+    }, index=[10, 11, 12, 13, 14, 15])
+    for cs in (0, 2):
+        out = apply_theta(df, TELOI, chunk_size=cs)
+        assert list(out.index) == list(df.index)
+        for (_, r), got in zip(df.iterrows(), out["cos_theta"]):
+            kws = TELOI.get(r.actor_id, {}).get(r.domain_id)
+            if kws is None:
+                assert np.isnan(got)
+            else:
+                assert abs(got - _ref_cos(r.text, kws)) < 1e-12
+
+
+def test_inhibiting_docs_point_away():
+    df = pd.DataFrame({"actor_id": ["A1", "A1"], "domain_id": ["climate"] * 2,
+                       "text": ["green transition", "green transition"],
+                       "fc_mean": [0.5, 0.1], "fi_mean": [0.0, 0.4]})
+    cos = apply_theta(df, TELOI)["cos_theta"].to_numpy()
+    assert cos[0] > 0 and abs(cos[1] + cos[0]) < 1e-12
+
+
+def test_telos_matrix_rows_normalised():
+    index, vocab, T = telos_matrix(TELOI)
+    assert list(index) == [("A1", "climate"), ("A1", "security"), ("B1", "climate")]
+    assert np.allclose(np.sqrt(np.asarray(T.multiply(T).sum(axis=1)).ravel()), 1.0)
+    assert "green" in vocab
@@ -0,0 +1,19 @@
+import sys, pathlib, re
+import pandas as pd
+sys.path.insert(0, str(pathlib.Path("04_Code_Scripts").resolve()))
+from utils.tokens import count_tokens, count_tokens_batch, token_spans, ensure_len_tokens
+
+TEXTS = ["Nous accélérons la transition énergétique.", "", "We must act — now!", "Nous accélérons la transition énergétique."]
+
+def test_counts_match_regex_and_batch():
+    ref = [len(re.findall(r"\w+", t)) for t in TEXTS]
+    assert [count_tokens(t) for t in TEXTS] == ref
+    assert count_tokens_batch(pd.Series(TEXTS)).tolist() == ref
+    starts, ends = token_spans(TEXTS[2])
+    assert len(starts) == ref[2]
+    assert TEXTS[2][starts[1]:ends[1]] == "must"
+
+def test_ensure_len_tokens_reuses_tokens_column():
+    df = pd.DataFrame({"text": TEXTS[:3], "tokens": [99, 0, 4]})
+    out = ensure_len_tokens(df)
+    assert out["len_tokens"].tolist() == [99, 0, 4]
@@ -29,6 +29,9 @@ import re
 import sys
 from typing import Dict, List, Tuple
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "04_Code_Scripts"))
+from features.conative import read_lexicon_rows  # lecture CSV partagée avec le loader
+
 REQUIRED_COLS = [
     "concept_id",
     "lemma",
@@ -55,25 +58,10 @@ def find_lexicon_path(cli_arg: str | None) -> str:
 def read_csv_any_utf8(path: str) -> Tuple[List[Dict[str, str]], bool]:
     """
     Lit CSV en UTF-8, détecte BOM (UTF-8-SIG) et le retire si présent.
-    Retourne (rows, had_bom).
+    Retourne (rows, had_bom). Même lecture que le loader (features.conative).
     """
-    had_bom = False
-    # Première passe pour détecter BOM
-    with open(path, "rb") as f:
-        head = f.read(3)
-        if head == b"\xef\xbb\xbf":
-            had_bom = True
-    # Lecture texte (utf-8-sig enlève BOM côté header s'il existe)
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.DictReader(f)
-        rows = list(reader)
-        # Normaliser les noms de colonnes (strip et retrait éventuel du BOM résiduel)
-        fieldnames = [c.lstrip("\ufeff").strip() for c in (reader.fieldnames or [])]
-        # Re-créer rows avec clés normalisées
-        norm_rows = []
-        for r in rows:
-            norm_rows.append({fieldnames[i]: v for i, v in enumerate(r.values())})
-    return norm_rows, had_bom
+    _, rows, had_bom = read_lexicon_rows(path)
+    return rows, had_bom
 
 def check_header(columns: List[str]) -> List[str]:
     missing = [c for c in REQUIRED_COLS if c not in columns]
@@ -114,16 +102,11 @@ def main(argv: List[str]) -> int:
     if had_bom:
         warnings.append("[ENCODING] BOM detected. Prefer clean UTF-8 (no BOM).")
 
-    # Vérifier header exact
-    # Relecture du header à partir de la première ligne si disponible
-    with open(path, "r", encoding="utf-8-sig", newline="") as f:
-        reader = csv.reader(f)
-        try:
-            header = next(reader)
-        except StopIteration:
-            errors.append("[CSV] Empty file.")
-            return end(strict, errors, warnings)
-    header = [h.lstrip("\ufeff").strip() for h in header]
+    # Vérifier header (normalisé par le lecteur partagé)
+    header, _, _ = read_lexicon_rows(path)
+    if not header:
+        errors.append("[CSV] Empty file.")
+        return end(strict, errors, warnings)
     missing = check_header(header)
     if missing:
         errors.append(f"[CSV] Missing required columns: {missing}")